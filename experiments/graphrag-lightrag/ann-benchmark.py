@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Recall vs latency of the local HNSW index against exact search.
+
+Builds a local vector index (common/vector_index.py, VECTOR_STORE=local)
+over generated embeddings, upserting them in seeding-sized batches so the
+graph is linked incrementally, then runs the same queries through the exact
+scan and through the HNSW graph for every `--ef`. Reported per dataset, size
+and M: build time, recall@k against the exact top k, and single-query latency
+percentiles with the speedup over the exact scan.
+
+Datasets are synthetic, L2-normalized float32 vectors of `--dim` (384, the
+all-MiniLM-L6-v2 size):
+- clustered: Gaussian clusters around random centers, like embeddings of
+  documents on a limited set of topics (queries come from the same clusters),
+- uniform: uniformly distributed on the sphere, the hardest case for a graph
+  index (no neighborhood structure to exploit).
+
+Needs NumPy only (no services):
+
+    python3 ann-benchmark.py
+    python3 ann-benchmark.py --sizes 100000 --m 8 16 32 --ef 16 32 64 128 256
+    python3 ann-benchmark.py --datasets clustered --sizes 50000 --index-dir /tmp/ann-index
+
+With `--index-dir` every index is also saved, reopened from disk and checked
+to return the same results, and the save / load times are reported.
+"""
+import argparse
+import os
+import shutil
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from benchmark import percentile, write_json
+
+from common import vector_index
+from common.vector_index import LocalVectorIndex
+
+DATASETS = ("clustered", "uniform")
+# Points per upsert while building (as many as one seeding batch)
+UPSERT_BATCH = 256
+COLLECTION = "ann_bench"
+
+
+class Options:
+    """Attribute bag standing in for Qdrant's VectorParams / HnswConfigDiff / SearchParams / PointStruct."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def generate(dataset: str, size: int, queries: int, dim: int, seed: int):
+    """(points, queries) as float32 matrices."""
+    rng = np.random.default_rng(seed)
+    if dataset == "clustered":
+        centers = rng.normal(size=(max(size // 500, 8), dim))
+        points = centers[rng.integers(0, len(centers), size)] + 0.8 * rng.normal(size=(size, dim))
+        query_points = centers[rng.integers(0, len(centers), queries)] + 0.8 * rng.normal(size=(queries, dim))
+    else:
+        points = rng.normal(size=(size, dim))
+        query_points = rng.normal(size=(queries, dim))
+    return points.astype(np.float32), query_points.astype(np.float32)
+
+
+def build(index: LocalVectorIndex, points: np.ndarray, m: int, ef_construct: int) -> float:
+    index.create_collection(
+        COLLECTION,
+        Options(size=points.shape[1], distance="Cosine"),
+        hnsw_config=Options(m=m, ef_construct=ef_construct),
+    )
+    start = time.perf_counter()
+    for offset in range(0, len(points), UPSERT_BATCH):
+        batch = points[offset:offset + UPSERT_BATCH]
+        index.upsert(COLLECTION, [
+            Options(id=offset + i, vector=vector, payload=None) for i, vector in enumerate(batch)
+        ])
+    return time.perf_counter() - start
+
+
+def timed_search(index: LocalVectorIndex, queries: np.ndarray, k: int, params: Options):
+    """(ids per query, latencies in ms), one query at a time as the services search."""
+    ids, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.search(COLLECTION, query, limit=k, search_params=params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append([hit.id for hit in hits])
+    return ids, latencies
+
+
+def recall(found: List[List], truth: List[List]) -> float:
+    return sum(len(set(a) & set(b)) / len(b) for a, b in zip(found, truth) if b) / len(truth)
+
+
+def latency_stats(latencies: List[float]) -> Dict:
+    return {
+        "p50": round(percentile(latencies, 50), 3),
+        "p95": round(percentile(latencies, 95), 3),
+        "mean": round(sum(latencies) / len(latencies), 3),
+    }
+
+
+def run(dataset: str, size: int, m: int, args) -> Dict:
+    points, queries = generate(dataset, size, args.queries, args.dim, args.seed)
+    path = None
+    if args.index_dir:
+        path = os.path.join(args.index_dir, f"{dataset}-{size}-m{m}")
+        shutil.rmtree(path, ignore_errors=True)
+    index = LocalVectorIndex(path)
+    build_seconds = build(index, points, m, args.ef_construct)
+    graph = index.stats()["collections"][COLLECTION]["hnsw"]
+    print(f"  M={m}: linked {size} points in {build_seconds:.1f}s ({size / build_seconds:.0f}/s), max level {graph['max_level']}")
+
+    truth, exact_latencies = timed_search(index, queries, args.k, Options(exact=True))
+    exact = latency_stats(exact_latencies)
+    print(f"    exact      recall@{args.k}=1.000  p50={exact['p50']:.2f}ms p95={exact['p95']:.2f}ms")
+    sweep = []
+    for ef in args.ef:
+        found, latencies = timed_search(index, queries, args.k, Options(hnsw_ef=ef))
+        stats = latency_stats(latencies)
+        point = {
+            "ef": ef,
+            f"recall@{args.k}": round(recall(found, truth), 4),
+            "latency_ms": stats,
+            "speedup_p50": round(exact["p50"] / stats["p50"], 2) if stats["p50"] else None,
+        }
+        sweep.append(point)
+        print(
+            f"    ef={ef:<7} recall@{args.k}={point[f'recall@{args.k}']:.3f}  p50={stats['p50']:.2f}ms "
+            f"p95={stats['p95']:.2f}ms  x{point['speedup_p50']}"
+        )
+
+    result = {
+        "dataset": dataset,
+        "size": size,
+        "m": m,
+        "ef_construct": args.ef_construct,
+        "build_seconds": round(build_seconds, 2),
+        "graph": graph,
+        "exact_latency_ms": exact,
+        "ef_sweep": sweep,
+    }
+    if path:
+        start = time.perf_counter()
+        index.save(COLLECTION)
+        result["save_seconds"] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        reopened = LocalVectorIndex(path)
+        result["load_seconds"] = round(time.perf_counter() - start, 3)
+        params = Options(hnsw_ef=args.ef[0])
+        before, _ = timed_search(index, queries, args.k, params)
+        after, _ = timed_search(reopened, queries, args.k, params)
+        result["reload_identical"] = before == after
+        print(f"    saved in {result['save_seconds']}s, reopened in {result['load_seconds']}s, identical results: {before == after}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs latency of the local HNSW index against exact search")
+    parser.add_argument("--datasets", nargs="+", choices=DATASETS, default=list(DATASETS),
+                        help="Generated datasets (default: both)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 50000],
+                        help="Points per dataset (default: 10000 50000)")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension (default: 384)")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per dataset (default: 200)")
+    parser.add_argument("--k", type=int, default=10, help="Neighbors per query (default: 10)")
+    parser.add_argument("--m", nargs="+", type=int, default=[16], help="HNSW M values (default: 16)")
+    parser.add_argument("--ef-construct", type=int, default=100, help="HNSW ef_construct (default: 100)")
+    parser.add_argument("--ef", nargs="+", type=int, default=[16, 32, 64, 128, 256],
+                        help="Search ef values (default: 16 32 64 128 256)")
+    parser.add_argument("--seed", type=int, default=42, help="Dataset RNG seed (default: 42)")
+    parser.add_argument("--index-dir", default=None, help="Also save and reopen every index under this directory")
+    parser.add_argument("--output", default="bench/ann.json", help="JSON report path (default: bench/ann.json)")
+    args = parser.parse_args()
+
+    # Every search of the sweep goes through the graph, whatever the collection size
+    vector_index.HNSW_FULL_SCAN_ROWS = 0
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "dim": args.dim,
+            "queries": args.queries,
+            "k": args.k,
+            "ef_construct": args.ef_construct,
+            "upsert_batch": UPSERT_BATCH,
+            "seed": args.seed,
+        },
+        "runs": [],
+    }
+    for dataset in args.datasets:
+        for size in args.sizes:
+            print(f"\n=== {dataset}, {size} x {args.dim} ===")
+            for m in args.m:
+                report["runs"].append(run(dataset, size, m, args))
+
+    write_json(args.output, report)
+    print(f"\n✓ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Scale-sweep benchmark for GraphRAG vs LightRAG.
+
+For each dataset (docs-50 ... docs-1000) this script:
+1. switches both services to the dataset (full re-seed) and times the seed,
+2. sends every question of questions.json to both `/ask` endpoints
+   `--repeat` times at a fixed `--concurrency`,
+3. records p50/p95/p99 latency, nodes explored and Neo4j round trips per
+   pipeline, and accuracy from LightRAG's `/eval`,
+4. writes a JSON report (and optionally CSV), and compares it against a
+   stored baseline report.
+
+Only the standard library is used, so it runs on the host against the ports
+published by docker compose:
+
+    python3 benchmark.py --output bench/report.json --csv bench/report.csv
+    python3 benchmark.py --baseline bench/baseline.json --output bench/report.json
+    python3 benchmark.py --datasets docs-50 docs-300 --save-baseline bench/baseline.json
+
+Exits with status 1 when a regression against the baseline is found.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+GRAPHRAG_URL = os.getenv("GRAPHRAG_URL", "http://127.0.0.1:8200")
+LIGHTRAG_URL = os.getenv("LIGHTRAG_URL", "http://127.0.0.1:8100")
+
+DEFAULT_DATASETS = ["docs-50", "docs-100", "docs-200", "docs-300", "docs-500", "docs-1000"]
+PIPELINES = ("graphrag", "lightrag")
+
+# Same parameters as /eval
+GRAPHRAG_PARAMS = {"graph_walk": {"max_depth": 3, "prune_threshold": 0.2}}
+LIGHTRAG_PARAMS = {"top_k": 6, "depth": 2, "theta": 0.3}
+
+# Metrics compared against the baseline: (pipeline key, metric, higher is worse)
+REGRESSION_METRICS = [
+    ("latency_ms", "p50", True),
+    ("latency_ms", "p95", True),
+    ("latency_ms", "p99", True),
+    ("avg_round_trips", None, True),
+    ("seed_seconds", None, True),
+    ("accuracy", None, False),
+]
+
+
+def http_json(method: str, url: str, payload: Optional[dict] = None, timeout: float = 600.0, headers: Optional[dict] = None) -> dict:
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json", **(headers or {})})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read().decode("utf-8"))
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in [0, 100]); 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def switch_dataset(base_url: str, file: str) -> Tuple[float, dict]:
+    """Full re-seed of one service; returns (client-side seconds, response)."""
+    start = time.perf_counter()
+    query = urllib.parse.urlencode({"file": file, "incremental": "false"})
+    result = http_json("POST", f"{base_url}/switch-dataset?{query}")
+    elapsed = time.perf_counter() - start
+    if result.get("status") != "success":
+        raise RuntimeError(f"switch-dataset failed on {base_url}: {result}")
+    return elapsed, result
+
+
+def ask(pipeline: str, question: str, engine: Optional[str], timeout: float, path: str = "/ask") -> dict:
+    """
+    One /ask call (or `path`, e.g. /ask-async); returns latency and the exploration metrics of the response.
+
+    The /ask result cache is bypassed (Cache-Control: no-store), so repeated
+    questions measure the pipeline rather than cache hits.
+    """
+    if pipeline == "graphrag":
+        payload = {"question": question, "graph_walk": {**GRAPHRAG_PARAMS["graph_walk"], "engine": engine}}
+        url = f"{GRAPHRAG_URL}{path}"
+    else:
+        payload = {"question": question, **LIGHTRAG_PARAMS, "engine": engine}
+        url = f"{LIGHTRAG_URL}{path}"
+
+    start = time.perf_counter()
+    try:
+        data = http_json("POST", url, payload, timeout=timeout, headers={"Cache-Control": "no-store"})
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        return {"latency_ms": (time.perf_counter() - start) * 1000, "error": str(e)}
+    latency_ms = (time.perf_counter() - start) * 1000
+
+    metadata = data.get("metadata", {})
+    if pipeline == "graphrag":
+        explored = metadata.get("nodes_explored", 0)
+        round_trips = metadata.get("round_trips", 0)
+    else:
+        subgraph = data.get("subgraph") or {}
+        explored = subgraph.get("total_nodes", 0)
+        round_trips = subgraph.get("round_trips", 0)
+    return {"latency_ms": latency_ms, "nodes_explored": explored, "round_trips": round_trips}
+
+
+def run_load(pipeline: str, questions: List[str], repeat: int, concurrency: int, engine: Optional[str], timeout: float, path: str = "/ask") -> Dict:
+    """Send every question `repeat` times to `path` with `concurrency` requests in flight."""
+    jobs = [q for _ in range(repeat) for q in questions]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(lambda q: ask(pipeline, q, engine, timeout, path), jobs))
+    wall = time.perf_counter() - start
+
+    ok = [s for s in samples if "error" not in s]
+    latencies = [s["latency_ms"] for s in ok]
+    return {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "throughput_rps": round(len(ok) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "max": round(max(latencies), 2) if latencies else 0.0,
+        },
+        "avg_nodes_explored": round(sum(s["nodes_explored"] for s in ok) / len(ok), 2) if ok else 0.0,
+        "avg_round_trips": round(sum(s["round_trips"] for s in ok) / len(ok), 2) if ok else 0.0,
+    }
+
+
+def run_dataset(name: str, questions: List[str], args) -> Dict:
+    file = f"data/{name}.jsonl"
+    print(f"\n=== {name} ===")
+    entry: Dict = {"dataset": name, "file": file}
+
+    # Seed each service in turn (they share Neo4j, so seeding both at once would skew timings)
+    seed = {}
+    for pipeline, base_url in (("graphrag", GRAPHRAG_URL), ("lightrag", LIGHTRAG_URL)):
+        seconds, result = switch_dataset(base_url, file)
+        seed[pipeline] = {
+            "seconds": round(seconds, 3),
+            "doc_count": result.get("doc_count"),
+            "seed_stats": result.get("seed_stats"),
+        }
+        print(f"  ✓ {pipeline} seeded {result.get('doc_count')} docs in {seconds:.2f}s")
+
+    # Accuracy from /eval (same scoring as evaluate.sh)
+    summary = http_json("GET", f"{LIGHTRAG_URL}/eval").get("summary", {})
+    total = summary.get("total") or 0
+
+    for pipeline in PIPELINES:
+        if args.warmup:
+            run_load(pipeline, questions, 1, args.concurrency, args.engine, args.timeout)
+        stats = run_load(pipeline, questions, args.repeat, args.concurrency, args.engine, args.timeout)
+        stats["seed_seconds"] = seed[pipeline]["seconds"]
+        stats["doc_count"] = seed[pipeline]["doc_count"]
+        stats["seed_stats"] = seed[pipeline]["seed_stats"]
+        ok = summary.get(f"{pipeline}_ok", 0)
+        stats["accuracy"] = round(ok / total, 3) if total else None
+        entry[pipeline] = stats
+        lat = stats["latency_ms"]
+        print(
+            f"  {pipeline:<8} p50={lat['p50']:.1f}ms p95={lat['p95']:.1f}ms p99={lat['p99']:.1f}ms "
+            f"explored={stats['avg_nodes_explored']} round_trips={stats['avg_round_trips']} "
+            f"accuracy={ok}/{total} errors={stats['errors']}"
+        )
+    return entry
+
+
+def _metric(stats: Dict, key: str, sub: Optional[str]):
+    value = stats.get(key)
+    return value.get(sub) if sub and isinstance(value, dict) else value
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """
+    Compare metrics dataset by dataset. Latency, round trips and seed time
+    regress when they grow by more than `tolerance` (relative); accuracy
+    regresses on any drop. Datasets missing from the baseline are skipped.
+    """
+    base_by_name = {d["dataset"]: d for d in baseline.get("datasets", [])}
+    rows = []
+    for entry in report["datasets"]:
+        base_entry = base_by_name.get(entry["dataset"])
+        if not base_entry:
+            continue
+        for pipeline in PIPELINES:
+            if pipeline not in entry or pipeline not in base_entry:
+                continue
+            for key, sub, higher_is_worse in REGRESSION_METRICS:
+                current = _metric(entry[pipeline], key, sub)
+                previous = _metric(base_entry[pipeline], key, sub)
+                if current is None or previous is None:
+                    continue
+                if higher_is_worse:
+                    change = (current - previous) / previous if previous else (1.0 if current > previous else 0.0)
+                    regressed = change > tolerance
+                else:
+                    change = current - previous
+                    regressed = change < 0
+                rows.append({
+                    "dataset": entry["dataset"],
+                    "pipeline": pipeline,
+                    "metric": f"{key}.{sub}" if sub else key,
+                    "baseline": previous,
+                    "current": current,
+                    "change": round(change, 3),
+                    "regressed": regressed,
+                })
+    return rows
+
+
+def write_csv(path: str, report: Dict) -> None:
+    columns = [
+        "dataset", "pipeline", "doc_count", "seed_seconds", "requests", "errors", "throughput_rps",
+        "p50_ms", "p95_ms", "p99_ms", "mean_ms", "avg_nodes_explored", "avg_round_trips", "accuracy",
+    ]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for entry in report["datasets"]:
+            for pipeline in PIPELINES:
+                stats = entry[pipeline]
+                lat = stats["latency_ms"]
+                writer.writerow({
+                    "dataset": entry["dataset"], "pipeline": pipeline,
+                    "doc_count": stats["doc_count"], "seed_seconds": stats["seed_seconds"],
+                    "requests": stats["requests"], "errors": stats["errors"],
+                    "throughput_rps": stats["throughput_rps"],
+                    "p50_ms": lat["p50"], "p95_ms": lat["p95"], "p99_ms": lat["p99"], "mean_ms": lat["mean"],
+                    "avg_nodes_explored": stats["avg_nodes_explored"],
+                    "avg_round_trips": stats["avg_round_trips"],
+                    "accuracy": stats["accuracy"],
+                })
+
+
+def write_json(path: str, data: Dict) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scale-sweep benchmark for GraphRAG vs LightRAG")
+    parser.add_argument("--datasets", nargs="+", default=DEFAULT_DATASETS,
+                        help=f"Dataset names under data/ (default: {' '.join(DEFAULT_DATASETS)})")
+    parser.add_argument("--questions", default="lightrag/questions.json",
+                        help="Question set (default: lightrag/questions.json)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight per pipeline (default: 8)")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the question set (default: 5)")
+    parser.add_argument("--warmup", action="store_true", help="Run one unmeasured pass first")
+    parser.add_argument("--engine", choices=["neo4j", "snapshot"], default=None,
+                        help="Graph walk backend for both pipelines (default: service GRAPH_ENGINE)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds (default: 60)")
+    parser.add_argument("--output", default="bench/report.json", help="JSON report path (default: bench/report.json)")
+    parser.add_argument("--csv", default=None, help="Also write a CSV summary to this path")
+    parser.add_argument("--baseline", default=None, help="Baseline report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative growth of latency/round trips/seed time (default: 0.2)")
+    parser.add_argument("--save-baseline", default=None, help="Also write this report as the new baseline")
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = [item["ask"] for item in json.load(f)]
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "concurrency": args.concurrency,
+            "repeat": args.repeat,
+            "engine": args.engine,
+            "questions": len(questions),
+            "graphrag_url": GRAPHRAG_URL,
+            "lightrag_url": LIGHTRAG_URL,
+        },
+        "datasets": [],
+    }
+    for name in args.datasets:
+        report["datasets"].append(run_dataset(name, questions, args))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparison = compare_to_baseline(report, baseline, args.tolerance)
+        report["baseline"] = {"path": args.baseline, "tolerance": args.tolerance, "comparison": comparison}
+        regressions = [row for row in comparison if row["regressed"]]
+
+    write_json(args.output, report)
+    print(f"\n✓ Report written to {args.output}")
+    if args.csv:
+        write_csv(args.csv, report)
+        print(f"✓ CSV written to {args.csv}")
+    if args.save_baseline:
+        write_json(args.save_baseline, report)
+        print(f"✓ Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        if regressions:
+            print(f"⚠ {len(regressions)} regression(s) against {args.baseline}:")
+            for row in regressions:
+                print(f"  {row['dataset']} {row['pipeline']} {row['metric']}: {row['baseline']} -> {row['current']} ({row['change']:+})")
+            sys.exit(1)
+        print(f"✓ No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+Modules shared by the GraphRAG and LightRAG services (and the local vector
+index of ../kg-no-rag).
+
+The services import them as `common.<module>`: their images copy this
+directory to /opt/shared/common with PYTHONPATH=/opt/shared, and
+docker-compose mounts it there next to the service's own /app mount.
+"""
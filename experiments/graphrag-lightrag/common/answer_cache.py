@@ -0,0 +1,142 @@
+"""
+Versioned LRU cache of /ask results.
+
+Keys are (route, normalized question, query parameters, graph version). The
+graph version is a counter bumped whenever the data behind an answer changes
+(seeding, `/reset`, `/switch-dataset`, LightRAG feedback writes); a bump
+drops every entry at once, since no key of an older version can match again.
+A result computed while the version changed is not stored, so a query that
+overlaps a re-seed never caches a half-written graph.
+
+Both services read the same Neo4j graph, and a seed by one of them does not
+reach the other's counter. The cache therefore also remembers the version
+stored with the graph (see graph_store.py): the services pass it to `sync`
+before a lookup, and a version they did not write themselves bumps the counter.
+
+`Cache-Control: no-cache` on a request skips the lookup and stores the fresh
+result; `no-store` skips the cache entirely.
+"""
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def normalize_question(text: str) -> str:
+    """NFKC-normalize and collapse whitespace (case is kept: it can change retrieval)."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def cache_mode(cache_control: Optional[str]) -> Tuple[bool, bool]:
+    """(read, write) for a Cache-Control request header."""
+    directives = {d.strip().lower() for d in (cache_control or "").split(",")}
+    if "no-store" in directives:
+        return False, False
+    if "no-cache" in directives:
+        return False, True
+    return True, True
+
+
+class AnswerCache:
+    """Bounded LRU cache of /ask results, invalidated by a graph version counter."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stale_puts = 0
+        self.evictions = 0
+        self.invalidated = 0
+        self.last_bump: Optional[Dict] = None
+        # Version stored with the graph when the counter last moved
+        self.graph_version: Optional[str] = None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+
+    def key(self, route: str, question: str, params: Dict) -> Tuple:
+        """Key for the current graph version; params must be JSON-serializable."""
+        return (route, normalize_question(question), json.dumps(params, sort_keys=True), self.version)
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple, value: Any) -> bool:
+        """Store value unless disabled or the graph version moved since the key was made."""
+        if self.max_entries <= 0:
+            return False
+        with self._lock:
+            if key[-1] != self.version:
+                self.stale_puts += 1
+                return False
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def fetch(self, key: Tuple, cache_control: Optional[str] = None) -> Tuple[Optional[Any], str]:
+        """Cached value (or None) and its status for the request: "hit", "miss" or "bypass"."""
+        read, _ = cache_mode(cache_control)
+        if not read:
+            with self._lock:
+                self.bypassed += 1
+            return None, "bypass"
+        value = self.get(key)
+        return value, "miss" if value is None else "hit"
+
+    def store(self, key: Tuple, value: Any, cache_control: Optional[str] = None) -> bool:
+        """put() unless the request asked for no-store."""
+        _, write = cache_mode(cache_control)
+        return self.put(key, value) if write else False
+
+    def bump(self, reason: str, graph_version: Optional[str] = None) -> int:
+        """
+        Move to a new graph version and drop every cached result. A seed passes
+        the version it stored with the graph, so that `sync` does not bump again.
+        """
+        with self._lock:
+            if graph_version is not None:
+                self.graph_version = graph_version
+            self.version += 1
+            self.invalidated += len(self._entries)
+            self._entries.clear()
+            self.last_bump = {"reason": reason, "version": self.version, "at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            return self.version
+
+    def sync(self, graph_version: Optional[str]) -> bool:
+        """Bump if the version stored with the graph changed since the last bump; returns whether it did."""
+        with self._lock:
+            if graph_version == self.graph_version:
+                return False
+            self.graph_version = graph_version
+        self.bump("graph version")
+        return True
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "graph_version": self.graph_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "bypassed": self.bypassed,
+            "stale_puts": self.stale_puts,
+            "evictions": self.evictions,
+            "invalidated": self.invalidated,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "last_bump": self.last_bump,
+        }
@@ -0,0 +1,292 @@
+"""
+Entity extractor shared by the GraphRAG and LightRAG pipelines.
+
+The extractor keeps the output contract of the original per-pipeline
+`extract_entities` (same keys, same entity order), but:
+- known names are found with a single automaton-style scan instead of one
+  substring check per name,
+- every pattern is compiled once at import time, and the policy patterns are
+  merged into one alternation,
+- dedupe uses sets instead of linear `not in list` checks.
+
+`ExtractionCache` stores results on disk keyed by a hash of the document text,
+so unchanged documents skip extraction across restarts and dataset switches.
+Bump EXTRACTOR_VERSION whenever the extraction rules change; the cache file is
+also keyed by a fingerprint of the patterns and known names.
+
+Run this file directly for a micro-benchmark:
+
+    python3 extractor.py data/docs-1000.jsonl
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+# Bump when extraction rules change so cached results are invalidated
+EXTRACTOR_VERSION = "2"
+
+# Known products and features that should be prioritized (extracted first)
+KNOWN_PRODUCTS = ["Acme Search", "Globex Graph"]
+KNOWN_FEATURES = ["Semantic Index", "Policy Audit", "Realtime Query"]
+
+# Common words and policy names that the product patterns pick up by accident
+PRODUCT_STOPWORDS = frozenset([
+    "POL-001", "POL-002", "Personal", "Data", "Protection", "Model", "Governance"
+])
+
+# Patterns that used to start with r'\b([A-Z]' start with the character class
+# instead and check the word boundary with `(?<!\w[A-Z])` right after it. The
+# matches are identical, but the regex engine can skip ahead to the next capital
+# letter instead of testing `\b` at every position.
+
+# Product patterns: "Name Platform", "Name Pro", "Name Suite", "Name Manager", etc.
+# Each pattern is scanned separately because their matches overlap
+# (e.g. "Acme Search は" matches three of them).
+_PRODUCT_PATTERNS = [
+    re.compile(r'([A-Z](?<!\w[A-Z])[a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*)*)\s+(?:Platform|Pro|Suite|Manager|Engine|System|Tool|Service|Core|Hub|Framework|Studio|Builder)\b'),
+    re.compile(r'([A-Z](?<!\w[A-Z])[a-zA-Z]+\s+(?:Search|Graph|Vault|Guard|Bridge|Optimizer|Collector|Analyzer|Scanner|Delivery|Campaign|Bot))\b'),
+    re.compile(r'\b(Acme\s+Search|Globex\s+Graph|CloudBridge\s+Platform|DataVault\s+Pro|NetworkGuard\s+Suite)\b'),
+    # Standalone product names that appear in "Product Name は" pattern
+    re.compile(r'([A-Z](?<!\w[A-Z])[a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*)\s+は'),
+]
+
+# Feature patterns: "Feature Name" (typically capitalized words)
+_FEATURE_PATTERNS = [
+    re.compile(r'\b(Semantic\s+Index|Policy\s+Audit|Realtime\s+Query)\b'),
+    re.compile(r'([A-Z](?<!\w[A-Z])[a-zA-Z]+\s+(?:Index|Query|Audit|Engine|Manager|Optimizer|Analyzer|Scanner|Framework|Builder))\b'),
+    # Features that appear after "機能" or "を提供" or "を搭載"
+    re.compile(r'(?:機能|を提供|を搭載)[する]?\s*([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*)'),
+]
+
+# Policy patterns: POL-XXX and named policies. Their matches never overlap, so a
+# single alternation finds the same set. "(POL-XXX)" is already covered by the
+# first branch.
+_POLICY_PATTERN = re.compile(
+    r'\bPOL-(\d+)\b|\b(Personal\s+Data\s+Protection|AI\s+Model\s+Governance)\b'
+)
+
+
+def _build_known_name_scanner(names: List[str]):
+    """
+    Compile known names into one alternation that is scanned once per text.
+
+    Longer names are tried first; names that are a prefix of a longer match are
+    added through `implied` so the result equals `{n for n in names if n in text}`.
+    """
+    ordered = sorted(set(names), key=len, reverse=True)
+    pattern = re.compile("|".join(re.escape(n) for n in ordered))
+    implied = {n: [m for m in ordered if m != n and n.startswith(m)] for n in ordered}
+    return pattern, implied
+
+
+_KNOWN_NAME_PATTERN, _KNOWN_NAME_IMPLIED = _build_known_name_scanner(KNOWN_PRODUCTS + KNOWN_FEATURES)
+
+
+def find_known_names(text: str) -> set:
+    """Return the set of known product/feature names contained in text."""
+    found = set()
+    search = _KNOWN_NAME_PATTERN.search
+    match = search(text)
+    while match:
+        name = match.group()
+        if name not in found:
+            found.add(name)
+            found.update(_KNOWN_NAME_IMPLIED[name])
+        # Resume one character later so overlapping names are still reported
+        match = search(text, match.start() + 1)
+    return found
+
+
+def extract_entities(text: str) -> Dict[str, List[str]]:
+    """
+    Extract entities (products, features, policies) from text using pattern matching.
+    This is a simplified NER implementation for demonstration purposes.
+    """
+    known = find_known_names(text)
+    products = [name for name in KNOWN_PRODUCTS if name in known]
+    features = [name for name in KNOWN_FEATURES if name in known]
+    seen_products = set(products)
+    seen_features = set(features)
+
+    for pattern in _PRODUCT_PATTERNS:
+        for match in pattern.finditer(text):
+            product_name = match.group(1).strip()
+            # Filter out common Japanese words, policy names, and known features
+            if (len(product_name) > 3 and
+                    product_name not in PRODUCT_STOPWORDS and
+                    product_name not in seen_products and
+                    product_name not in seen_features):
+                products.append(product_name)
+                seen_products.add(product_name)
+
+    for pattern in _FEATURE_PATTERNS:
+        for match in pattern.finditer(text):
+            feature_name = match.group(1).strip()
+            if (len(feature_name) > 3 and
+                    feature_name not in seen_features and
+                    feature_name not in seen_products):
+                features.append(feature_name)
+                seen_features.add(feature_name)
+
+    # POL-XXX ids come before named policies, as with the original per-pattern scan
+    policy_ids = []
+    policy_names = []
+    seen_policies = set()
+    for match in _POLICY_PATTERN.finditer(text):
+        number, name = match.groups()
+        policy_id = f"POL-{number}" if number is not None else name.strip()
+        if policy_id and policy_id not in seen_policies:
+            seen_policies.add(policy_id)
+            (policy_ids if number is not None else policy_names).append(policy_id)
+
+    return {
+        "products": products,
+        "features": features,
+        "policies": policy_ids + policy_names
+    }
+
+
+def _fingerprint() -> str:
+    """Short hash of the extractor version, patterns and known names."""
+    parts = [EXTRACTOR_VERSION, *KNOWN_PRODUCTS, *KNOWN_FEATURES, *sorted(PRODUCT_STOPWORDS)]
+    parts += [p.pattern for p in _PRODUCT_PATTERNS + _FEATURE_PATTERNS + [_POLICY_PATTERN]]
+    return hashlib.blake2b("\x00".join(parts).encode("utf-8"), digest_size=6).hexdigest()
+
+
+EXTRACTOR_FINGERPRINT = _fingerprint()
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of extract_entities results.
+    
+    Entries are keyed by a 128-bit BLAKE2b hash of the text and stored as
+    gzip-compressed JSON (`{hash: [products, features, policies]}`) in a file
+    named after EXTRACTOR_FINGERPRINT, so a changed extractor never reads
+    stale results.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self.path = (
+            os.path.join(cache_dir, f"extraction-{EXTRACTOR_FINGERPRINT}.json.gz") if cache_dir else None
+        )
+        self._entries: Dict[str, List[List[str]]] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Ignoring unreadable extraction cache {self.path}: {e}")
+            self._entries = {}
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def extract(self, text: str) -> Dict[str, List[str]]:
+        """Return extract_entities(text), reading from or filling the cache."""
+        key = self.key(text)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self.hits += 1
+            products, features, policies = cached
+        else:
+            self.misses += 1
+            entities = extract_entities(text)
+            products, features, policies = entities["products"], entities["features"], entities["policies"]
+            with self._lock:
+                self._entries[key] = [products, features, policies]
+                self._dirty = True
+        # Fresh lists: callers are free to mutate the result
+        return {"products": list(products), "features": list(features), "policies": list(policies)}
+
+    def save(self) -> None:
+        """Write the cache to disk if it changed (atomic replace)."""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            # Drop cache files written by other extractor versions
+            for name in os.listdir(self.cache_dir):
+                if name.startswith("extraction-") and name.endswith(".json.gz") and \
+                        os.path.join(self.cache_dir, name) != self.path:
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "entries": len(self._entries),
+            "extractor_version": EXTRACTOR_VERSION,
+            "fingerprint": EXTRACTOR_FINGERPRINT,
+            "path": self.path,
+        }
+
+
+_extraction_cache: Optional[ExtractionCache] = None
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Process-wide cache stored under EXTRACTION_CACHE_DIR (default: cache/; empty disables disk)."""
+    global _extraction_cache
+    if _extraction_cache is None:
+        _extraction_cache = ExtractionCache(os.getenv("EXTRACTION_CACHE_DIR", "cache") or None)
+    return _extraction_cache
+
+
+def _benchmark(data_file: str, repeat: int) -> None:
+    """Print per-document extraction cost for a JSONL dataset."""
+    import time
+
+    with open(data_file, "r", encoding="utf-8") as f:
+        texts = [json.loads(line).get("text", "") for line in f if line.strip()]
+    if not texts:
+        print(f"⚠ No data found in {data_file}")
+        return
+
+    entity_count = sum(sum(len(v) for v in extract_entities(t).values()) for t in texts)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            extract_entities(text)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"file:        {data_file}")
+    print(f"documents:   {len(texts)} ({entity_count} entity mentions)")
+    print(f"best of {repeat}:   {best * 1000:.2f} ms total")
+    print(f"per doc:     {best / len(texts) * 1e6:.1f} µs")
+    print(f"throughput:  {len(texts) / best:,.0f} docs/sec")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Micro-benchmark for extract_entities")
+    parser.add_argument("data_file", nargs="?", default="data/docs-1000.jsonl",
+                        help="JSONL dataset to extract from (default: data/docs-1000.jsonl)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Number of timed passes; the best one is reported (default: 5)")
+    args = parser.parse_args()
+    _benchmark(args.data_file, args.repeat)
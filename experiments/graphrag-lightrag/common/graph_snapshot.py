@@ -0,0 +1,151 @@
+"""
+In-process snapshot of the graph store for fast traversal.
+
+The graph only changes on seed and feedback, so the walks in `query_graph` and
+`build_local_graph` can run against an in-memory copy instead of querying the
+graph store once per level. Nodes are interned by name (the walks match nodes
+by name, so same-named nodes with different labels are merged, as
+`{name: $name}` does) and edges are stored in CSR form:
+
+    indptr[i]:indptr[i + 1]   slice of the adjacency arrays for node i
+    adj_node[k]               neighbor id (every edge appears in both directions)
+    adj_edge[k]               edge id into the per-edge arrays
+
+    edge_type[e]   index into edge_types
+    w_struct[e]    coalesce(r.w_struct, 1.0)
+    w_attn[e]      coalesce(r.w_attn, 0.0)
+
+Feedback updates `w_attn` in place (`scale_attention`), and `version` is bumped
+on every change.
+"""
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class GraphSnapshot:
+    """Immutable-topology CSR copy of the graph with mutable attention weights."""
+
+    def __init__(
+        self,
+        nodes: Iterable[Tuple[str, Optional[str]]],
+        edges: Iterable[Tuple[str, str, str, float, float]],
+    ):
+        start = time.perf_counter()
+        self.names: List[str] = []
+        self.labels: List[Optional[str]] = []
+        self.index: Dict[str, int] = {}
+        for name, label in nodes:
+            if name not in self.index:
+                self.index[name] = len(self.names)
+                self.names.append(name)
+                self.labels.append(label)
+
+        self.edge_types: List[str] = []
+        type_index: Dict[str, int] = {}
+        src, dst, etype, w_struct, w_attn = [], [], [], [], []
+        for source, target, rel_type, ws, wa in edges:
+            for name in (source, target):
+                if name not in self.index:
+                    self.index[name] = len(self.names)
+                    self.names.append(name)
+                    self.labels.append(None)
+            if rel_type not in type_index:
+                type_index[rel_type] = len(self.edge_types)
+                self.edge_types.append(rel_type)
+            src.append(self.index[source])
+            dst.append(self.index[target])
+            etype.append(type_index[rel_type])
+            w_struct.append(1.0 if ws is None else ws)
+            w_attn.append(0.0 if wa is None else wa)
+
+        self.src = np.asarray(src, dtype=np.int32)
+        self.dst = np.asarray(dst, dtype=np.int32)
+        self.edge_type = np.asarray(etype, dtype=np.int16)
+        self.w_struct = np.asarray(w_struct, dtype=np.float64)
+        self.w_attn = np.asarray(w_attn, dtype=np.float64)
+
+        # Undirected adjacency: each edge is listed from both endpoints
+        edge_ids = np.arange(len(src), dtype=np.int32)
+        heads = np.concatenate([self.src, self.dst])
+        tails = np.concatenate([self.dst, self.src])
+        both = np.concatenate([edge_ids, edge_ids])
+        order = np.argsort(heads, kind="stable")
+        self.adj_node = tails[order]
+        self.adj_edge = both[order]
+        self.indptr = np.zeros(len(self.names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(heads, minlength=len(self.names)), out=self.indptr[1:])
+
+        self.version = 1
+        self.loaded_at = time.time()
+        self.build_seconds = time.perf_counter() - start
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, store) -> "GraphSnapshot":
+        """Read all named nodes and edges from a graph store (two queries on Neo4j)."""
+        return cls(store.nodes(), store.edges())
+
+    @property
+    def node_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.src)
+
+    def neighbors(self, node: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(neighbor ids, edge ids) of a node, one entry per incident edge."""
+        lo, hi = self.indptr[node], self.indptr[node + 1]
+        return self.adj_node[lo:hi], self.adj_edge[lo:hi]
+
+    def expand(self, nodes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gather the adjacency slices of several nodes in order.
+        
+        Returns (source positions into `nodes`, neighbor ids, edge ids), so a
+        whole frontier level can be scored with array operations.
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        starts = self.indptr[nodes]
+        counts = self.indptr[nodes + 1] - starts
+        total = int(counts.sum())
+        sources = np.repeat(np.arange(len(nodes)), counts)
+        # Position k of slice j is starts[j] + (k - offset of slice j)
+        offsets = np.cumsum(counts) - counts
+        positions = np.arange(total) + np.repeat(starts - offsets, counts)
+        return sources, self.adj_node[positions], self.adj_edge[positions]
+
+    def scale_attention(self, name: str, factor: float) -> int:
+        """
+        Apply `r.w_attn = r.w_attn * factor` to every edge of a node, mirroring
+        the /feedback Cypher update. Returns the number of edges updated.
+        """
+        node = self.index.get(name)
+        if node is None:
+            return 0
+        _, edges = self.neighbors(node)
+        with self._lock:
+            self.w_attn[edges] *= factor
+            self.version += 1
+        return len(edges)
+
+    def degrees(self) -> np.ndarray:
+        """Undirected degree of every node (incident edges, both directions)."""
+        return np.diff(self.indptr)
+
+    def stats(self) -> Dict:
+        return {
+            "nodes": self.node_count,
+            "edges": self.edge_count,
+            "edge_types": {t: int(c) for t, c in zip(self.edge_types, np.bincount(self.edge_type, minlength=len(self.edge_types)))},
+            "version": self.version,
+            "build_seconds": round(self.build_seconds, 4),
+            "loaded_at": self.loaded_at,
+            "memory_bytes": int(sum(a.nbytes for a in (
+                self.src, self.dst, self.edge_type, self.w_struct, self.w_attn,
+                self.adj_node, self.adj_edge, self.indptr,
+            ))),
+        }
@@ -0,0 +1,672 @@
+"""
+Graph store used by the pipelines: Neo4j or a pure-Python in-memory graph.
+
+The pipelines only need a handful of graph operations: merge and delete
+nodes and edges by name, the neighbors of named nodes with their edge weights
+(optionally ranked by `w_struct * (1 + w_attn)`), the most connected nodes by
+their `degree` property, a name -> label listing for the name catalog, the
+feedback update of `w_attn`, the degree of every node and the edge count of
+every type for /dataset (`graph_summary`), and the version of the seeded graph.
+`GraphStore` is that interface:
+
+- `Neo4jGraphStore` runs each operation as one Cypher query (writes as
+  chunked `UNWIND` transactions), with async twins of the reads on the async
+  driver;
+- `MemoryGraphStore` keeps nodes and edges in dicts with the same semantics
+  (edges need both endpoints, nodes are deleted with their edges, a `None`
+  property removes it), so the services, the benchmarks and the evaluation
+  run without a Neo4j container.
+
+`GRAPH_STORE` selects the backend. The in-memory graph lives in the process:
+it is lost on restart and re-seeded on startup like the Neo4j graph.
+
+Node rows are `{"name": ..., **properties}`; edge rows are
+`{"source": ..., "target": ..., **properties}` with endpoints matched by
+label and name.
+
+The graph version is a random id written by every seed (a `GraphVersion` node
+in Neo4j, removed with the graph by `clear`). Both services seed the same
+Neo4j graph, so a service compares it with the version of its own last seed
+to notice that the other one has replaced the graph.
+"""
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .name_index import ensure_name_constraints, label_union
+
+# Graph store backend: "neo4j" or "memory" (in-process, no Neo4j needed)
+GRAPH_STORES = ("neo4j", "memory")
+GRAPH_STORE = os.getenv("GRAPH_STORE", "neo4j")
+# Label of the node holding the graph version (no name, so no read matches it)
+GRAPH_VERSION_LABEL = "GraphVersion"
+
+_NODES_QUERY = """
+    MATCH (n)
+    WHERE n.name IS NOT NULL
+    RETURN n.name AS name, labels(n)[0] AS label
+"""
+
+_EDGES_QUERY = """
+    MATCH (a)-[r{rel}]->(b)
+    WHERE a.name IS NOT NULL AND b.name IS NOT NULL
+    RETURN a.name AS source, b.name AS target, type(r) AS type,
+           coalesce(r.w_struct, 1.0) AS w_struct, coalesce(r.w_attn, 0.0) AS w_attn
+"""
+
+# Node and relationship counts from the count store (the version node is not a graph node)
+_COUNTS_QUERY = f"""
+    CALL {{ MATCH (n) RETURN count(n) AS all_nodes }}
+    CALL {{ MATCH (v:{GRAPH_VERSION_LABEL}) RETURN count(v) AS versions }}
+    CALL {{ MATCH ()-[r]->() RETURN count(r) AS edges }}
+    RETURN all_nodes - versions AS nodes, edges
+"""
+
+# One row per (label, name): same-named nodes of different labels are counted apart
+_DEGREES_QUERY = """
+    MATCH (n)
+    WHERE n.name IS NOT NULL
+    RETURN n.name AS name, labels(n)[0] AS label, COUNT { (n)--() } AS degree
+"""
+
+_EDGE_TYPES_QUERY = """
+    MATCH ()-[r]->()
+    RETURN type(r) AS type, count(r) AS count
+"""
+
+_TOP_DEGREE_QUERY = """
+    MATCH (n)
+    WHERE n.degree IS NOT NULL
+    RETURN n.name AS name, n.degree AS degree
+    ORDER BY n.degree DESC
+    LIMIT $limit
+"""
+
+
+def _batches(rows: List[Dict], batch_size: int) -> int:
+    return -(-len(rows) // batch_size)
+
+
+def _degree_bucket(bucket: int) -> str:
+    """Label of a power-of-two degree bucket: 0 -> "0", 1 -> "1", 2 -> "2-3", 3 -> "4-7"."""
+    if bucket <= 1:
+        return str(bucket)
+    return f"{1 << (bucket - 1)}-{(1 << bucket) - 1}"
+
+
+def _score(w_struct: float, w_attn: float) -> float:
+    return w_struct * (1.0 + w_attn)
+
+
+class GraphStore(ABC):
+    """
+    Graph operations used by the pipelines.
+
+    Writes return the number of transactions (chunks of batch_size rows).
+    `neighbors` returns one record per existing source node, grouped by label:
+    `{"source", "type", "neighbors": [{"name", "type", "rel_type", "w_struct",
+    "w_attn", "score"}]}`.
+    """
+
+    backend = ""
+
+    @abstractmethod
+    def ensure_constraints(self, labels: Iterable[str]) -> List[str]:
+        """Unique `name` per label (idempotent). Returns the constraint names."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Delete every node and edge, and the graph version."""
+
+    @abstractmethod
+    def merge_nodes(self, label: str, rows: List[Dict], batch_size: int) -> int:
+        """`MERGE` a node per row by label and name, then `SET n += row`."""
+
+    @abstractmethod
+    def merge_edges(self, rel_type: str, source_label: str, target_label: str, rows: List[Dict], batch_size: int) -> int:
+        """`MERGE` an edge per row between existing endpoints, then `SET r += properties`."""
+
+    @abstractmethod
+    def delete_edges(self, rel_type: str, source_label: str, target_label: str, rows: List[Dict], batch_size: int) -> int:
+        """Delete the edge of every row (missing ones are skipped)."""
+
+    @abstractmethod
+    def delete_nodes(self, label: str, rows: List[Dict], batch_size: int) -> int:
+        """Delete the node of every row with its edges."""
+
+    @abstractmethod
+    def scale_attention(self, groups: Dict[str, List[str]], factors: Dict[str, float], batch_size: int) -> Tuple[int, int]:
+        """
+        `r.w_attn = coalesce(r.w_attn, 0.0) * factor` on every edge of the named
+        nodes (grouped by label), all in one transaction. Returns (edges, queries).
+        """
+
+    @abstractmethod
+    def nodes(self) -> List[Tuple[str, Optional[str]]]:
+        """(name, label) of every named node."""
+
+    @abstractmethod
+    def edges(self, rel_type: Optional[str] = None) -> List[Tuple[str, str, str, float, float]]:
+        """(source, target, type, w_struct, w_attn) of every edge, or of one type."""
+
+    @abstractmethod
+    def degrees(self) -> List[Tuple[str, Optional[str], int]]:
+        """(name, label, incident edge count) of every named node, one row per (label, name)."""
+
+    @abstractmethod
+    def edge_type_counts(self) -> Dict[str, int]:
+        """Number of edges of each type."""
+
+    @abstractmethod
+    def neighbors(
+        self,
+        groups: Dict[str, List[str]],
+        exclude: Optional[List[str]] = None,
+        rel_type: Optional[str] = None,
+        outgoing: bool = False,
+        ranked: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Neighbors of the named nodes (names grouped by label), except those
+        named in exclude. rel_type and outgoing restrict the edges; ranked
+        orders them by score (descending) and limit keeps the first ones.
+        """
+
+    @abstractmethod
+    def top_degree(self, limit: int) -> List[Dict]:
+        """{"name", "degree"} of the nodes with the highest `degree` property."""
+
+    @abstractmethod
+    def names(self, label: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """{"name"} of any nodes (of one label)."""
+
+    @abstractmethod
+    def graph_version(self) -> Optional[str]:
+        """Version set by the last seed, None on an empty or unversioned graph."""
+
+    @abstractmethod
+    def set_graph_version(self, version: str) -> None:
+        """Store the version written by a seed."""
+
+    async def neighbors_async(self, groups: Dict[str, List[str]], **options) -> List[Dict]:
+        return self.neighbors(groups, **options)
+
+    async def top_degree_async(self, limit: int) -> List[Dict]:
+        return self.top_degree(limit)
+
+    async def graph_version_async(self) -> Optional[str]:
+        return self.graph_version()
+
+    async def names_async(self, label: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        return self.names(label, limit)
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """`{"backend", ...}` with the node and edge counts, for /health."""
+
+
+def _neighbors_query(label: str, rel_type: Optional[str], outgoing: bool, exclude: bool, ranked: bool, limit: bool) -> str:
+    """Neighbors of the nodes with one label, one row per source node (sources without neighbors included)."""
+    rel = f"[r:{rel_type}]" if rel_type else "[r]"
+    pattern = f"(n)-{rel}->(neighbor)" if outgoing else f"(n)-{rel}-(neighbor)"
+    return f"""
+    UNWIND $names_{label} AS source
+    MATCH (n:{label} {{name: source}})
+    OPTIONAL MATCH {pattern}
+    {"WHERE NOT neighbor.name IN $exclude" if exclude else ""}
+    WITH source, neighbor, r, coalesce(r.w_struct, 1.0) AS w_struct, coalesce(r.w_attn, 0.0) AS w_attn
+    {"ORDER BY w_struct * (1.0 + w_attn) DESC" if ranked else ""}
+    WITH source, collect(CASE WHEN r IS NULL THEN null ELSE {{
+        name: neighbor.name,
+        type: labels(neighbor)[0],
+        rel_type: type(r),
+        w_struct: w_struct,
+        w_attn: w_attn,
+        score: w_struct * (1.0 + w_attn)
+    }} END){"[..$limit]" if limit else ""} AS neighbors
+    RETURN source, '{label}' AS type, neighbors
+    """
+
+
+def _feedback_query(label: str) -> str:
+    return f"""
+        UNWIND $rows AS row
+        MATCH (n:{label} {{name: row.node_id}})-[r]-()
+        SET r.w_attn = coalesce(r.w_attn, 0.0) * row.factor,
+            r.ts = timestamp()
+        RETURN count(r) AS updated_edges
+    """
+
+
+class Neo4jGraphStore(GraphStore):
+    """Graph store on the Neo4j drivers; each read runs in its own session."""
+
+    backend = "neo4j"
+
+    def __init__(self, driver=None, async_driver=None):
+        self.driver = driver
+        self.async_driver = async_driver
+
+    def _session(self):
+        if not self.driver:
+            raise RuntimeError("Neo4j driver not initialized")
+        return self.driver.session()
+
+    def _read(self, query: str, **params) -> List[Dict]:
+        with self._session() as session:
+            return [record.data() for record in session.run(query, **params)]
+
+    async def _read_async(self, query: str, **params) -> List[Dict]:
+        if not self.async_driver:
+            raise RuntimeError("Async Neo4j driver not initialized")
+        async with self.async_driver.session() as session:
+            result = await session.run(query, **params)
+            return [record.data() async for record in result]
+
+    def _write_batches(self, query: str, rows: List[Dict], batch_size: int) -> int:
+        """Run an UNWIND query over rows in chunks of batch_size, one transaction per chunk."""
+        with self._session() as session:
+            for start in range(0, len(rows), batch_size):
+                chunk = rows[start:start + batch_size]
+                session.execute_write(lambda tx: tx.run(query, rows=chunk).consume())
+        return _batches(rows, batch_size)
+
+    def ensure_constraints(self, labels: Iterable[str]) -> List[str]:
+        with self._session() as session:
+            return ensure_name_constraints(session, labels)
+
+    def clear(self) -> None:
+        with self._session() as session:
+            session.run("MATCH (n) DETACH DELETE n").consume()
+
+    def merge_nodes(self, label: str, rows: List[Dict], batch_size: int) -> int:
+        return self._write_batches(f"""
+            UNWIND $rows AS row
+            MERGE (n:{label} {{name: row.name}})
+            SET n += row
+        """, rows, batch_size)
+
+    def merge_edges(self, rel_type: str, source_label: str, target_label: str, rows: List[Dict], batch_size: int) -> int:
+        rows = [
+            {"source": row["source"], "target": row["target"],
+             "props": {k: v for k, v in row.items() if k not in ("source", "target")}}
+            for row in rows
+        ]
+        return self._write_batches(f"""
+            UNWIND $rows AS row
+            MATCH (s:{source_label} {{name: row.source}}), (t:{target_label} {{name: row.target}})
+            MERGE (s)-[r:{rel_type}]->(t)
+            SET r += row.props
+        """, rows, batch_size)
+
+    def delete_edges(self, rel_type: str, source_label: str, target_label: str, rows: List[Dict], batch_size: int) -> int:
+        return self._write_batches(f"""
+            UNWIND $rows AS row
+            MATCH (:{source_label} {{name: row.source}})-[r:{rel_type}]->(:{target_label} {{name: row.target}})
+            DELETE r
+        """, rows, batch_size)
+
+    def delete_nodes(self, label: str, rows: List[Dict], batch_size: int) -> int:
+        return self._write_batches(
+            f"UNWIND $rows AS row MATCH (n:{label} {{name: row.name}}) DETACH DELETE n",
+            rows,
+            batch_size,
+        )
+
+    def scale_attention(self, groups: Dict[str, List[str]], factors: Dict[str, float], batch_size: int) -> Tuple[int, int]:
+        def write(tx) -> Tuple[int, int]:
+            edges = 0
+            queries = 0
+            for label, names in groups.items():
+                query = _feedback_query(label)
+                rows = [{"node_id": name, "factor": factors[name]} for name in names]
+                for start in range(0, len(rows), batch_size):
+                    record = tx.run(query, rows=rows[start:start + batch_size]).single()
+                    edges += record["updated_edges"] if record else 0
+                    queries += 1
+            return edges, queries
+
+        with self._session() as session:
+            return session.execute_write(write)
+
+    def nodes(self) -> List[Tuple[str, Optional[str]]]:
+        return [(r["name"], r["label"]) for r in self._read(_NODES_QUERY)]
+
+    def edges(self, rel_type: Optional[str] = None) -> List[Tuple[str, str, str, float, float]]:
+        query = _EDGES_QUERY.replace("{rel}", f":{rel_type}" if rel_type else "")
+        return [(r["source"], r["target"], r["type"], r["w_struct"], r["w_attn"]) for r in self._read(query)]
+
+    def degrees(self) -> List[Tuple[str, Optional[str], int]]:
+        return [(r["name"], r["label"], r["degree"]) for r in self._read(_DEGREES_QUERY)]
+
+    def edge_type_counts(self) -> Dict[str, int]:
+        return {r["type"]: r["count"] for r in self._read(_EDGE_TYPES_QUERY)}
+
+    def _neighbors_params(self, groups, exclude, rel_type, outgoing, ranked, limit) -> Tuple[str, Dict]:
+        query = label_union(
+            lambda label: _neighbors_query(label, rel_type, outgoing, exclude is not None, ranked, limit is not None),
+            groups,
+        )
+        params = {f"names_{label}": names for label, names in groups.items()}
+        if exclude is not None:
+            params["exclude"] = list(exclude)
+        if limit is not None:
+            params["limit"] = limit
+        return query, params
+
+    def neighbors(self, groups, exclude=None, rel_type=None, outgoing=False, ranked=False, limit=None) -> List[Dict]:
+        if not groups:
+            return []
+        query, params = self._neighbors_params(groups, exclude, rel_type, outgoing, ranked, limit)
+        return self._read(query, **params)
+
+    async def neighbors_async(self, groups, exclude=None, rel_type=None, outgoing=False, ranked=False, limit=None) -> List[Dict]:
+        if not groups:
+            return []
+        query, params = self._neighbors_params(groups, exclude, rel_type, outgoing, ranked, limit)
+        return await self._read_async(query, **params)
+
+    def top_degree(self, limit: int) -> List[Dict]:
+        return self._read(_TOP_DEGREE_QUERY, limit=limit)
+
+    async def top_degree_async(self, limit: int) -> List[Dict]:
+        return await self._read_async(_TOP_DEGREE_QUERY, limit=limit)
+
+    @staticmethod
+    def _names_query(label: Optional[str], limit: Optional[int]) -> str:
+        match = f"MATCH (n:{label})" if label else "MATCH (n) WHERE n.name IS NOT NULL"
+        return f"{match} RETURN n.name AS name" + (" LIMIT $limit" if limit is not None else "")
+
+    def names(self, label: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        return self._read(self._names_query(label, limit), limit=limit)
+
+    async def names_async(self, label: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        return await self._read_async(self._names_query(label, limit), limit=limit)
+
+    def graph_version(self) -> Optional[str]:
+        rows = self._read(f"MATCH (v:{GRAPH_VERSION_LABEL}) RETURN v.version AS version LIMIT 1")
+        return rows[0]["version"] if rows else None
+
+    async def graph_version_async(self) -> Optional[str]:
+        rows = await self._read_async(f"MATCH (v:{GRAPH_VERSION_LABEL}) RETURN v.version AS version LIMIT 1")
+        return rows[0]["version"] if rows else None
+
+    def set_graph_version(self, version: str) -> None:
+        with self._session() as session:
+            session.run(f"MERGE (v:{GRAPH_VERSION_LABEL}) SET v.version = $version", version=version).consume()
+
+    def stats(self) -> Dict:
+        stats = {"backend": self.backend}
+        try:
+            stats.update(self._read(_COUNTS_QUERY)[0])
+        except Exception as e:
+            stats["error"] = str(e)
+        return stats
+
+
+class MemoryGraphStore(GraphStore):
+    """
+    In-process graph with the Neo4j store's semantics, for CPU-only runs.
+
+    Nodes are keyed by (label, name) and edges by (type, source key, target
+    key), so MERGE semantics (one node per label and name, one edge per type
+    and direction between two nodes) come from the dict keys. Every node keeps
+    its incident edges in insertion order; reads return them in that order,
+    ranked reads sort them stably by score. Async reads return the sync
+    results (nothing to wait on).
+    """
+
+    backend = "memory"
+
+    def __init__(self):
+        self._nodes: Dict[Tuple[str, str], Dict] = {}
+        self._edges: Dict[Tuple, Dict] = {}
+        # Node key -> its incident edge keys (an ordered set)
+        self._incident: Dict[Tuple[str, str], Dict[Tuple, None]] = {}
+        self._lock = threading.RLock()
+        self.writes = 0
+        self.version: Optional[str] = None
+
+    @staticmethod
+    def _update(props: Dict, row: Dict, skip: Tuple[str, ...] = ()) -> None:
+        """`SET x += row`: None removes a property."""
+        for key, value in row.items():
+            if key in skip:
+                continue
+            if value is None:
+                props.pop(key, None)
+            else:
+                props[key] = value
+
+    def _drop_edge(self, edge_key: Tuple) -> None:
+        del self._edges[edge_key]
+        _, source, target = edge_key
+        self._incident[source].pop(edge_key, None)
+        self._incident[target].pop(edge_key, None)
+
+    def ensure_constraints(self, labels: Iterable[str]) -> List[str]:
+        # (label, name) keys are unique by construction
+        return []
+
+    def clear(self) -> None:
+        with self._lock:
+            self._nodes.clear()
+            self._edges.clear()
+            self._incident.clear()
+            self.version = None
+            self.writes += 1
+
+    def merge_nodes(self, label: str, rows: List[Dict], batch_size: int) -> int:
+        with self._lock:
+            for row in rows:
+                key = (label, row["name"])
+                props = self._nodes.get(key)
+                if props is None:
+                    props = self._nodes[key] = {"name": row["name"]}
+                    self._incident[key] = {}
+                self._update(props, row, ("name",))
+            self.writes += 1
+        return _batches(rows, batch_size)
+
+    def merge_edges(self, rel_type: str, source_label: str, target_label: str, rows: List[Dict], batch_size: int) -> int:
+        with self._lock:
+            for row in rows:
+                source, target = (source_label, row["source"]), (target_label, row["target"])
+                # MATCH on both endpoints: rows with a missing node are skipped
+                if source not in self._nodes or target not in self._nodes:
+                    continue
+                key = (rel_type, source, target)
+                props = self._edges.get(key)
+                if props is None:
+                    props = self._edges[key] = {}
+                    self._incident[source][key] = None
+                    self._incident[target][key] = None
+                self._update(props, row, ("source", "target"))
+            self.writes += 1
+        return _batches(rows, batch_size)
+
+    def delete_edges(self, rel_type: str, source_label: str, target_label: str, rows: List[Dict], batch_size: int) -> int:
+        with self._lock:
+            for row in rows:
+                key = (rel_type, (source_label, row["source"]), (target_label, row["target"]))
+                if key in self._edges:
+                    self._drop_edge(key)
+            self.writes += 1
+        return _batches(rows, batch_size)
+
+    def delete_nodes(self, label: str, rows: List[Dict], batch_size: int) -> int:
+        with self._lock:
+            for row in rows:
+                key = (label, row["name"])
+                if key not in self._nodes:
+                    continue
+                # DETACH DELETE
+                for edge_key in list(self._incident[key]):
+                    self._drop_edge(edge_key)
+                del self._incident[key]
+                del self._nodes[key]
+            self.writes += 1
+        return _batches(rows, batch_size)
+
+    def scale_attention(self, groups: Dict[str, List[str]], factors: Dict[str, float], batch_size: int) -> Tuple[int, int]:
+        ts = int(time.time() * 1000)
+        edges = 0
+        queries = 0
+        with self._lock:
+            for label, names in groups.items():
+                for name in names:
+                    for edge_key in self._incident.get((label, name), ()):
+                        props = self._edges[edge_key]
+                        props["w_attn"] = props.get("w_attn", 0.0) * factors[name]
+                        props["ts"] = ts
+                        edges += 1
+                queries += _batches(names, batch_size)
+            self.writes += 1
+        return edges, queries
+
+    def nodes(self) -> List[Tuple[str, Optional[str]]]:
+        with self._lock:
+            return [(name, label) for label, name in self._nodes]
+
+    def edges(self, rel_type: Optional[str] = None) -> List[Tuple[str, str, str, float, float]]:
+        with self._lock:
+            return [
+                (source[1], target[1], edge_type, props.get("w_struct", 1.0), props.get("w_attn", 0.0))
+                for (edge_type, source, target), props in self._edges.items()
+                if rel_type is None or edge_type == rel_type
+            ]
+
+    def degrees(self) -> List[Tuple[str, Optional[str], int]]:
+        with self._lock:
+            return [(name, label, len(self._incident[(label, name)])) for label, name in self._nodes]
+
+    def edge_type_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for edge_type, _, _ in self._edges:
+                counts[edge_type] = counts.get(edge_type, 0) + 1
+        return counts
+
+    def neighbors(self, groups, exclude=None, rel_type=None, outgoing=False, ranked=False, limit=None) -> List[Dict]:
+        excluded = set(exclude or ())
+        records = []
+        with self._lock:
+            for label, names in groups.items():
+                for name in names:
+                    key = (label, name)
+                    if key not in self._nodes:
+                        continue
+                    neighbors = []
+                    for edge_key in self._incident[key]:
+                        edge_type, source, target = edge_key
+                        if rel_type is not None and edge_type != rel_type:
+                            continue
+                        if outgoing and source != key:
+                            continue
+                        other = target if source == key else source
+                        if other[1] in excluded:
+                            continue
+                        props = self._edges[edge_key]
+                        w_struct, w_attn = props.get("w_struct", 1.0), props.get("w_attn", 0.0)
+                        neighbors.append({
+                            "name": other[1],
+                            "type": other[0],
+                            "rel_type": edge_type,
+                            "w_struct": w_struct,
+                            "w_attn": w_attn,
+                            "score": _score(w_struct, w_attn),
+                        })
+                    if ranked:
+                        neighbors.sort(key=lambda n: n["score"], reverse=True)
+                    if limit is not None:
+                        neighbors = neighbors[:limit]
+                    records.append({"source": name, "type": label, "neighbors": neighbors})
+        return records
+
+    def top_degree(self, limit: int) -> List[Dict]:
+        with self._lock:
+            rows = [
+                {"name": name, "degree": props["degree"]}
+                for (_, name), props in self._nodes.items()
+                if props.get("degree") is not None
+            ]
+        rows.sort(key=lambda row: row["degree"], reverse=True)
+        return rows[:limit]
+
+    def names(self, label: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            rows = [{"name": name} for node_label, name in self._nodes if label is None or node_label == label]
+        return rows if limit is None else rows[:limit]
+
+    def graph_version(self) -> Optional[str]:
+        return self.version
+
+    def set_graph_version(self, version: str) -> None:
+        self.version = version
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend,
+            "nodes": len(self._nodes),
+            "edges": len(self._edges),
+            "writes": self.writes,
+        }
+
+
+def graph_summary(store: GraphStore) -> Dict:
+    """
+    Label histogram, edge counts by type and degree distribution of a graph store.
+
+    Nodes are counted per (label, name) as the store keeps them, so the totals
+    match `store.stats()` (the graph snapshot merges same-named nodes). Degrees
+    are bucketed by powers of two: "0", "1", "2-3", "4-7", ...
+    """
+    label_counts: Dict[str, int] = {}
+    degrees = []
+    for _, label, degree in store.degrees():
+        key = label if label is not None else "_unlabeled"
+        label_counts[key] = label_counts.get(key, 0) + 1
+        degrees.append(degree)
+    edge_types = store.edge_type_counts()
+    if degrees:
+        degrees.sort()
+        buckets: Dict[int, int] = {}
+        for degree in degrees:
+            bucket = degree.bit_length()
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+        # Nearest-rank percentiles (numpy's method="nearest")
+        p50, p90, p99 = (degrees[round(q * (len(degrees) - 1))] for q in (0.5, 0.9, 0.99))
+        degree = {
+            "min": degrees[0], "max": degrees[-1], "mean": round(sum(degrees) / len(degrees), 3),
+            "p50": p50, "p90": p90, "p99": p99,
+            "histogram": {_degree_bucket(b): buckets[b] for b in sorted(buckets)},
+        }
+    else:
+        degree = {"min": 0, "max": 0, "mean": 0.0, "p50": 0, "p90": 0, "p99": 0, "histogram": {}}
+    return {
+        "labels": label_counts,
+        "edge_types": edge_types,
+        "nodes": len(degrees),
+        "edges": sum(edge_types.values()),
+        "degree": degree,
+    }
+
+
+def create_graph_store(driver=None, async_driver=None, current: Optional[GraphStore] = None) -> Optional[GraphStore]:
+    """
+    Graph store selected by GRAPH_STORE.
+
+    The in-memory store is reused when `current` is one (re-initializing the
+    clients must not drop the graph). The Neo4j store wraps the given drivers;
+    None if there are none yet.
+    """
+    if GRAPH_STORE not in GRAPH_STORES:
+        raise ValueError(f"Unknown graph store: {GRAPH_STORE} (expected one of {', '.join(GRAPH_STORES)})")
+    if GRAPH_STORE == "memory":
+        return current if isinstance(current, MemoryGraphStore) else MemoryGraphStore()
+    if not driver and not async_driver:
+        return None
+    return Neo4jGraphStore(driver, async_driver)
@@ -0,0 +1,220 @@
+"""
+HNSW (hierarchical navigable small world) graph for the local vector index.
+
+Nodes are the rows of the collection matrix (L2-normalized, so similarity is a
+dot product), inserted in row order. Every node gets a random top level
+(P(level >= l) = M^-l); on each level it links to up to M neighbors (2 * M on
+the base level), chosen with the diversity heuristic of the HNSW paper: a
+candidate is kept only if it is closer to the new node than to every neighbor
+already kept. A search descends greedily from the entry point through the
+upper levels, then runs a best-first search with a candidate list of `ef` on
+the base level. Larger `ef` (and `M`, `ef_construct` at build time) trade
+latency for recall.
+
+Only the vectors of unvisited neighbors are read at each step, as one
+`vectors[ids] @ query` product. Nodes are never removed: the index masks
+retired rows with `live`, which still route searches but are not returned.
+"""
+import heapq
+import math
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class HNSWIndex:
+    """HNSW links over an external row matrix (passed to every call, so it can be remapped)."""
+
+    def __init__(self, m: int = 16, ef_construct: int = 100, seed: int = 0):
+        if m < 2:
+            raise ValueError("HNSW m must be at least 2")
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construct = max(ef_construct, m)
+        self.level_mult = 1.0 / math.log(m)
+        self.levels: List[int] = []
+        # links[node][level] -> neighbor nodes
+        self.links: List[List[List[int]]] = []
+        self.entry = -1
+        self.max_level = -1
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def _random_level(self) -> int:
+        return int(-math.log(1.0 - self._rng.random()) * self.level_mult)
+
+    def _greedy(self, vectors: np.ndarray, query: np.ndarray, node: int, sim: float, level: int) -> Tuple[int, float]:
+        """Move to the most similar neighbor until none improves (upper levels)."""
+        while True:
+            neighbors = self.links[node][level]
+            if not neighbors:
+                return node, sim
+            sims = vectors[neighbors] @ query
+            best = int(np.argmax(sims))
+            if sims[best] <= sim:
+                return node, sim
+            node, sim = neighbors[best], float(sims[best])
+
+    def _search_level(
+        self,
+        vectors: np.ndarray,
+        query: np.ndarray,
+        entries: Sequence[Tuple[float, int]],
+        ef: int,
+        level: int,
+        live: Optional[np.ndarray] = None,
+    ) -> List[Tuple[float, int]]:
+        """
+        Best-first search of one level: up to ef (similarity, node) pairs, unordered.
+        With `live`, retired nodes are expanded but not returned.
+        """
+        visited = {node for _, node in entries}
+        candidates = [(-sim, node) for sim, node in entries]
+        heapq.heapify(candidates)
+        # Min-heap of the best ef results: results[0] is the worst kept
+        results = [(sim, node) for sim, node in entries if live is None or live[node]]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if len(results) >= ef and -neg_sim < results[0][0]:
+                break
+            neighbors = [n for n in self.links[node][level] if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            sims = vectors[neighbors] @ query
+            if len(results) >= ef:
+                # Only neighbors above the current worst result can enter
+                better = sims > results[0][0]
+                neighbors = [n for n, keep in zip(neighbors, better.tolist()) if keep]
+                sims = sims[better]
+            for neighbor, sim in zip(neighbors, sims.tolist()):
+                if len(results) < ef or sim > results[0][0]:
+                    heapq.heappush(candidates, (-sim, neighbor))
+                    if live is None or live[neighbor]:
+                        heapq.heappush(results, (sim, neighbor))
+                        if len(results) > ef:
+                            heapq.heappop(results)
+        return results
+
+    @staticmethod
+    def _select(vectors: np.ndarray, candidates: List[Tuple[float, int]], m: int) -> List[int]:
+        """Diversity heuristic: keep a candidate only if it is closer to the base than to every kept neighbor."""
+        candidates = sorted(candidates, reverse=True)
+        if len(candidates) <= 1:
+            return [node for _, node in candidates]
+        nodes = [node for _, node in candidates]
+        rows = vectors[nodes]
+        pairwise = rows @ rows.T
+        # closest[i]: highest similarity of candidate i to a kept neighbor
+        closest = np.full(len(nodes), -np.inf, dtype=pairwise.dtype)
+        kept: List[int] = []
+        for i, (sim, node) in enumerate(candidates):
+            if closest[i] < sim:
+                kept.append(node)
+                if len(kept) >= m:
+                    break
+                np.maximum(closest, pairwise[i], out=closest)
+        return kept
+
+    def insert(self, vectors: np.ndarray, node: int) -> None:
+        """Link row `node` (the next row: nodes are inserted in row order)."""
+        if node != len(self.levels):
+            raise ValueError(f"HNSW nodes are inserted in row order (expected {len(self.levels)}, got {node})")
+        level = self._random_level()
+        self.levels.append(level)
+        self.links.append([[] for _ in range(level + 1)])
+        if self.entry < 0:
+            self.entry, self.max_level = node, level
+            return
+
+        query = vectors[node]
+        entry = self.entry
+        entry_sim = float(vectors[entry] @ query)
+        for upper in range(self.max_level, level, -1):
+            entry, entry_sim = self._greedy(vectors, query, entry, entry_sim, upper)
+
+        entries = [(entry_sim, entry)]
+        for current in range(min(level, self.max_level), -1, -1):
+            found = self._search_level(vectors, query, entries, self.ef_construct, current)
+            neighbors = self._select(vectors, found, self.m)
+            self.links[node][current] = neighbors
+            cap = self.m0 if current == 0 else self.m
+            for neighbor in neighbors:
+                links = self.links[neighbor][current]
+                links.append(node)
+                if len(links) > cap:
+                    sims = (vectors[links] @ vectors[neighbor]).tolist()
+                    self.links[neighbor][current] = self._select(vectors, list(zip(sims, links)), cap)
+            entries = found
+
+        if level > self.max_level:
+            self.entry, self.max_level = node, level
+
+    def search(
+        self,
+        vectors: np.ndarray,
+        query: np.ndarray,
+        k: int,
+        ef: int,
+        live: Optional[np.ndarray] = None,
+    ) -> List[Tuple[float, int]]:
+        """Approximate top k (similarity, node) pairs, best first."""
+        if self.entry < 0 or k <= 0:
+            return []
+        entry = self.entry
+        entry_sim = float(vectors[entry] @ query)
+        for upper in range(self.max_level, 0, -1):
+            entry, entry_sim = self._greedy(vectors, query, entry, entry_sim, upper)
+        found = self._search_level(vectors, query, [(entry_sim, entry)], max(ef, k), 0, live)
+        return sorted(found, key=lambda pair: (-pair[0], pair[1]))[:k]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Links flattened node-major: offsets[i]:offsets[i + 1] are the targets of the i-th (node, level) pair."""
+        counts = [len(links) for node_links in self.links for links in node_links]
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        targets = np.fromiter(
+            (target for node_links in self.links for links in node_links for target in links),
+            dtype=np.int32,
+            count=int(offsets[-1]),
+        )
+        return {
+            "params": np.array([self.m, self.ef_construct, self.entry, self.max_level], dtype=np.int64),
+            "levels": np.asarray(self.levels, dtype=np.int8),
+            "offsets": offsets,
+            "targets": targets,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "HNSWIndex":
+        m, ef_construct, entry, max_level = (int(x) for x in arrays["params"])
+        index = cls(m, ef_construct, seed=len(arrays["levels"]))
+        index.levels = arrays["levels"].tolist()
+        index.entry, index.max_level = entry, max_level
+        offsets = arrays["offsets"].tolist()
+        targets = arrays["targets"].tolist()
+        pair = 0
+        for level in index.levels:
+            node_links = []
+            for _ in range(level + 1):
+                node_links.append(targets[offsets[pair]:offsets[pair + 1]])
+                pair += 1
+            index.links.append(node_links)
+        return index
+
+    def stats(self) -> Dict:
+        base_degree = [len(node_links[0]) for node_links in self.links]
+        return {
+            "m": self.m,
+            "ef_construct": self.ef_construct,
+            "nodes": len(self.levels),
+            "max_level": self.max_level,
+            "mean_base_degree": round(sum(base_degree) / len(base_degree), 2) if base_degree else 0.0,
+        }
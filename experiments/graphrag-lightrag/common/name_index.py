@@ -0,0 +1,180 @@
+"""
+Name constraints, name->label catalog and in-process n-gram name index.
+
+Graph lookups used to match `(n {name: $name})` without a label and fall back to
+`WHERE n.name CONTAINS $keyword` over all nodes; neither can use an index. Now:
+- `ensure_name_constraints` creates a uniqueness constraint (backed by a range
+  index) on `name` for every node label at seed time,
+- `NameCatalog` maps each name to its labels, so pipelines can group names by
+  label and run label-qualified queries (see `graph_store.py`),
+- `NameCatalog.contains` answers substring lookups from a trigram index
+  instead of scanning every node in Neo4j.
+
+Run this file directly to compare PROFILE db hits of the unlabeled and
+label-qualified forms against the running Neo4j:
+
+    python3 name_index.py "Acme Search" --keyword Acme
+"""
+import os
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+NODE_LABELS = ("Product", "Feature", "Policy")
+
+NGRAM_SIZE = 3
+
+_CATALOG_QUERY = """
+    MATCH (n)
+    WHERE n.name IS NOT NULL
+    RETURN n.name AS name, labels(n) AS labels
+"""
+
+
+def ensure_name_constraints(session, labels: Iterable[str] = NODE_LABELS) -> List[str]:
+    """Create `name` uniqueness constraints for labels (idempotent). Returns their names."""
+    created = []
+    for label in labels:
+        constraint = f"{label.lower()}_name_unique"
+        session.run(
+            f"CREATE CONSTRAINT {constraint} IF NOT EXISTS "
+            f"FOR (n:{label}) REQUIRE n.name IS UNIQUE"
+        ).consume()
+        created.append(constraint)
+    return created
+
+
+def label_union(build_query: Callable[[str], str], labels: Iterable[str]) -> str:
+    """One copy of a per-label query for each label, joined with UNION ALL."""
+    return "\nUNION ALL\n".join(build_query(label) for label in labels)
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class NameCatalog:
+    """
+    Names of all graph nodes with their labels, in Neo4j scan order.
+
+    Also holds a trigram -> name-id index so `contains` only verifies names that
+    share every trigram of the keyword.
+    """
+
+    def __init__(self, records: Iterable[Tuple[str, Iterable[str]]]):
+        self.names: List[str] = []
+        self._labels: Dict[str, List[str]] = {}
+        self._ngrams: Dict[str, Set[int]] = defaultdict(set)
+        for name, labels in records:
+            if name not in self._labels:
+                self._labels[name] = []
+                for gram in _ngrams(name):
+                    self._ngrams[gram].add(len(self.names))
+                self.names.append(name)
+            for label in labels:
+                if label in NODE_LABELS and label not in self._labels[name]:
+                    self._labels[name].append(label)
+
+    @classmethod
+    def load(cls, session) -> "NameCatalog":
+        return cls((r["name"], r["labels"]) for r in session.run(_CATALOG_QUERY))
+
+    @classmethod
+    def from_store(cls, store) -> "NameCatalog":
+        """Catalog of the nodes of a graph store (one label per node)."""
+        return cls((name, [label]) for name, label in store.nodes())
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._labels
+
+    def labels_of(self, name: str) -> List[str]:
+        return self._labels.get(name, [])
+
+    def group_by_label(self, names: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Split names by label, keeping their order; unknown names are dropped.
+        Keys follow NODE_LABELS order, so the generated query text is stable.
+        """
+        groups: Dict[str, List[str]] = {label: [] for label in NODE_LABELS}
+        for name in names:
+            for label in self._labels.get(name, ()):
+                groups[label].append(name)
+        return {label: group for label, group in groups.items() if group}
+
+    def contains(self, keyword: str, limit: Optional[int] = None) -> List[str]:
+        """Names containing keyword (same matches as `n.name CONTAINS $keyword`), in scan order."""
+        grams = _ngrams(keyword)
+        if grams:
+            postings = sorted((self._ngrams.get(gram, set()) for gram in grams), key=len)
+            candidate_ids = sorted(set.intersection(*postings))
+        else:
+            # Keyword shorter than an n-gram: check every name
+            candidate_ids = range(len(self.names))
+        found = []
+        for i in candidate_ids:
+            if keyword in self.names[i]:
+                found.append(self.names[i])
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    def stats(self) -> Dict:
+        by_label: Dict[str, int] = defaultdict(int)
+        for labels in self._labels.values():
+            for label in labels:
+                by_label[label] += 1
+        return {"names": len(self.names), "by_label": dict(by_label), "ngrams": len(self._ngrams)}
+
+
+def profile_db_hits(session, query: str, **params) -> int:
+    """Total db hits of a query according to PROFILE."""
+    summary = session.run(f"PROFILE {query}", **params).consume()
+
+    def total(plan) -> int:
+        if plan is None:
+            return 0
+        hits = plan.get("dbHits", 0) if isinstance(plan, dict) else getattr(plan, "db_hits", 0)
+        children = plan.get("children", []) if isinstance(plan, dict) else getattr(plan, "children", [])
+        return hits + sum(total(child) for child in children)
+
+    return total(summary.profile)
+
+
+def _compare_profiles(name: str, keyword: str) -> None:
+    """Print PROFILE db hits for unlabeled vs label-qualified lookups."""
+    from neo4j import GraphDatabase
+
+    driver = GraphDatabase.driver(
+        os.getenv("NEO4J_URI", "bolt://neo4j:7687"),
+        auth=(os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "password")),
+    )
+    with driver.session() as session:
+        catalog = NameCatalog.load(session)
+        labels = catalog.labels_of(name)
+        if not labels:
+            print(f"⚠ {name!r} is not in the graph")
+        rows = [
+            ("neighbors, unlabeled", "MATCH (n {name: $name})-[r]-(m) RETURN m.name", {"name": name}),
+            ("neighbors, label-qualified", label_union(
+                lambda label: f"MATCH (n:{label} {{name: $name}})-[r]-(m) RETURN m.name", labels or NODE_LABELS[:1]
+            ), {"name": name}),
+            ("substring, CONTAINS scan", "MATCH (n) WHERE n.name CONTAINS $keyword RETURN n.name LIMIT 3", {"keyword": keyword}),
+        ]
+        print(f"{'query':<30} {'db hits':>8}")
+        for title, query, params in rows:
+            print(f"{title:<30} {profile_db_hits(session, query, **params):>8}")
+        print(f"{'substring, n-gram catalog':<30} {0:>8}  -> {catalog.contains(keyword, 3)}")
+        print(f"catalog: {catalog.stats()}")
+    driver.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare PROFILE db hits of unlabeled and label-qualified lookups")
+    parser.add_argument("name", nargs="?", default="Acme Search", help="Node name to look up (default: Acme Search)")
+    parser.add_argument("--keyword", default="Acme", help="Substring for the CONTAINS comparison (default: Acme)")
+    args = parser.parse_args()
+    _compare_profiles(args.name, args.keyword)
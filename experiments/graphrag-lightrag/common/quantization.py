@@ -0,0 +1,90 @@
+"""
+Low-precision copies of embedding matrices: int8 scalar quantization and float16.
+
+`QuantizedMatrix` is the scan copy of a local vector index collection
+(VECTOR_QUANTIZATION): int8 codes with one step per dimension (4x smaller than
+float32) or float16 (2x). Scores are computed DECODE_BLOCK_ROWS rows at a time:
+the block is widened to float32 into a buffer that stays in the CPU cache and
+multiplied there, so a scan reads 1 or 2 bytes per component from memory
+instead of 4. The float32 rows stay the reference: callers rescore the best
+candidates against them.
+"""
+import numpy as np
+
+QUANTIZATIONS = ("none", "int8", "float16")
+# Rows widened to float32 per matrix product (512 x 384 x 4 bytes = 768 KB, stays in L2)
+DECODE_BLOCK_ROWS = 512
+# Rows encoded per step when re-encoding a whole matrix
+ENCODE_BLOCK_ROWS = 65536
+# Extra int8 range taken when a row exceeds the current one, so re-encodes stay rare
+RANGE_HEADROOM = 1.25
+
+_DTYPES = {"int8": np.int8, "float16": np.float16}
+
+
+class QuantizedMatrix:
+    """Scan copy of a float32 row matrix: int8 with one step per dimension, or float16."""
+
+    def __init__(self, kind: str, dim: int, capacity: int = 0):
+        if kind not in _DTYPES:
+            raise ValueError(f"Unknown quantization: {kind} (expected one of {', '.join(_DTYPES)})")
+        self.kind = kind
+        self.dim = dim
+        self.codes = np.zeros((capacity, dim), dtype=_DTYPES[kind])
+        # int8: largest encodable |value| per dimension (the step is limit / 127)
+        self.limits = np.zeros(dim, dtype=np.float32)
+
+    @property
+    def steps(self) -> np.ndarray:
+        return self.limits / 127
+
+    def reserve(self, capacity: int, count: int) -> None:
+        """Grow to capacity rows, keeping rows 0..count-1."""
+        if capacity <= len(self.codes):
+            return
+        codes = np.zeros((capacity, self.dim), dtype=self.codes.dtype)
+        codes[:count] = self.codes[:count]
+        self.codes = codes
+
+    def _write(self, rows: np.ndarray, start: int) -> None:
+        if self.kind == "float16":
+            self.codes[start:start + len(rows)] = rows
+            return
+        steps = self.steps
+        scaled = np.divide(rows, steps, out=np.zeros_like(rows), where=steps > 0)
+        self.codes[start:start + len(rows)] = np.clip(np.rint(scaled), -127, 127)
+
+    def encode(self, vectors: np.ndarray, start: int, stop: int) -> "QuantizedMatrix":
+        """
+        Encode rows start..stop-1 of vectors. Returns self, or a re-encoded
+        copy when an int8 row exceeds the current range: every code changes
+        then, and searches still holding this matrix must keep a consistent one.
+        """
+        rows = np.asarray(vectors[start:stop], dtype=np.float32)
+        target = self
+        if self.kind == "int8" and len(rows):
+            peak = np.abs(rows).max(axis=0)
+            if (peak > self.limits).any():
+                target = QuantizedMatrix(self.kind, self.dim, len(self.codes))
+                target.limits = np.maximum(self.limits, peak * RANGE_HEADROOM)
+                for block in range(0, start, ENCODE_BLOCK_ROWS):
+                    end = min(block + ENCODE_BLOCK_ROWS, start)
+                    target._write(np.asarray(vectors[block:end], dtype=np.float32), block)
+        target._write(rows, start)
+        return target
+
+    def scores(self, queries: np.ndarray, start: int, stop: int) -> np.ndarray:
+        """Approximate dot products of queries with rows start..stop-1: float32[len(queries), stop - start]."""
+        if self.kind == "int8":
+            queries = queries * self.steps
+        scores = np.empty((len(queries), stop - start), dtype=np.float32)
+        buffer = np.empty((min(DECODE_BLOCK_ROWS, stop - start), self.dim), dtype=np.float32)
+        for block in range(start, stop, DECODE_BLOCK_ROWS):
+            end = min(block + DECODE_BLOCK_ROWS, stop)
+            rows = buffer[:end - block]
+            np.copyto(rows, self.codes[block:end], casting="unsafe")
+            scores[:, block - start:end - start] = queries @ rows.T
+        return scores
+
+    def nbytes(self, count: int) -> int:
+        return count * self.dim * self.codes.itemsize
@@ -0,0 +1,615 @@
+"""
+Local vector index: the part of the Qdrant client API the services use, served
+from NumPy arrays in the process (VECTOR_STORE=local).
+
+A collection is a float32[capacity, dim] matrix of L2-normalized vectors, so a
+cosine search is one matrix product. With a directory the matrix lives in a
+memory-mapped file, next to a JSON snapshot of the point ids and payloads:
+
+    <dir>/<collection>.<generation>.f32   float32[capacity, dim] (rows 0..count-1 used)
+    <dir>/<collection>.json               dim, count, generation, ids and payloads per row
+    <dir>/<collection>.<generation>-<count>.hnsw.npz   HNSW links (hnsw collections)
+
+Rows are append-only: upserting an existing id appends a new row and retires
+the old one, and a delete retires the row. Retired rows are masked out of
+searches and dropped by `save()`, which then writes the live rows to the next
+generation file, so a snapshot only ever points at rows that are not rewritten.
+`LocalVectorIndex(path)` loads the snapshots in path; points written after the
+last `save()` are lost on restart. Without a directory everything stays in RAM.
+
+Searches score the rows in blocks of SCAN_BLOCK_ROWS against a batch of
+queries (one matrix product per block) and keep the best `limit` rows per
+query with `np.argpartition`, so only the winners are sorted. Only cosine
+distance is supported, which is what every collection here uses.
+
+With VECTOR_INDEX_TYPE=hnsw (or an `hnsw_config` on create_collection) a
+collection also keeps an HNSW graph (hnsw.py), linked row by row as points are
+upserted. Searches of collections over HNSW_FULL_SCAN_ROWS rows walk the graph
+with a candidate list of HNSW_EF (or `search_params.hnsw_ef`) instead of
+scanning; `search_params.exact` forces the scan. Rebuilding the graph is the
+expensive part, so `save()` keeps retired rows (masked, id null in the
+snapshot) until they are half the collection, and the links are saved next to
+the snapshot instead of being rebuilt on load.
+
+With VECTOR_QUANTIZATION=int8 or float16 (or an int8 `quantization_config`) a
+collection also keeps a quantized copy of the matrix in RAM (quantization.py),
+and scans read that copy instead: the best `limit * oversampling` rows are
+then rescored against the float32 rows, which on disk are only paged in for
+those candidates. The copy is re-encoded from the float32 file on load.
+"""
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .hnsw import HNSWIndex
+from .quantization import QUANTIZATIONS, QuantizedMatrix
+
+# Vector search backend: "qdrant" (server) or "local" (in-process, no Qdrant needed)
+VECTOR_STORES = ("qdrant", "local")
+VECTOR_STORE = os.getenv("VECTOR_STORE", "qdrant")
+# Directory of the local index snapshots (empty keeps the index in memory only)
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "cache/vectors")
+# Index of new local collections: "flat" (exact scan) or "hnsw" (approximate, graph)
+VECTOR_INDEX_TYPES = ("flat", "hnsw")
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat")
+# HNSW links per node (2 * M on the base level) and candidate list size when linking
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCT = int(os.getenv("HNSW_EF_CONSTRUCT", "100"))
+# HNSW candidate list size when searching (higher: better recall, slower)
+HNSW_EF = int(os.getenv("HNSW_EF", "64"))
+# Collections up to this many rows are scanned exactly even with an HNSW graph
+HNSW_FULL_SCAN_ROWS = int(os.getenv("HNSW_FULL_SCAN_ROWS", "20000"))
+# Scan copy of new local collections: none (scan the float32 rows), int8 (4x smaller) or float16 (2x)
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")
+# Candidates rescored at full precision after a quantized scan: limit * oversampling
+VECTOR_RESCORE_OVERSAMPLING = float(os.getenv("VECTOR_RESCORE_OVERSAMPLING", "4"))
+
+# Rows scored per matrix product (bounds the score buffer to queries x block)
+SCAN_BLOCK_ROWS = 65536
+
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class ScoredPoint:
+    """Search hit with the attributes of Qdrant's ScoredPoint that the services read."""
+
+    __slots__ = ("id", "score", "payload")
+
+    def __init__(self, id, score: float, payload: Optional[Dict]):
+        self.id = id
+        self.score = score
+        self.payload = payload
+
+    def __repr__(self) -> str:
+        return f"ScoredPoint(id={self.id!r}, score={self.score:.4f})"
+
+
+class CollectionDescription:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class CollectionsResponse:
+    def __init__(self, collections: List[CollectionDescription]):
+        self.collections = collections
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize float32 rows (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0).astype(np.float32)
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k highest scores of every row, unordered (all columns if k >= width)."""
+    width = scores.shape[1]
+    if k >= width:
+        return np.broadcast_to(np.arange(width), scores.shape)
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+
+def _scan(score_block, queries: np.ndarray, count: int, live: np.ndarray, retired: int, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(rows, scores) of the best `limit` live rows per query, unordered; score_block(queries, start, stop) scores a block."""
+    best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+    best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+    if limit > 0:
+        for start in range(0, count, SCAN_BLOCK_ROWS):
+            stop = min(start + SCAN_BLOCK_ROWS, count)
+            scores = score_block(queries, start, stop)
+            if retired:
+                scores[:, ~live[start:stop]] = -np.inf
+            top = top_k_rows(scores, limit)
+            rows = np.concatenate([best_rows, top + start], axis=1)
+            merged = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            keep = top_k_rows(merged, limit)
+            best_rows = np.take_along_axis(rows, keep, axis=1)
+            best_scores = np.take_along_axis(merged, keep, axis=1)
+    return best_rows, best_scores
+
+
+def _rescore(vectors: np.ndarray, queries: np.ndarray, rows: np.ndarray, scores: np.ndarray, limit: int) -> Tuple[List, List]:
+    """Full-precision scores of the candidate rows of every query, best `limit` kept."""
+    best_rows, best_scores = [], []
+    for query, candidates, approximate in zip(queries, rows, scores):
+        # Sorted rows: the candidates of one query are read in file order
+        candidates = np.sort(candidates[approximate != -np.inf])
+        exact = np.asarray(vectors[candidates]) @ query
+        keep = top_k_rows(exact[None, :], limit)[0] if len(candidates) else candidates
+        best_rows.append(candidates[keep])
+        best_scores.append(exact[keep])
+    return best_rows, best_scores
+
+
+def _search_view(view: Tuple, queries: np.ndarray, limit: int, oversampling: float = 0.0) -> List[List[ScoredPoint]]:
+    """
+    Best `limit` live rows per query, best first (equal scores in row order).
+    With a quantized copy (and oversampling >= 1), the copy is scanned for
+    limit * oversampling candidates that are rescored at full precision.
+    """
+    vectors, live, count, retired, ids, payloads, quantized = view
+    queries = normalize_rows(queries)
+    if quantized is not None and oversampling >= 1 and limit > 0:
+        candidates = max(limit, int(limit * oversampling))
+        rows, scores = _scan(quantized.scores, queries, count, live, retired, candidates)
+        best_rows, best_scores = _rescore(vectors, queries, rows, scores, limit)
+    else:
+        best_rows, best_scores = _scan(
+            lambda q, start, stop: q @ vectors[start:stop].T, queries, count, live, retired, limit
+        )
+
+    results = []
+    for rows, scores in zip(best_rows, best_scores):
+        order = np.lexsort((rows, -scores))
+        results.append([
+            ScoredPoint(ids[row], float(score), payloads[row])
+            for row, score in zip(rows[order].tolist(), scores[order].tolist())
+            if score != -np.inf
+        ])
+    return results
+
+
+class _Collection:
+    """One collection: the vector matrix, the row -> id/payload lists, the id -> row map and the optional HNSW graph."""
+
+    def __init__(
+        self,
+        name: str,
+        dim: int,
+        path: Optional[str],
+        generation: int = 0,
+        graph: Optional[HNSWIndex] = None,
+        quantized: Optional[QuantizedMatrix] = None,
+    ):
+        self.name = name
+        self.dim = dim
+        self.path = path
+        self.generation = generation
+        self.graph = graph
+        self.graph_file: Optional[str] = None
+        self.quantized = quantized
+        self.count = 0
+        self.ids: List = []
+        self.payloads: List[Optional[Dict]] = []
+        self.rows: Dict = {}
+        self.live = np.zeros(0, dtype=bool)
+        self.retired = 0
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+
+    @property
+    def vectors_path(self) -> Optional[str]:
+        if not self.path:
+            return None
+        return os.path.join(self.path, f"{self.name}.{self.generation}.f32")
+
+    @property
+    def snapshot_path(self) -> Optional[str]:
+        return os.path.join(self.path, f"{self.name}.json") if self.path else None
+
+    def _map(self, capacity: int) -> None:
+        """(Re)map the vector file with room for capacity rows."""
+        vectors_path = self.vectors_path
+        with open(vectors_path, "ab") as f:
+            if f.tell() < capacity * self.dim * 4:
+                f.truncate(capacity * self.dim * 4)
+        self.vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _reserve(self, rows: int) -> None:
+        needed = self.count + rows
+        if needed <= len(self.vectors):
+            return
+        capacity = max(needed, 2 * len(self.vectors), 1024)
+        live = np.zeros(capacity, dtype=bool)
+        live[:self.count] = self.live[:self.count]
+        if self.vectors_path:
+            # Old rows stay where they are: the file only grows
+            self._map(capacity)
+        else:
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            vectors[:self.count] = self.vectors[:self.count]
+            self.vectors = vectors
+        if self.quantized is not None:
+            self.quantized.reserve(capacity, self.count)
+        self.live = live
+
+    def _retire(self, row: int) -> None:
+        # The payload stays until compaction: a search running without the lock may still return the row
+        self.live[row] = False
+        self.retired += 1
+
+    def upsert(self, ids: List, vectors: np.ndarray, payloads: List[Optional[Dict]]) -> None:
+        # The last of duplicate ids in one batch wins, as in sequential upserts
+        latest = {point_id: i for i, point_id in enumerate(ids)}
+        keep = sorted(latest.values())
+        self._reserve(len(keep))
+        start = self.count
+        self.vectors[start:start + len(keep)] = normalize_rows(vectors[keep])
+        for offset, i in enumerate(keep):
+            point_id = ids[i]
+            row = self.rows.get(point_id)
+            if row is not None:
+                self._retire(row)
+            self.rows[point_id] = start + offset
+            self.ids.append(point_id)
+            self.payloads.append(payloads[i])
+        if self.quantized is not None:
+            self.quantized = self.quantized.encode(self.vectors, start, start + len(keep))
+        self.live[start:start + len(keep)] = True
+        self.count += len(keep)
+        if self.graph is not None:
+            vectors = np.asarray(self.vectors)
+            for row in range(start, self.count):
+                self.graph.insert(vectors, row)
+
+    def delete(self, ids: Iterable) -> int:
+        deleted = 0
+        for point_id in ids:
+            row = self.rows.pop(point_id, None)
+            if row is not None:
+                self._retire(row)
+                deleted += 1
+        return deleted
+
+    def view(self) -> Tuple:
+        """
+        The arrays a search reads, taken under the index lock. Rows below
+        count are never rewritten and compaction swaps in new arrays, so the
+        search itself can run without the lock.
+        """
+        return self.vectors, self.live, self.count, self.retired, self.ids, self.payloads, self.quantized
+
+    def search_graph(self, queries: np.ndarray, limit: int, ef: int) -> List[List[ScoredPoint]]:
+        """Approximate search through the HNSW graph (under the index lock: inserts relink nodes)."""
+        vectors = np.asarray(self.vectors)
+        live = self.live if self.retired else None
+        return [
+            [ScoredPoint(self.ids[row], score, self.payloads[row]) for score, row in self.graph.search(vectors, query, limit, ef, live)]
+            for query in normalize_rows(queries)
+        ]
+
+    def _link_all(self) -> None:
+        graph = HNSWIndex(self.graph.m, self.graph.ef_construct)
+        vectors = np.asarray(self.vectors)
+        for row in range(self.count):
+            graph.insert(vectors, row)
+        self.graph = graph
+
+    def compact(self) -> Optional[str]:
+        """Drop retired rows (into the next generation file when on disk); returns the replaced file."""
+        keep = np.flatnonzero(self.live[:self.count])
+        vectors = np.asarray(self.vectors[keep])
+        ids = [self.ids[row] for row in keep.tolist()]
+        payloads = [self.payloads[row] for row in keep.tolist()]
+        old_path = self.vectors_path
+        if old_path:
+            self.generation += 1
+            self._map(max(len(keep), 1))
+        else:
+            self.vectors = np.zeros((max(len(keep), 1), self.dim), dtype=np.float32)
+        self.vectors[:len(keep)] = vectors
+        self.live = np.ones(len(self.vectors), dtype=bool)
+        self.live[len(keep):] = False
+        self.count = len(keep)
+        self.ids = ids
+        self.payloads = payloads
+        self.rows = {point_id: row for row, point_id in enumerate(ids)}
+        self.retired = 0
+        if self.quantized is not None:
+            self._encode_all()
+        if self.graph is not None:
+            self._link_all()
+        return old_path
+
+    def _encode_all(self) -> None:
+        quantized = QuantizedMatrix(self.quantized.kind, self.dim, len(self.vectors))
+        self.quantized = quantized.encode(self.vectors, 0, self.count)
+
+    def _should_compact(self) -> bool:
+        if self.graph is not None:
+            # Compaction relinks every row: wait until half of them are retired
+            return self.retired * 2 > self.count
+        return self.retired > 0
+
+    def _save_graph(self) -> str:
+        file_name = f"{self.name}.{self.generation}-{self.count}.hnsw.npz"
+        tmp_path = os.path.join(self.path, f"{file_name}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **self.graph.to_arrays())
+        os.replace(tmp_path, os.path.join(self.path, file_name))
+        return file_name
+
+    def save(self) -> None:
+        old_path = self.compact() if self._should_compact() else None
+        if not self.path:
+            return
+        if not isinstance(self.vectors, np.memmap):
+            self._map(max(self.count, 1))
+        self.vectors.flush()
+        old_graph_file = self.graph_file
+        snapshot = {
+            "dim": self.dim,
+            "distance": "Cosine",
+            "count": self.count,
+            "generation": self.generation,
+            "quantization": self.quantized.kind if self.quantized is not None else "none",
+            # Retired rows (kept for the graph) have no id
+            "ids": [point_id if live else None for point_id, live in zip(self.ids, self.live[:self.count].tolist())],
+            "payloads": [payload if live else None for payload, live in zip(self.payloads, self.live[:self.count].tolist())],
+        }
+        if self.graph is not None:
+            self.graph_file = self._save_graph()
+            snapshot["hnsw"] = {"m": self.graph.m, "ef_construct": self.graph.ef_construct, "file": self.graph_file}
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, self.snapshot_path)
+        # The previous generation is unreferenced once the new snapshot is in place
+        if old_path and os.path.exists(old_path):
+            os.remove(old_path)
+        if old_graph_file and old_graph_file != self.graph_file:
+            old_graph_path = os.path.join(self.path, old_graph_file)
+            if os.path.exists(old_graph_path):
+                os.remove(old_graph_path)
+
+    @classmethod
+    def load(cls, path: str, name: str) -> "_Collection":
+        with open(os.path.join(path, f"{name}.json"), encoding="utf-8") as f:
+            snapshot = json.load(f)
+        collection = cls(name, snapshot["dim"], path, snapshot["generation"])
+        capacity = os.path.getsize(collection.vectors_path) // (collection.dim * 4)
+        if capacity < snapshot["count"]:
+            raise ValueError(f"{collection.vectors_path} holds {capacity} of {snapshot['count']} rows")
+        capacity = max(capacity, 1)
+        collection._map(capacity)
+        collection.count = snapshot["count"]
+        collection.ids = snapshot["ids"]
+        collection.payloads = snapshot["payloads"]
+        collection.rows = {point_id: row for row, point_id in enumerate(collection.ids) if point_id is not None}
+        collection.live = np.zeros(capacity, dtype=bool)
+        collection.live[:collection.count] = [point_id is not None for point_id in collection.ids]
+        collection.retired = collection.count - len(collection.rows)
+        if snapshot.get("quantization", "none") != "none":
+            collection.quantized = QuantizedMatrix(snapshot["quantization"], collection.dim)
+            collection._encode_all()
+        if "hnsw" in snapshot:
+            collection._load_graph(snapshot["hnsw"])
+        return collection
+
+    def _load_graph(self, config: Dict) -> None:
+        graph_path = os.path.join(self.path, config["file"])
+        try:
+            with np.load(graph_path) as arrays:
+                self.graph = HNSWIndex.from_arrays(arrays)
+            if len(self.graph) != self.count:
+                raise ValueError(f"{len(self.graph)} of {self.count} rows linked")
+            self.graph_file = config["file"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠ HNSW graph {config['file']} not loaded ({e}): relinking {self.count} rows")
+            self.graph = HNSWIndex(config["m"], config["ef_construct"])
+            self._link_all()
+
+    def remove_files(self) -> None:
+        graph_path = os.path.join(self.path, self.graph_file) if self.path and self.graph_file else None
+        for file_path in (self.vectors_path, self.snapshot_path, graph_path):
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+
+    def stats(self) -> Dict:
+        stats = {
+            "dim": self.dim,
+            "index": "hnsw" if self.graph is not None else "flat",
+            "points": len(self.rows),
+            "retired_rows": self.retired,
+            "capacity": len(self.vectors),
+            "vector_bytes": self.count * self.dim * 4,
+            "quantization": self.quantized.kind if self.quantized is not None else "none",
+            # Bytes read by a full scan (the quantized copy when there is one)
+            "scan_bytes": self.quantized.nbytes(self.count) if self.quantized is not None else self.count * self.dim * 4,
+            "generation": self.generation,
+        }
+        if self.graph is not None:
+            stats["hnsw"] = self.graph.stats()
+        return stats
+
+
+class LocalVectorIndex:
+    """
+    In-process stand-in for QdrantClient: get_collections, (re)create_collection,
+    delete_collection, upsert, delete and search, with the same arguments.
+
+    Point ids are ints or strings, payloads JSON-serializable dicts. Of the
+    Qdrant index options, `hnsw_config` (m, ef_construct), an int8 scalar
+    `quantization_config` and `search_params` (hnsw_ef, exact,
+    quantization.ignore / oversampling) are honored; quantized scans are
+    always rescored.
+    """
+
+    backend = "local"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._collections: Dict[str, _Collection] = {}
+        self._lock = threading.RLock()
+        self.searches = 0
+        if path:
+            os.makedirs(path, exist_ok=True)
+            for file_name in sorted(os.listdir(path)):
+                name, ext = os.path.splitext(file_name)
+                if ext == ".json" and _NAME_PATTERN.match(name):
+                    try:
+                        self._collections[name] = _Collection.load(path, name)
+                    except (OSError, ValueError, KeyError) as e:
+                        print(f"⚠ Vector index snapshot {file_name} skipped: {e}")
+
+    def _collection(self, collection_name: str) -> _Collection:
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            raise ValueError(f"Collection not found: {collection_name}")
+        return collection
+
+    def get_collections(self) -> CollectionsResponse:
+        with self._lock:
+            return CollectionsResponse([CollectionDescription(name) for name in self._collections])
+
+    def create_collection(self, collection_name: str, vectors_config, hnsw_config=None, quantization_config=None, **kwargs) -> bool:
+        """
+        New empty collection; HNSW-indexed with an `hnsw_config` or
+        VECTOR_INDEX_TYPE=hnsw, quantized with a `quantization_config` or
+        VECTOR_QUANTIZATION.
+        """
+        if not _NAME_PATTERN.match(collection_name):
+            raise ValueError(f"Invalid collection name: {collection_name}")
+        distance = str(getattr(vectors_config.distance, "value", vectors_config.distance))
+        if distance.lower() != "cosine":
+            raise ValueError(f"Unsupported distance for the local vector index: {distance} (only Cosine)")
+        graph = None
+        if hnsw_config is not None or VECTOR_INDEX_TYPE == "hnsw":
+            graph = HNSWIndex(
+                getattr(hnsw_config, "m", None) or HNSW_M,
+                getattr(hnsw_config, "ef_construct", None) or HNSW_EF_CONSTRUCT,
+            )
+        quantization = VECTOR_QUANTIZATION
+        if quantization_config is not None:
+            # Qdrant's ScalarQuantization(scalar=ScalarQuantizationConfig(type=INT8)); other kinds are not supported
+            scalar_type = getattr(getattr(quantization_config, "scalar", None), "type", None)
+            quantization = str(getattr(scalar_type, "value", scalar_type)).lower()
+            if quantization != "int8":
+                raise ValueError(f"Unsupported quantization for the local vector index: {quantization} (only scalar int8)")
+        dim = int(vectors_config.size)
+        quantized = QuantizedMatrix(quantization, dim) if quantization != "none" else None
+        with self._lock:
+            if collection_name in self._collections:
+                raise ValueError(f"Collection already exists: {collection_name}")
+            self._collections[collection_name] = _Collection(collection_name, dim, self.path, graph=graph, quantized=quantized)
+        return True
+
+    def recreate_collection(self, collection_name: str, vectors_config, **kwargs) -> bool:
+        with self._lock:
+            self.delete_collection(collection_name)
+            return self.create_collection(collection_name, vectors_config, **kwargs)
+
+    def delete_collection(self, collection_name: str, **kwargs) -> bool:
+        with self._lock:
+            collection = self._collections.pop(collection_name, None)
+            if collection is None:
+                return False
+            collection.remove_files()
+        return True
+
+    def upsert(self, collection_name: str, points, **kwargs) -> None:
+        """Insert or replace points (objects with `id`, `vector` and `payload`, e.g. PointStruct)."""
+        points = list(points)
+        if not points:
+            return
+        vectors = np.asarray([point.vector for point in points], dtype=np.float32)
+        with self._lock:
+            collection = self._collection(collection_name)
+            if vectors.shape[1] != collection.dim:
+                raise ValueError(f"Vector dimension {vectors.shape[1]} does not match {collection_name} ({collection.dim})")
+            collection.upsert([point.id for point in points], vectors, [point.payload for point in points])
+
+    def delete(self, collection_name: str, points_selector, **kwargs) -> int:
+        """Delete points by id (`points_selector` is a PointIdsList or a list of ids)."""
+        ids = getattr(points_selector, "points", points_selector)
+        with self._lock:
+            return self._collection(collection_name).delete(ids)
+
+    def search(self, collection_name: str, query_vector, limit: int = 10, search_params=None, **kwargs) -> List[ScoredPoint]:
+        """Top `limit` points by cosine similarity, best first."""
+        return self.search_batch(collection_name, [query_vector], limit, search_params)[0]
+
+    def search_batch(self, collection_name: str, query_vectors, limit: int = 10, search_params=None) -> List[List[ScoredPoint]]:
+        """
+        search for several query vectors at once (one matrix product per row
+        block, or one graph walk per query for large HNSW collections).
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1)
+        exact = bool(getattr(search_params, "exact", False))
+        ef = getattr(search_params, "hnsw_ef", None) or HNSW_EF
+        quantization = getattr(search_params, "quantization", None)
+        oversampling = getattr(quantization, "oversampling", None) or VECTOR_RESCORE_OVERSAMPLING
+        if exact or getattr(quantization, "ignore", False):
+            oversampling = 0.0
+        with self._lock:
+            collection = self._collection(collection_name)
+            if queries.shape[1] != collection.dim:
+                raise ValueError(f"Vector dimension {queries.shape[1]} does not match {collection_name} ({collection.dim})")
+            self.searches += len(queries)
+            if collection.graph is not None and not exact and collection.count > HNSW_FULL_SCAN_ROWS:
+                return collection.search_graph(queries, limit, ef)
+            view = collection.view()
+        return _search_view(view, queries, limit, oversampling)
+
+    def save(self, collection_name: Optional[str] = None) -> None:
+        """Write the snapshot of one collection (all when None); retired rows may be dropped first."""
+        with self._lock:
+            names = [collection_name] if collection_name else list(self._collections)
+            for name in names:
+                self._collection(name).save()
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "path": self.path,
+                "searches": self.searches,
+                "collections": {name: c.stats() for name, c in self._collections.items()},
+            }
+
+
+class AsyncLocalVectorIndex:
+    """AsyncQdrantClient stand-in over a LocalVectorIndex (searches run inline: they are CPU-bound and short)."""
+
+    backend = "local"
+
+    def __init__(self, index: LocalVectorIndex):
+        self.index = index
+
+    async def get_collections(self) -> CollectionsResponse:
+        return self.index.get_collections()
+
+    async def search(self, collection_name: str, query_vector, limit: int = 10, search_params=None, **kwargs) -> List[ScoredPoint]:
+        return self.index.search(collection_name, query_vector, limit, search_params)
+
+    async def close(self) -> None:
+        pass
+
+
+def open_local_index() -> Optional[LocalVectorIndex]:
+    """LocalVectorIndex on VECTOR_INDEX_DIR when VECTOR_STORE=local, None for Qdrant."""
+    if VECTOR_STORE not in VECTOR_STORES:
+        raise ValueError(f"Unknown vector store: {VECTOR_STORE} (expected one of {', '.join(VECTOR_STORES)})")
+    if VECTOR_INDEX_TYPE not in VECTOR_INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type: {VECTOR_INDEX_TYPE} (expected one of {', '.join(VECTOR_INDEX_TYPES)})")
+    if VECTOR_QUANTIZATION not in QUANTIZATIONS:
+        raise ValueError(f"Unknown vector quantization: {VECTOR_QUANTIZATION} (expected one of {', '.join(QUANTIZATIONS)})")
+    if VECTOR_STORE == "qdrant":
+        return None
+    return LocalVectorIndex(VECTOR_INDEX_DIR or None)
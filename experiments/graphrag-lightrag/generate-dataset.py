@@ -1,13 +1,40 @@
 #!/usr/bin/env python3
 """
 Generate large-scale datasets for GraphRAG/LightRAG experiments.
-This script generates datasets with varying numbers of nodes (300, 500, 1000)
-with high connectivity (average degree 3-5).
+
+Any target node count works (from a few dozen up to millions). Documents are
+streamed to the JSONL output shard by shard, so memory stays flat regardless
+of size:
+- every node name is a pure function of its index (products, features and
+  policies never need to be held in memory),
+- every document is generated from its own RNG seeded with (--seed, kind,
+  index), so the output is identical for any --workers / --shard-size,
+- shards are generated by a process pool and appended to the output in order,
+- `--distribution powerlaw` picks features, policies and related products
+  with Zipf weights (`--alpha`), producing hub nodes; `uniform` (default)
+  picks them uniformly,
+- `--questions` writes a matching questions.json whose expected answers come
+  from the generated relationships.
+
+Node names only use patterns the entity extractor recognizes as a whole
+("<Word> Search" for products, "<Word> Index" for features, "POL-<n>" for
+policies), so the expected answers survive extraction.
+
+Usage:
+    python3 generate-dataset.py --size 300 --degree 4 --output data/docs-300.jsonl
+    python3 generate-dataset.py --size 1000000 --workers 8 --distribution powerlaw \\
+        --output data/docs-1m.jsonl --questions data/questions-1m.json
 """
+import argparse
 import json
+import os
 import random
-import argparse
-from typing import Set
+import shutil
+import tempfile
+import time
+from collections import Counter
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Tuple
 
 # Product name templates
 PRODUCT_PREFIXES = [
@@ -20,33 +47,13 @@ PRODUCT_PREFIXES = [
     "Capacity", "Cost", "Security", "API", "Content", "User", "Email", "Chat"
 ]
 
-PRODUCT_SUFFIXES = [
-    "Platform", "Pro", "Suite", "Manager", "Engine", "System", "Tool", "Service",
-    "Core", "Hub", "Framework", "Studio", "Builder", "Search", "Graph", "Index",
-    "Vault", "Guard", "Bridge", "Optimizer", "Collector", "Analyzer", "Scanner",
-    "Delivery", "Campaign", "Bot"
-]
-
-FEATURE_NAMES = [
-    "Semantic Index", "Policy Audit", "Realtime Query", "Data Encryption",
-    "Access Control", "Audit Logging", "Performance Monitoring", "Auto Scaling",
-    "Load Balancing", "Backup Restore", "Disaster Recovery", "Multi Region",
-    "API Gateway", "Rate Limiting", "Caching Layer", "Search Index",
-    "Analytics Dashboard", "Alert System", "Workflow Engine", "Task Scheduler"
-]
-
+# Feature name templates
 FEATURE_ADJECTIVES = [
     "Advanced", "Adaptive", "Augmented", "Autonomous", "Cognitive", "Collaborative",
     "Continuous", "Distributed", "Dynamic", "Enterprise", "Hybrid", "Intelligent",
     "Predictive", "Realtime", "Secure", "Self-Healing", "Smart", "Streamlined", "Unified", "Virtual"
 ]
 
-FEATURE_SUFFIXES = [
-    "Adapter", "Agent", "Analyzer", "Assistant", "Bridge", "Builder", "Console",
-    "Engine", "Extension", "Framework", "Gateway", "Hub", "Layer", "Module",
-    "Optimizer", "Orchestrator", "Pipeline", "Service", "Suite", "Toolkit"
-]
-
 POLICY_TEMPLATES = [
     ("Personal Data Protection", "POL"),
     ("AI Model Governance", "POL"),
@@ -58,339 +65,418 @@ POLICY_TEMPLATES = [
     ("GDPR Compliance", "POL")
 ]
 
+# Entities used by the fixed test questions (questions.json); they always exist
+# with the relationships the questions expect
+KNOWN_PRODUCTS = ["Acme Search", "Globex Graph"]
+KNOWN_FEATURES = ["Semantic Index", "Policy Audit", "Realtime Query"]
+KNOWN_POLICIES = [("Personal Data Protection", "POL-001"), ("AI Model Governance", "POL-002")]
+KNOWN_PRODUCT_FEATURES = {
+    "Acme Search": ["Semantic Index", "Realtime Query"],
+    "Globex Graph": ["Semantic Index", "Policy Audit"],
+}
+KNOWN_PRODUCT_POLICIES = {
+    "Acme Search": [0, 1],
+    "Globex Graph": [1],
+}
 
-def generate_product_name():
-    """Generate a random product name."""
-    prefix = random.choice(PRODUCT_PREFIXES)
-    suffix = random.choice(PRODUCT_SUFFIXES)
-    # Avoid duplicate combinations
-    return f"{prefix} {suffix}"
-
-
-def generate_relationship_text(product, features, policies, other_products):
-    """Generate natural language text describing relationships."""
-    texts = []
-    
-    # Product description
-    feature_list = ", ".join(features[:3])
-    if len(features) > 3:
-        feature_list += f", {features[3]}など"
-    
-    product_text = f"{product} は企業向けソリューションです。{feature_list} 機能を提供しています。"
-    texts.append(product_text)
-    
-    # Feature descriptions
-    for feature in features[:2]:
-        feature_text = f"{feature} 機能は、{product} の主要機能の一つです。"
-        texts.append(feature_text)
-    
-    # Policy relationships
-    if policies:
-        policy_list = ", ".join([f"{name}（{pid}）" for name, pid in policies[:2]])
-        policy_text = f"{policy_list} は {product} に関連するポリシーです。コンプライアンス要件を満たす必要があります。"
-        texts.append(policy_text)
-    
-    # Product-Product relationships (for connectivity)
-    if other_products:
-        related_product = random.choice(other_products)
-        relation_keywords = ["依存", "連携", "統合", "互換"]
-        keyword = random.choice(relation_keywords)
-        relation_text = f"{product} は {related_product} と{keyword}関係があります。相互運用性が高いです。"
-        texts.append(relation_text)
-    
-    return " ".join(texts)
-
-
-def build_feature_list(target_count, known_features):
-    """Generate a sufficiently large pool of unique feature names."""
-    features = []
-    seen = set()
-    
-    def add_feature(name):
-        normalized = name.replace("-", " ").strip()
-        name_to_store = normalized if normalized else name
-        if name_to_store and name_to_store not in seen:
-            features.append(name_to_store)
-            seen.add(name_to_store)
-    
-    # Ensure known features appear first
-    for feat in known_features:
-        add_feature(feat)
-    
-    # Add base names
-    for feat in FEATURE_NAMES:
-        add_feature(feat)
-        if len(features) >= target_count:
-            return features[:target_count]
-    
-    # Generate adjective + base combinations
-    adjective_combos = [f"{adj} {base}" for adj in FEATURE_ADJECTIVES for base in FEATURE_NAMES]
-    random.shuffle(adjective_combos)
-    for candidate in adjective_combos:
-        add_feature(candidate)
-        if len(features) >= target_count:
-            return features[:target_count]
-    
-    # Generate base + suffix combinations
-    suffix_combos = [f"{base} {suffix}" for base in FEATURE_NAMES for suffix in FEATURE_SUFFIXES]
-    random.shuffle(suffix_combos)
-    for candidate in suffix_combos:
-        add_feature(candidate)
-        if len(features) >= target_count:
-            return features[:target_count]
-    
-    # Fallback: create numbered synthetic features
-    counter = 1
-    while len(features) < target_count:
-        add_feature(f"Synthetic Feature {counter}")
-        counter += 1
-    
-    return features[:target_count]
-
-
-def generate_dataset(target_nodes, avg_degree=4):
-    """
-    Generate a dataset with approximately target_nodes nodes.
-    
-    Strategy:
-    - Generate products (60% of nodes)
-    - Generate features (25% of nodes)
-    - Generate policies (15% of nodes)
-    - Create relationships to achieve avg_degree average connectivity
-    """
-    import sys
-    random.seed(42)  # Reproducibility
-    
-    print(f"📊 データセット生成開始: 目標ノード数={target_nodes}, 平均次数={avg_degree}")
-    
-    # Calculate node counts
-    n_products = int(target_nodes * 0.6)
-    n_features = int(target_nodes * 0.25)
-    n_policies = int(target_nodes * 0.15)
-    
-    print(f"  ノード構成: 製品={n_products}, 機能={n_features}, ポリシー={n_policies}")
-    print()
-    
-    # Generate unique products
-    # Always include known entities from test questions for compatibility
-    print("🔄 製品ノード生成中...", end="", flush=True)
-    known_products = ["Acme Search", "Globex Graph"]
-    products = known_products.copy()
-    seen_products = set(known_products)
-    
-    while len(products) < n_products:
-        product = generate_product_name()
-        if product not in seen_products:
-            products.append(product)
-            seen_products.add(product)
-            # Progress update every 10 products
-            if len(products) % 10 == 0 or len(products) == n_products:
-                progress = (len(products) / n_products) * 100
-                print(f"\r🔄 製品ノード生成中... {len(products)}/{n_products} ({progress:.1f}%)", end="", flush=True)
-    print(f"\r✓ 製品ノード生成完了: {len(products)}/{n_products} (100.0%)")
-    
-    # Use a subset of features, ensure some are shared
-    # Always include known features from test questions for compatibility
-    known_features = ["Semantic Index", "Policy Audit", "Realtime Query"]
-    print("🔄 機能ノード生成中...", end="", flush=True)
-    features = build_feature_list(n_features, known_features)
-    print(f"\r✓ 機能ノード生成完了: {len(features)}/{n_features} (100.0%)")
-    
-    # Generate policies
-    # Always include known policies from test questions for compatibility
-    print("🔄 ポリシーノード生成中...", end="", flush=True)
-    known_policies = [
-        ("Personal Data Protection", "POL-001"),
-        ("AI Model Governance", "POL-002")
-    ]
-    policies = known_policies.copy()
-    
-    # Add more policies if needed
-    for i in range(len(known_policies), n_policies):
-        policy_name, prefix = random.choice(POLICY_TEMPLATES)
-        policy_id = f"{prefix}-{str(i+1).zfill(3)}"
-        # Avoid duplicates
-        if not any(p[1] == policy_id for p in policies):
-            policies.append((policy_name, policy_id))
-        # Progress update
-        if len(policies) % 5 == 0 or len(policies) >= n_policies:
-            progress = (len(policies) / n_policies) * 100
-            print(f"\r🔄 ポリシーノード生成中... {len(policies)}/{n_policies} ({progress:.1f}%)", end="", flush=True)
-    print(f"\r✓ ポリシーノード生成完了: {len(policies)}/{n_policies} (100.0%)")
-    print()
-    
-    # Calculate total edges needed for avg_degree
-    total_nodes = n_products + n_features + n_policies
-    total_edges_needed = int((total_nodes * avg_degree) / 2)  # Undirected, so divide by 2
-    
-    # Create documents with relationships
-    print("🔄 関係とドキュメント生成中...")
-    docs = []
-    doc_id = 1
-    
-    # Assign features to products (Product-Feature edges)
-    # Each product gets 2-5 features
-    # Ensure known products have known features for test compatibility
-    product_feature_map = {}
-    
-    # Special assignment for known products to match test questions
-    if "Acme Search" in products:
-        product_feature_map["Acme Search"] = ["Semantic Index", "Realtime Query"]
-    if "Globex Graph" in products:
-        product_feature_map["Globex Graph"] = ["Semantic Index", "Policy Audit"]
-    
-    # Assign features to other products
-    for product in products:
-        if product not in product_feature_map:  # Skip if already assigned
-            n_product_features = random.randint(2, 5)
-            product_features = random.sample(features, min(n_product_features, len(features)))
-            product_feature_map[product] = product_features
-    
-    # Assign policies to products/features (Policy edges)
-    policy_assignments = {}
-    policy_population = products + features
-    for policy_name, policy_id in policies:
-        targets: Set[str] = set()
-        if policy_population:
-            sample_upper = min(len(policy_population), max(3, random.randint(3, 10)))
-            targets.update(random.sample(policy_population, sample_upper))
-        
-        # Ensure known policies are assigned to known products for test compatibility
-        if policy_id == "POL-001" and "Acme Search" in products:
-            targets.add("Acme Search")
-        if policy_id == "POL-002":
-            if "Acme Search" in products:
-                targets.add("Acme Search")
-            if "Globex Graph" in products:
-                targets.add("Globex Graph")
-        
-        policy_assignments[policy_id] = {
-            "name": policy_name,
-            "targets": targets
+# Suffixes the extractor captures together with one preceding word
+# ("<Word> Search" is a product, "<Word> Index" a feature)
+PRODUCT_NAME_SUFFIXES = ["Search", "Graph", "Vault", "Guard", "Bridge", "Collector", "Delivery", "Campaign", "Bot"]
+FEATURE_NAME_SUFFIXES = ["Index", "Query", "Audit"]
+
+# Letters-only tokens that make generated names unique (the extractor only
+# accepts [A-Za-z] in names)
+SYLLABLES = [
+    "ka", "ke", "ki", "ko", "ku", "ra", "re", "ri", "ro", "ru", "sa", "se", "so", "ta", "te", "to",
+    "na", "ne", "no", "ma", "me", "mo", "va", "vo", "za", "zo", "li", "lu", "da", "do", "ga", "go",
+]
+
+RELATION_KEYWORDS = ["依存", "連携", "統合", "互換"]
+
+# Share of nodes per label, and extra relationship documents per node
+PRODUCT_SHARE = 0.6
+FEATURE_SHARE = 0.25
+POLICY_SHARE = 0.15
+RELATION_DOC_SHARE = 0.2
+
+# Entries per policy document, per feature document and max features listed per product
+POLICY_TARGETS = 2
+FEATURE_DOC_PRODUCTS = 2
+MAX_LISTED_FEATURES = 8
+
+# Document kinds in output order; the document id of every entry follows from its kind and index
+DOC_KINDS = ("product", "feature", "policy", "relation")
+_KIND_SALT = {kind: i + 1 for i, kind in enumerate(DOC_KINDS + ("questions",))}
+
+
+def _token(n: int) -> str:
+    """Capitalized letters-only token for n >= 1 (base-32 syllables)."""
+    parts = []
+    while n:
+        n, digit = divmod(n, len(SYLLABLES))
+        parts.append(SYLLABLES[digit])
+    return "".join(parts).capitalize()
+
+
+def _rng(seed: int, kind: str, index: int) -> random.Random:
+    """Independent RNG per document, so output does not depend on sharding."""
+    return random.Random((seed * 1_000_003 + _KIND_SALT[kind]) * 4_294_967_311 + index)
+
+
+class DatasetSpec:
+    """Node counts, name functions and sampling rules of one dataset."""
+
+    def __init__(self, size: int, degree: int = 4, seed: int = 42, distribution: str = "uniform", alpha: float = 1.2):
+        self.size = size
+        self.degree = degree
+        self.seed = seed
+        self.distribution = distribution
+        self.alpha = alpha
+        self.n_products = max(len(KNOWN_PRODUCTS), int(size * PRODUCT_SHARE))
+        self.n_features = max(len(KNOWN_FEATURES), int(size * FEATURE_SHARE))
+        self.n_policies = max(len(KNOWN_POLICIES), int(size * POLICY_SHARE))
+        self.n_relations = int(size * RELATION_DOC_SHARE)
+        # Features per product document: 2-5 for the default degree 4
+        self.min_features = max(1, degree // 2)
+        self.max_features = max(self.min_features, degree + 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            "size": self.size, "degree": self.degree, "seed": self.seed,
+            "distribution": self.distribution, "alpha": self.alpha,
         }
-    
-    # Create product documents
-    print("  📝 製品ドキュメント生成中...", end="", flush=True)
-    for i, product in enumerate(products):
-        product_features = product_feature_map[product]
-        
-        # Find related products (for Product-Product edges)
-        related_products = []
-        if i > 0 and random.random() < 0.4:  # 40% chance of having a relation
-            related_products = random.sample(products[:i], min(1, len(products[:i])))
-        
-        # Find applicable policies
-        applicable_policies = []
-        for policy_id, info in policy_assignments.items():
-            targets = info["targets"]
-            if product in targets or any(f in targets for f in product_features):
-                applicable_policies.append((info["name"], policy_id))
-        
-        text = generate_relationship_text(product, product_features, applicable_policies[:2], related_products)
-        docs.append({"id": f"d{doc_id}", "text": text})
-        doc_id += 1
-        
-        # Progress update every 20 products
-        if (i + 1) % 20 == 0 or (i + 1) == len(products):
-            progress = ((i + 1) / len(products)) * 100
-            print(f"\r  📝 製品ドキュメント生成中... {i+1}/{len(products)} ({progress:.1f}%)", end="", flush=True)
-    print()
-    
-    # Create feature documents
-    print("  📝 機能ドキュメント生成中...", end="", flush=True)
-    feature_docs_count = 0
-    for feature in features[:min(len(features), n_features)]:
-        # Feature can be related to multiple products
-        related_products = [p for p, feats in product_feature_map.items() if feature in feats]
-        if related_products:
-            related_products_sample = random.sample(related_products, min(3, len(related_products)))
-            text = f"{feature} 機能は、{', '.join(related_products_sample[:2])} など複数の製品で利用されています。"
-            docs.append({"id": f"d{doc_id}", "text": text})
-            doc_id += 1
-            feature_docs_count += 1
-            # Progress update
-            if feature_docs_count % 5 == 0:
-                total_features = min(len(features), n_features)
-                progress = (feature_docs_count / total_features) * 100 if total_features > 0 else 100
-                print(f"\r  📝 機能ドキュメント生成中... {feature_docs_count}/{total_features} ({progress:.1f}%)", end="", flush=True)
-    # Final progress
-    total_features = min(len(features), n_features)
-    if feature_docs_count > 0:
-        print(f"\r  📝 機能ドキュメント生成中... {feature_docs_count}/{total_features} (100.0%)", end="", flush=True)
-    print()
-    
-    # Create policy documents
-    print("  📝 ポリシードキュメント生成中...", end="", flush=True)
-    for i, (policy_name, policy_id) in enumerate(policies):
-        assignment = policy_assignments.get(policy_id)
-        targets = list(assignment["targets"]) if assignment else []
-        if targets:
-            sample_count = min(3, len(targets))
-            target_sample = random.sample(targets, sample_count)
-            joined_targets = ", ".join(target_sample[:2])
-            text = f"{assignment['name']}（{policy_id}）は {joined_targets} に関連するポリシーです。規制要件を満たす必要があります。"
-            docs.append({"id": f"d{doc_id}", "text": text})
+
+    # Names ----------------------------------------------------------------
+
+    def product_name(self, i: int) -> str:
+        if i < len(KNOWN_PRODUCTS):
+            return KNOWN_PRODUCTS[i]
+        n = i - len(KNOWN_PRODUCTS)
+        prefix = PRODUCT_PREFIXES[n % len(PRODUCT_PREFIXES)]
+        group = n // len(PRODUCT_PREFIXES)
+        return f"{prefix}{_token(group + 1)} {PRODUCT_NAME_SUFFIXES[group % len(PRODUCT_NAME_SUFFIXES)]}"
+
+    def feature_name(self, j: int) -> str:
+        if j < len(KNOWN_FEATURES):
+            return KNOWN_FEATURES[j]
+        n = j - len(KNOWN_FEATURES)
+        adjective = FEATURE_ADJECTIVES[n % len(FEATURE_ADJECTIVES)].replace("-", "")
+        group = n // len(FEATURE_ADJECTIVES)
+        return f"{adjective}{_token(group + 1)} {FEATURE_NAME_SUFFIXES[group % len(FEATURE_NAME_SUFFIXES)]}"
+
+    def policy(self, k: int) -> Tuple[str, str]:
+        """(policy name, policy id)"""
+        if k < len(KNOWN_POLICIES):
+            return KNOWN_POLICIES[k]
+        return POLICY_TEMPLATES[k % len(POLICY_TEMPLATES)][0], f"POL-{k + 1:03d}"
+
+    # Sampling -------------------------------------------------------------
+
+    def _pick(self, rng: random.Random, n: int) -> int:
+        """One index in [0, n): uniform, or Zipf-distributed over a fixed permutation."""
+        if self.distribution != "powerlaw":
+            return rng.randrange(n)
+        # Inverse CDF of a continuous power law on [1, n + 1)
+        u = rng.random()
+        if self.alpha == 1.0:
+            x = (n + 1) ** u
+        else:
+            x = (((n + 1) ** (1.0 - self.alpha) - 1.0) * u + 1.0) ** (1.0 / (1.0 - self.alpha))
+        rank = min(n - 1, int(x) - 1)
+        # Spread hubs over the index space instead of always using the first ids
+        return (rank * _coprime_stride(n) + 7) % n
+
+    def _pick_distinct(self, rng: random.Random, n: int, k: int, exclude: Optional[int] = None) -> List[int]:
+        k = min(k, n - (exclude is not None))
+        picked: List[int] = []
+        seen = {exclude}
+        attempts = 0
+        while len(picked) < k and attempts < k * 20:
+            attempts += 1
+            idx = self._pick(rng, n)
+            if idx not in seen:
+                seen.add(idx)
+                picked.append(idx)
+        return picked
+
+    # Documents ------------------------------------------------------------
+
+    def product_entry(self, i: int) -> Tuple[str, Dict]:
+        """Text of product document i and its ground truth (features, policies, related product)."""
+        name = self.product_name(i)
+        rng = _rng(self.seed, "product", i)
+        if name in KNOWN_PRODUCT_FEATURES:
+            features = list(KNOWN_PRODUCT_FEATURES[name])
+            policies = [self.policy(k) for k in KNOWN_PRODUCT_POLICIES[name]]
+            related = None
+        else:
+            count = rng.randint(self.min_features, self.max_features)
+            features = [self.feature_name(j) for j in self._pick_distinct(rng, self.n_features, count)]
+            policies = [self.policy(k) for k in self._pick_distinct(rng, self.n_policies, rng.choice([0, 1, 1, 2]))]
+            related = None
+            if i > 0 and rng.random() < 0.4:
+                related = self.product_name(self._pick(rng, i))
+
+        listed = features[:MAX_LISTED_FEATURES]
+        texts = [f"{name} は企業向けソリューションです。{', '.join(listed)} 機能を提供しています。"]
+        for feature in listed[:2]:
+            texts.append(f"{feature} 機能は、{name} の主要機能の一つです。")
+        if policies:
+            policy_list = ", ".join(f"{policy_name}（{policy_id}）" for policy_name, policy_id in policies)
+            texts.append(f"{policy_list} は {name} に関連するポリシーです。コンプライアンス要件を満たす必要があります。")
+        if related:
+            texts.append(f"{name} は {related} と{rng.choice(RELATION_KEYWORDS)}関係があります。相互運用性が高いです。")
+        truth = {
+            "product": name,
+            "features": listed,
+            "policies": [policy_id for _, policy_id in policies],
+            "related": related,
+        }
+        return " ".join(texts), truth
+
+    def feature_text(self, j: int) -> str:
+        name = self.feature_name(j)
+        if name in KNOWN_FEATURES:
+            products = [p for p, feats in KNOWN_PRODUCT_FEATURES.items() if name in feats]
+        else:
+            rng = _rng(self.seed, "feature", j)
+            products = [self.product_name(i) for i in self._pick_distinct(rng, self.n_products, FEATURE_DOC_PRODUCTS)]
+        return f"{name} 機能は、{', '.join(products)} など複数の製品で利用されています。"
+
+    def policy_text(self, k: int) -> str:
+        policy_name, policy_id = self.policy(k)
+        known_targets = [p for p, ks in KNOWN_PRODUCT_POLICIES.items() if k in ks]
+        rng = _rng(self.seed, "policy", k)
+        targets = list(known_targets)
+        while len(targets) < POLICY_TARGETS:
+            # Products and features are both regulated, in proportion to their counts
+            if rng.random() < self.n_products / (self.n_products + self.n_features):
+                target = self.product_name(self._pick(rng, self.n_products))
+            else:
+                target = self.feature_name(self._pick(rng, self.n_features))
+            if target not in targets:
+                targets.append(target)
+        return f"{policy_name}（{policy_id}）は {', '.join(targets)} に関連するポリシーです。規制要件を満たす必要があります。"
+
+    def relation_text(self, r: int) -> str:
+        rng = _rng(self.seed, "relation", r)
+        pair = self._pick_distinct(rng, self.n_products, 2) if rng.random() < 0.7 else []
+        if len(pair) == 2:
+            # Product-Product relationship
+            p1, p2 = pair
+            return (
+                f"{self.product_name(p1)} と {self.product_name(p2)} は"
+                f"{rng.choice(RELATION_KEYWORDS)}関係にあり、相互運用性が高いです。"
+            )
+        # Feature-Policy relationship
+        feature = self.feature_name(self._pick(rng, self.n_features))
+        policy_name, policy_id = self.policy(self._pick(rng, self.n_policies))
+        return f"{feature} 機能は {policy_name}（{policy_id}）の要件に対応しています。"
+
+    def count(self, kind: str) -> int:
+        return {
+            "product": self.n_products,
+            "feature": self.n_features,
+            "policy": self.n_policies,
+            "relation": self.n_relations,
+        }[kind]
+
+    def first_doc_id(self, kind: str) -> int:
+        offset = 1
+        for other in DOC_KINDS:
+            if other == kind:
+                return offset
+            offset += self.count(other)
+        raise ValueError(kind)
+
+    def documents(self, kind: str, start: int, end: int) -> Iterator[Dict]:
+        """Documents [start, end) of one kind, with their global ids."""
+        doc_id = self.first_doc_id(kind) + start
+        for index in range(start, end):
+            if kind == "product":
+                text, _ = self.product_entry(index)
+            elif kind == "feature":
+                text = self.feature_text(index)
+            elif kind == "policy":
+                text = self.policy_text(index)
+            else:
+                text = self.relation_text(index)
+            yield {"id": f"d{doc_id}", "text": text}
             doc_id += 1
-        # Progress update
-        if (i + 1) % 5 == 0 or (i + 1) == len(policies):
-            progress = ((i + 1) / len(policies)) * 100
-            print(f"\r  📝 ポリシードキュメント生成中... {i+1}/{len(policies)} ({progress:.1f}%)", end="", flush=True)
-    print()
-    
-    # Add some additional relationship documents to increase connectivity
-    additional_docs = max(0, int(target_nodes * 0.2))  # 20% more docs for relationships
-    print(f"  📝 追加関係ドキュメント生成中... ({additional_docs}件)", end="", flush=True)
-    for i in range(additional_docs):
-        if random.random() < 0.7:  # 70% product-product relationships
-            if len(products) >= 2:
-                p1, p2 = random.sample(products, 2)
-                relation = random.choice(["依存", "連携", "統合", "互換"])
-                text = f"{p1} と {p2} は{relation}関係にあり、相互運用性が高いです。"
-                docs.append({"id": f"d{doc_id}", "text": text})
-                doc_id += 1
-        else:  # Feature-feature or feature-policy relationships
-            if features and policies:
-                feature = random.choice(features)
-                policy_name, policy_id = random.choice(policies)
-                text = f"{feature} 機能は {policy_name}（{policy_id}）の要件に対応しています。"
-                docs.append({"id": f"d{doc_id}", "text": text})
-                doc_id += 1
-        
-        # Progress update every 10 docs
-        if (i + 1) % 10 == 0 or (i + 1) == additional_docs:
-            progress = ((i + 1) / additional_docs) * 100 if additional_docs > 0 else 100
-            print(f"\r  📝 追加関係ドキュメント生成中... {i+1}/{additional_docs} ({progress:.1f}%)", end="", flush=True)
-    print()
-    print()
-    print(f"✅ ドキュメント生成完了: 合計 {len(docs)} 件")
-    
-    return docs
+
+
+def _coprime_stride(n: int) -> int:
+    for stride in (7919, 7907, 7901, 7883):
+        if n % stride:
+            return stride % n or 1
+    return 1
+
+
+def _write_shard(task: Tuple[Dict, str, int, int, str]) -> Tuple[str, int, Dict[str, int]]:
+    """Write one shard to its own file. Returns (path, documents, feature mentions by name)."""
+    spec_args, kind, start, end, path = task
+    spec = DatasetSpec(**spec_args)
+    mentions: Counter = Counter()
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for doc in spec.documents(kind, start, end):
+            f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+            count += 1
+    if kind == "product":
+        # Feature hub sizes (HAS_FEATURE edges from product documents)
+        for i in range(start, end):
+            mentions.update(spec.product_entry(i)[1]["features"])
+        # Keep only the largest hubs to bound what is sent back to the parent
+        mentions = Counter(dict(mentions.most_common(1000)))
+    return path, count, dict(mentions)
+
+
+def generate_questions(spec: DatasetSpec, n_questions: int) -> List[Dict]:
+    """
+    Questions with expected answers taken from the generated product documents:
+    a product's features (集合), policies regulating a product (経路) and the
+    common features of two products (交差). The known products come first.
+    """
+    rng = _rng(spec.seed, "questions", 0)
+    questions: List[Dict] = []
+    candidates = list(range(len(KNOWN_PRODUCTS)))
+    tried = set()
+
+    def add(category: str, label: str, ask: str, expected: List[str]):
+        questions.append({
+            "id": f"G{len(questions) + 1}-{label}",
+            "category": category,
+            "ask": ask,
+            "expected": sorted(expected),
+            "source": "generated",
+        })
+
+    attempts = 0
+    while len(questions) < n_questions and attempts < n_questions * 50:
+        attempts += 1
+        i = candidates.pop(0) if candidates else spec._pick(rng, spec.n_products)
+        if i in tried:
+            continue
+        tried.add(i)
+        truth = spec.product_entry(i)[1]
+        product = truth["product"]
+        if truth["features"]:
+            add("simple", "集合", f"{product} が提供する全ユニークな機能は？", truth["features"])
+        if truth["policies"] and len(questions) < n_questions:
+            add("path", "経路", f"{product} を規制するポリシーは？", truth["policies"])
+        if len(questions) < n_questions:
+            # Another product sharing a feature (likely with power-law hubs, rare otherwise)
+            for _ in range(200):
+                other = spec._pick(rng, spec.n_products)
+                if other == i:
+                    continue
+                other_truth = spec.product_entry(other)[1]
+                common = set(truth["features"]) & set(other_truth["features"])
+                if common:
+                    add("intersection", "交差", f"{product}と{other_truth['product']}の共通機能は？", list(common))
+                    break
+    return questions[:n_questions]
+
+
+def generate_dataset(spec: DatasetSpec, output: str, workers: int = 1, shard_size: int = 10000) -> Dict:
+    """
+    Stream all documents of spec to output (JSONL). Shards are generated by
+    `workers` processes and appended in order as they complete.
+    """
+    start_time = time.time()
+    out_dir = os.path.dirname(os.path.abspath(output))
+    os.makedirs(out_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".shards-", dir=out_dir)
+    tasks = []
+    for kind in DOC_KINDS:
+        total = spec.count(kind)
+        for start in range(0, total, shard_size):
+            path = os.path.join(tmp_dir, f"{len(tasks):06d}-{kind}.jsonl")
+            tasks.append((spec.to_dict(), kind, start, min(total, start + shard_size), path))
+
+    docs = 0
+    hubs: Counter = Counter()
+    try:
+        with open(output, "w", encoding="utf-8") as out:
+            if workers > 1:
+                pool = Pool(workers)
+                results = pool.imap(_write_shard, tasks)
+            else:
+                pool = None
+                results = map(_write_shard, tasks)
+            try:
+                for done, (path, count, mentions) in enumerate(results, 1):
+                    with open(path, "r", encoding="utf-8") as part:
+                        shutil.copyfileobj(part, out)
+                    os.remove(path)
+                    docs += count
+                    hubs.update(mentions)
+                    progress = done / len(tasks) * 100
+                    print(f"\r📝 ドキュメント生成中... {done}/{len(tasks)} シャード, {docs} 件 ({progress:.1f}%)", end="", flush=True)
+            finally:
+                if pool:
+                    pool.close()
+                    pool.join()
+        print()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    top_hubs = hubs.most_common(5)
+    return {
+        "docs": docs,
+        "seconds": round(time.time() - start_time, 2),
+        "nodes": {"products": spec.n_products, "features": spec.n_features, "policies": spec.n_policies},
+        "top_feature_hubs": top_hubs,
+    }
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate large-scale datasets for experiments")
-    parser.add_argument("--size", type=int, required=True, choices=[300, 500, 1000],
-                       help="Target number of nodes (300, 500, or 1000)")
+    parser.add_argument("--size", type=int, required=True,
+                        help="Target number of nodes (any size >= 20)")
     parser.add_argument("--degree", type=int, default=4,
-                       help="Target average degree (default: 4)")
+                        help="Target average degree (default: 4)")
     parser.add_argument("--output", type=str, required=True,
-                       help="Output JSONL file path")
-    
+                        help="Output JSONL file path")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Random seed; the same seed gives the same file (default: 42)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes generating shards in parallel (default: 1)")
+    parser.add_argument("--shard-size", type=int, default=10000,
+                        help="Documents per shard (default: 10000)")
+    parser.add_argument("--distribution", choices=["uniform", "powerlaw"], default="uniform",
+                        help="How features, policies and related products are picked (default: uniform)")
+    parser.add_argument("--alpha", type=float, default=1.2,
+                        help="Power-law exponent for --distribution powerlaw (default: 1.2)")
+    parser.add_argument("--questions", type=str, default=None,
+                        help="Also write a questions.json with expected answers to this path")
+    parser.add_argument("--num-questions", type=int, default=30,
+                        help="Number of generated questions (default: 30)")
+
     args = parser.parse_args()
-    
-    print(f"Generating dataset with ~{args.size} nodes (avg degree: {args.degree})...")
-    docs = generate_dataset(args.size, args.degree)
-    
-    print(f"Generated {len(docs)} documents")
-    print(f"Estimated nodes: ~{args.size} (products: {int(args.size*0.6)}, features: {int(args.size*0.25)}, policies: {int(args.size*0.15)})")
-    
-    # Write to JSONL
-    with open(args.output, "w", encoding="utf-8") as f:
-        for doc in docs:
-            f.write(json.dumps(doc, ensure_ascii=False) + "\n")
-    
+    if args.size < 20:
+        parser.error("--size must be at least 20")
+
+    spec = DatasetSpec(args.size, args.degree, args.seed, args.distribution, args.alpha)
+    print(f"📊 データセット生成開始: 目標ノード数={args.size}, 平均次数={args.degree}, 分布={args.distribution}, seed={args.seed}")
+    print(f"  ノード構成: 製品={spec.n_products}, 機能={spec.n_features}, ポリシー={spec.n_policies}")
+    print(f"  ワーカー数={args.workers}, シャードサイズ={args.shard_size}")
+
+    stats = generate_dataset(spec, args.output, args.workers, args.shard_size)
+    print(f"✅ ドキュメント生成完了: 合計 {stats['docs']} 件 ({stats['seconds']}s)")
+    if args.distribution == "powerlaw" and stats["top_feature_hubs"]:
+        hubs = ", ".join(f"{name}={count}" for name, count in stats["top_feature_hubs"])
+        print(f"  機能ハブ（製品ドキュメント内の出現数）: {hubs}")
     print(f"✓ Dataset written to {args.output}")
 
+    if args.questions:
+        questions = generate_questions(spec, args.num_questions)
+        with open(args.questions, "w", encoding="utf-8") as f:
+            f.write("[\n")
+            f.write(",\n".join("  " + json.dumps(q, ensure_ascii=False) for q in questions))
+            f.write("\n]\n")
+        print(f"✓ {len(questions)} questions written to {args.questions}")
+
 
 if __name__ == "__main__":
     main()
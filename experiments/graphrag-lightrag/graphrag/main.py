@@ -1,12 +1,28 @@
 import os
-from typing import Optional
+import time
+from typing import Literal, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from pydantic import BaseModel, Field
 
+from common.graph_store import GRAPH_STORE
+from common.vector_index import VECTOR_STORE, LocalVectorIndex, open_local_index
+
 # Database clients (initialized on startup)
 neo4j_driver = None
 qdrant_client = None
+# Async Neo4j driver for /ask-async
+neo4j_async_driver = None
+
+# Connection pool size of the async Neo4j driver (/ask-async holds up to two sessions per request)
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+
+
+def graph_ready(async_io: bool = False) -> bool:
+    """Graph store usable: the in-memory store, or the (async) Neo4j driver is up."""
+    if GRAPH_STORE == "memory":
+        return True
+    return (neo4j_async_driver if async_io else neo4j_driver) is not None
 
 
 class GraphWalkParams(BaseModel):
@@ -17,6 +33,10 @@ class GraphWalkParams(BaseModel):
         le=1,
         description="Threshold for pruning low-scoring nodes",
     )
+    engine: Optional[Literal["neo4j", "snapshot"]] = Field(
+        default=None,
+        description="Walk backend: Neo4j queries or the in-process graph snapshot (default: GRAPH_ENGINE)",
+    )
 
 
 class AskRequest(BaseModel):
@@ -38,38 +58,61 @@ app = FastAPI(title="GraphRAG API", version="0.1.0")
 @app.on_event("startup")
 async def startup_event():
     """Initialize database connections and seed data on startup."""
-    global neo4j_driver, qdrant_client
+    global neo4j_driver, qdrant_client, neo4j_async_driver
     
-    # Initialize Neo4j driver
-    try:
-        from neo4j import GraphDatabase
-        neo4j_uri = os.getenv("NEO4J_URI", "bolt://neo4j:7687")
-        neo4j_user = os.getenv("NEO4J_USER", "neo4j")
-        neo4j_password = os.getenv("NEO4J_PASSWORD", "password")
-        neo4j_driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
-        # Test connection
-        with neo4j_driver.session() as session:
-            session.run("RETURN 1")
-        print(f"✓ Neo4j connection established: {neo4j_uri}")
-    except Exception as e:
-        print(f"⚠ Neo4j connection failed (will retry): {e}")
-        neo4j_driver = None
+    # Initialize Neo4j driver (not needed with the in-memory graph store)
+    if GRAPH_STORE == "memory":
+        print("✓ In-memory graph store (GRAPH_STORE=memory): Neo4j is not used")
+    else:
+        try:
+            from neo4j import GraphDatabase
+            neo4j_uri = os.getenv("NEO4J_URI", "bolt://neo4j:7687")
+            neo4j_user = os.getenv("NEO4J_USER", "neo4j")
+            neo4j_password = os.getenv("NEO4J_PASSWORD", "password")
+            neo4j_driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+            # Test connection
+            with neo4j_driver.session() as session:
+                session.run("RETURN 1")
+            print(f"✓ Neo4j connection established: {neo4j_uri}")
+        except Exception as e:
+            print(f"⚠ Neo4j connection failed (will retry): {e}")
+            neo4j_driver = None
     
-    # Initialize Qdrant client
-    try:
-        from qdrant_client import QdrantClient
-        qdrant_host = os.getenv("QDRANT_HOST", "qdrant")
-        qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
-        qdrant_client = QdrantClient(host=qdrant_host, port=qdrant_port)
-        # Test connection
-        qdrant_client.get_collections()
-        print(f"✓ Qdrant connection established: {qdrant_host}:{qdrant_port}")
-    except Exception as e:
-        print(f"⚠ Qdrant connection failed (will retry): {e}")
-        qdrant_client = None
+    # Initialize Qdrant client (or the in-process index with VECTOR_STORE=local)
+    qdrant_client = open_local_index()
+    if qdrant_client is not None:
+        print(f"✓ Local vector index (VECTOR_STORE=local): {len(qdrant_client.get_collections().collections)} collections in {qdrant_client.path or 'memory'}")
+    else:
+        try:
+            from qdrant_client import QdrantClient
+            qdrant_host = os.getenv("QDRANT_HOST", "qdrant")
+            qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
+            qdrant_client = QdrantClient(host=qdrant_host, port=qdrant_port)
+            # Test connection
+            qdrant_client.get_collections()
+            print(f"✓ Qdrant connection established: {qdrant_host}:{qdrant_port}")
+        except Exception as e:
+            print(f"⚠ Qdrant connection failed (will retry): {e}")
+            qdrant_client = None
+    
+    # Async Neo4j driver for /ask-async (connects on first use)
+    if GRAPH_STORE != "memory":
+        try:
+            from neo4j import AsyncGraphDatabase
+            from pipeline import initialize_async_clients
+            neo4j_async_driver = AsyncGraphDatabase.driver(
+                os.getenv("NEO4J_URI", "bolt://neo4j:7687"),
+                auth=(os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "password")),
+                max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+            )
+            initialize_async_clients(neo4j_async_driver)
+            print(f"✓ Async Neo4j driver created (pool size {NEO4J_MAX_POOL_SIZE})")
+        except Exception as e:
+            print(f"⚠ Async Neo4j driver creation failed: {e}")
+            neo4j_async_driver = None
     
     # Initialize pipeline and seed data if clients are ready
-    if neo4j_driver and qdrant_client:
+    if graph_ready() and qdrant_client:
         try:
             from pipeline import initialize_clients, seed_data
             initialize_clients(neo4j_driver, qdrant_client)
@@ -83,10 +126,13 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connections on shutdown."""
-    global neo4j_driver, qdrant_client
+    global neo4j_driver, qdrant_client, neo4j_async_driver
     if neo4j_driver:
         neo4j_driver.close()
         print("✓ Neo4j connection closed")
+    if neo4j_async_driver:
+        await neo4j_async_driver.close()
+        neo4j_async_driver = None
 
 
 @app.get("/healthz")
@@ -98,8 +144,11 @@ def healthcheck() -> dict:
         "version": app.version,
         "connections": {
             "neo4j": neo4j_driver is not None,
+            "neo4j_async": neo4j_async_driver is not None,
             "qdrant": qdrant_client is not None,
         },
+        "graph_store": GRAPH_STORE,
+        "vector_store": VECTOR_STORE,
     }
     return status
 
@@ -135,42 +184,105 @@ def check_connections() -> dict:
     else:
         result["qdrant"]["error"] = "Client not initialized"
     
+    # Graph store used by the pipeline (Neo4j or in-memory)
+    from pipeline import graph_store
+    result["graph_store"] = graph_store.stats() if graph_store is not None else {"backend": GRAPH_STORE, "error": "Not initialized"}
+    
+    # Vector store: Qdrant server or the local index (VECTOR_STORE=local)
+    result["vector_store"] = qdrant_client.stats() if isinstance(qdrant_client, LocalVectorIndex) else {"backend": VECTOR_STORE}
+    
     return result
 
 
+def _ask_response(payload: AskRequest, graph_walk: GraphWalkParams, result: dict, start: float, cache: dict) -> AskResponse:
+    metadata = {
+        "question": payload.question,
+        "graph_walk": graph_walk.model_dump(),
+        **result.get("metadata", {}),
+        "cache": cache
+    }
+    
+    # Include graph_nodes in metadata for evaluation
+    graph_nodes = result.get("graph_nodes", [])
+    metadata["graph_nodes"] = [n.get("name") if isinstance(n, dict) else n for n in graph_nodes]
+    # Time spent in this handler, so callers can separate it from transport
+    metadata["server_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    
+    return AskResponse(
+        answer=result.get("answer", "No answer generated"),
+        metadata=metadata
+    )
+
+
 @app.post("/ask", response_model=AskResponse)
-def ask_question(payload: AskRequest) -> AskResponse:
-    """Query GraphRAG pipeline."""
+def ask_question(payload: AskRequest, cache_control: Optional[str] = Header(None)) -> AskResponse:
+    """
+    Query GraphRAG pipeline.
+    
+    Results are cached per question, graph_walk and graph version (see /ask-cache);
+    send `Cache-Control: no-cache` to recompute or `no-store` to skip the cache.
+    """
+    start = time.perf_counter()
     graph_walk = payload.graph_walk or GraphWalkParams()
     
-    if not neo4j_driver or not qdrant_client:
+    if not graph_ready() or not qdrant_client:
         raise HTTPException(
             status_code=503,
             detail="Database connections not ready"
         )
     
     try:
-        from pipeline import query_graph
-        result = query_graph(
-            question=payload.question,
-            max_depth=graph_walk.max_depth,
-            prune_threshold=graph_walk.prune_threshold
+        from pipeline import answer_cache, query_graph, sync_graph_version
+        sync_graph_version()
+        key = answer_cache.key("sync", payload.question, graph_walk.model_dump())
+        result, status = answer_cache.fetch(key, cache_control)
+        if result is None:
+            result = query_graph(
+                question=payload.question,
+                max_depth=graph_walk.max_depth,
+                prune_threshold=graph_walk.prune_threshold,
+                engine=graph_walk.engine
+            )
+            answer_cache.store(key, result, cache_control)
+        return _ask_response(payload, graph_walk, result, start, {"status": status, "version": key[-1]})
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Query failed: {str(e)}"
         )
-        
-        metadata = {
-            "question": payload.question,
-            "graph_walk": graph_walk.model_dump(),
-            **result.get("metadata", {})
-        }
-        
-        # Include graph_nodes in metadata for evaluation
-        graph_nodes = result.get("graph_nodes", [])
-        metadata["graph_nodes"] = [n.get("name") if isinstance(n, dict) else n for n in graph_nodes]
-        
-        return AskResponse(
-            answer=result.get("answer", "No answer generated"),
-            metadata=metadata
+
+
+@app.post("/ask-async", response_model=AskResponse)
+async def ask_question_async(payload: AskRequest, cache_control: Optional[str] = Header(None)) -> AskResponse:
+    """
+    Query GraphRAG pipeline on the async Neo4j driver.
+    
+    Same request, response and result cache as /ask, but the request runs on the
+    event loop instead of holding a threadpool thread while it waits on Neo4j.
+    """
+    start = time.perf_counter()
+    graph_walk = payload.graph_walk or GraphWalkParams()
+    
+    if not graph_ready(async_io=True) or not qdrant_client:
+        raise HTTPException(
+            status_code=503,
+            detail="Database connections not ready"
         )
+    
+    try:
+        from pipeline import answer_cache, query_graph_async, sync_graph_version_async
+        await sync_graph_version_async()
+        key = answer_cache.key("async", payload.question, graph_walk.model_dump())
+        result, status = answer_cache.fetch(key, cache_control)
+        if result is None:
+            result = await query_graph_async(
+                question=payload.question,
+                max_depth=graph_walk.max_depth,
+                prune_threshold=graph_walk.prune_threshold,
+                engine=graph_walk.engine
+            )
+            answer_cache.store(key, result, cache_control)
+        return _ask_response(payload, graph_walk, result, start, {"status": status, "version": key[-1]})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -178,10 +290,17 @@ def ask_question(payload: AskRequest) -> AskResponse:
         )
 
 
+@app.get("/ask-cache")
+def get_ask_cache_stats() -> dict:
+    """Hits, misses, evictions and graph version of the /ask result cache."""
+    from pipeline import answer_cache
+    return answer_cache.stats()
+
+
 @app.post("/reset")
 def reset_data() -> dict:
     """Reset and re-seed data."""
-    if not neo4j_driver or not qdrant_client:
+    if not graph_ready() or not qdrant_client:
         raise HTTPException(status_code=503, detail="Database connections not ready")
     
     try:
@@ -194,13 +313,18 @@ def reset_data() -> dict:
 
 
 @app.post("/switch-dataset")
-def switch_dataset(file: str) -> dict:
-    """Switch dataset dynamically (similar to kg-no-rag)."""
-    if not neo4j_driver or not qdrant_client:
+def switch_dataset(file: str, incremental: bool = True) -> dict:
+    """
+    Switch dataset dynamically (similar to kg-no-rag).
+    
+    By default only the difference from the loaded dataset is applied;
+    pass incremental=false to clear and rebuild the graph.
+    """
+    if not graph_ready() or not qdrant_client:
         raise HTTPException(status_code=503, detail="Database connections not ready")
     
     # Validate file name
-    allowed_files = ["data/docs.jsonl", "data/docs-light.jsonl", "data/docs-50.jsonl", "data/docs-300.jsonl", "data/docs-500.jsonl", "data/docs-1000.jsonl"]
+    allowed_files = ["data/docs.jsonl", "data/docs-light.jsonl", "data/docs-50.jsonl", "data/docs-100.jsonl", "data/docs-200.jsonl", "data/docs-300.jsonl", "data/docs-500.jsonl", "data/docs-1000.jsonl"]
     if file not in allowed_files:
         return {
             "status": "error",
@@ -212,12 +336,14 @@ def switch_dataset(file: str) -> dict:
         from pipeline import seed_data
         
         # Re-seed data with new file
-        result = seed_data(file)
+        result = seed_data(file, incremental=incremental)
         
         return {
             "status": "success",
             "dataset": file,
             "doc_count": result.get("doc_count", 0),
+            "seed_stats": result.get("seed_stats"),
+            "extraction_cache": result.get("extraction_cache"),
             "message": f"Switched to {file} ({result.get('doc_count', 0)} documents)"
         }
     except FileNotFoundError:
@@ -227,51 +353,20 @@ def switch_dataset(file: str) -> dict:
 
 
 @app.get("/dataset")
-def get_dataset() -> dict:
-    """Get current dataset information."""
-    data_file = os.getenv("DATA_FILE", "data/docs-light.jsonl")
-    
-    # Count documents
-    doc_count = 0
-    try:
-        if os.path.exists(data_file):
-            import json
-            with open(data_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    if line.strip():
-                        doc_count += 1
-    except:
-        pass
+def get_dataset(refresh: bool = False) -> dict:
+    """
+    Get current dataset information.
     
-    # Count nodes in Neo4j graph
-    graph_stats = {}
-    if neo4j_driver:
-        try:
-            with neo4j_driver.session() as session:
-                # Count nodes by label
-                result = session.run("""
-                    MATCH (n)
-                    WITH labels(n)[0] as label, count(n) as count
-                    RETURN collect({label: label, count: count}) as stats
-                """).single()
-                if result and result["stats"]:
-                    graph_stats = {s["label"]: s["count"] for s in result["stats"]}
-                
-                # Total node count
-                total_result = session.run("MATCH (n) RETURN count(n) as total").single()
-                total_nodes = total_result["total"] if total_result else 0
-                
-                # Total edge count
-                edge_result = session.run("MATCH ()-[r]->() RETURN count(r) as total").single()
-                total_edges = edge_result["total"] if edge_result else 0
-                
-                graph_stats["_total_nodes"] = total_nodes
-                graph_stats["_total_edges"] = total_edges
-        except Exception as e:
-            graph_stats["_error"] = str(e)
+    Document count, label histogram, edge counts by type, degree distribution
+    and extraction timings are computed at seed time and served from memory;
+    pass refresh=true to recompute them from the graph store.
+    """
+    from common.extractor import get_extraction_cache
+    from pipeline import get_dataset_stats, get_graph_snapshot_stats, get_name_catalog_stats
     
     return {
-        "file": data_file,
-        "count": doc_count,
-        "graph": graph_stats
+        **get_dataset_stats(os.getenv("DATA_FILE", "data/docs-light.jsonl"), refresh=refresh),
+        "extraction_cache": get_extraction_cache().stats(),
+        "graph_snapshot": get_graph_snapshot_stats(),
+        "name_catalog": get_name_catalog_stats()
     }
@@ -3,118 +3,424 @@ GraphRAG pipeline implementation (simplified version).
 This is a placeholder implementation that mimics GraphRAG behavior.
 In production, this would use the actual Microsoft GraphRAG CLI.
 """
+import asyncio
+import hashlib
 import os
 import re
+import time
+import uuid
 from typing import List, Dict, Optional, Set
+import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.models import VectorParams, Distance, PointStruct
 from neo4j import GraphDatabase
 
+from common.answer_cache import AnswerCache
+from common.extractor import extract_entities, get_extraction_cache
+from common.graph_snapshot import GraphSnapshot
+from common.graph_store import GraphStore, create_graph_store, graph_summary
+from common.name_index import NODE_LABELS, NameCatalog
+
 # Global clients (initialized from main.py)
 neo4j_driver = None
 qdrant_client = None
 embedding_model = None
 
+# Async Neo4j driver for query_graph_async (initialized from main.py)
+neo4j_async_driver = None
+
+# Graph store on the drivers above, or in-memory (GRAPH_STORE=memory)
+graph_store: Optional[GraphStore] = None
+
+
+# Rows per UNWIND transaction when seeding the graph store
+SEED_BATCH_SIZE = int(os.getenv("SEED_BATCH_SIZE", "1000"))
+
+# Text keywords that mark a Product-Product relationship (dependency/compatibility)
+RELATION_KEYWORDS = ["依存", "連携", "統合", "互換", "利用"]
+
+# Versioned /ask result cache: max entries (0 disables); seeding and feedback bump the version
+ASK_CACHE_SIZE = int(os.getenv("ASK_CACHE_SIZE", "1024"))
+answer_cache = AnswerCache(ASK_CACHE_SIZE)
+
+# Seconds between two reads of the graph version behind /ask (0: every request). A version
+# written by the LightRAG service's seed drops the cached answers (see sync_graph_version)
+GRAPH_VERSION_CHECK_SECONDS = float(os.getenv("GRAPH_VERSION_CHECK_SECONDS", "2"))
+_graph_version_checked = 0.0
+
+# Dataset currently loaded into the graph store (document keys, graph rows and the
+# graph version written with them), used by seed_data(incremental=True) to apply only the delta
+_loaded_state: Optional[Dict] = None
+
+# Graph walk backend: "neo4j" (one graph store query per level, whatever GRAPH_STORE is)
+# or "snapshot" (in-process CSR copy)
+GRAPH_ENGINES = ("neo4j", "snapshot")
+GRAPH_ENGINE = os.getenv("GRAPH_ENGINE", "neo4j")
+
+# In-process graph snapshot: reloaded after every seed with GRAPH_ENGINE=snapshot,
+# otherwise loaded on first use (a snapshot request)
+_graph_snapshot: Optional[GraphSnapshot] = None
+
+# Name -> label catalog with an n-gram substring index, reloaded after every seed
+_name_catalog: Optional[NameCatalog] = None
+
+# Statistics served by /dataset, computed after every seed (see get_dataset_stats)
+_dataset_stats: Optional[Dict] = None
+
+
+def initialize_clients(neo4j_drv, qdrant_clt):
+    """Initialize pipeline with database clients (neo4j_drv is None with GRAPH_STORE=memory)."""
+    global neo4j_driver, qdrant_client, graph_store
+    neo4j_driver = neo4j_drv
+    qdrant_client = qdrant_clt
+    graph_store = create_graph_store(neo4j_driver, neo4j_async_driver, graph_store)
+
+
+def initialize_async_clients(neo4j_drv):
+    """Initialize the async Neo4j driver used by query_graph_async."""
+    global neo4j_async_driver, graph_store
+    neo4j_async_driver = neo4j_drv
+    graph_store = create_graph_store(neo4j_driver, neo4j_async_driver, graph_store)
+
+
+def get_graph_snapshot() -> GraphSnapshot:
+    """Return the in-process graph snapshot, loading it from the graph store if needed."""
+    global _graph_snapshot
+    if _graph_snapshot is None:
+        if graph_store is None:
+            raise RuntimeError("Graph store not initialized")
+        _graph_snapshot = GraphSnapshot.load(graph_store)
+    return _graph_snapshot
+
+
+def get_graph_snapshot_stats() -> Optional[Dict]:
+    """Stats of the loaded snapshot, or None if it is not loaded."""
+    return _graph_snapshot.stats() if _graph_snapshot is not None else None
+
+
+def refresh_graph_snapshot() -> Optional[GraphSnapshot]:
+    """Reload the snapshot after the graph changed; on failure it is reloaded lazily."""
+    global _graph_snapshot
+    _graph_snapshot = None
+    try:
+        snapshot = get_graph_snapshot()
+    except Exception as e:
+        print(f"⚠ Graph snapshot reload failed (will retry on first use): {e}")
+        return None
+    print(f"✓ Graph snapshot loaded: {snapshot.node_count} nodes, {snapshot.edge_count} edges")
+    return snapshot
+
+
+def get_name_catalog() -> NameCatalog:
+    """Return the name -> label catalog, loading it from the graph store if needed."""
+    global _name_catalog
+    if _name_catalog is None:
+        if graph_store is None:
+            raise RuntimeError("Graph store not initialized")
+        _name_catalog = NameCatalog.from_store(graph_store)
+    return _name_catalog
+
+
+def get_name_catalog_stats() -> Optional[Dict]:
+    """Stats of the loaded catalog, or None if it is not loaded."""
+    return _name_catalog.stats() if _name_catalog is not None else None
+
+
+def refresh_name_catalog() -> Optional[NameCatalog]:
+    """Reload the catalog after the graph changed; on failure it is reloaded lazily."""
+    global _name_catalog
+    _name_catalog = None
+    try:
+        catalog = get_name_catalog()
+    except Exception as e:
+        print(f"⚠ Name catalog reload failed (will retry on first use): {e}")
+        return None
+    print(f"✓ Name catalog loaded: {len(catalog)} names")
+    return catalog
+
+
+def _graph_version_due() -> bool:
+    global _graph_version_checked
+    now = time.monotonic()
+    if graph_store is None or now - _graph_version_checked < GRAPH_VERSION_CHECK_SECONDS:
+        return False
+    _graph_version_checked = now
+    return True
+
+
+def _on_graph_version(version: Optional[str]) -> bool:
+    """Drop the cached answers, snapshot and catalog if the graph was reseeded elsewhere."""
+    global _graph_snapshot, _name_catalog
+    if not answer_cache.sync(version):
+        return False
+    print("⚠ Graph version changed outside this service, cached answers dropped")
+    # Reloaded on first use
+    _graph_snapshot = None
+    _name_catalog = None
+    return True
+
 
-def extract_entities(text: str) -> Dict[str, List[str]]:
+def sync_graph_version() -> bool:
     """
-    Extract entities (products, features, policies) from text using pattern matching.
-    This is a simplified NER implementation for demonstration purposes.
+    Compare the version stored with the graph (at most every
+    GRAPH_VERSION_CHECK_SECONDS) with the one of the cached answers. The
+    LightRAG service seeds the same Neo4j graph without telling this one.
     """
-    entities = {
-        "products": [],
-        "features": [],
-        "policies": []
+    if not _graph_version_due():
+        return False
+    return _on_graph_version(graph_store.graph_version())
+
+
+async def sync_graph_version_async() -> bool:
+    """sync_graph_version on the async driver."""
+    if not _graph_version_due():
+        return False
+    return _on_graph_version(await graph_store.graph_version_async())
+
+
+def _count_docs(data_file: str) -> int:
+    """Number of non-empty lines in a JSONL file (0 if it does not exist)."""
+    if not os.path.exists(data_file):
+        return 0
+    with open(data_file, "r", encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def refresh_dataset_stats(
+    data_file: str,
+    doc_count: Optional[int] = None,
+    extraction: Optional[Dict] = None
+) -> Dict:
+    """
+    Recompute the /dataset statistics from the graph store and cache them.
+    
+    The graph part counts the store's (label, name) nodes, not the snapshot
+    (which merges same-named nodes), so it matches `graph_store.stats()`.
+    seed_data passes the document count and extraction timings it measured;
+    otherwise the file is counted once and the last extraction timings for the
+    same file are kept.
+    """
+    global _dataset_stats
+    previous = _dataset_stats if _dataset_stats and _dataset_stats["file"] == data_file else None
+    if doc_count is None:
+        doc_count = _count_docs(data_file)
+    if extraction is None and previous:
+        extraction = previous["extraction"]
+    try:
+        if graph_store is None:
+            raise RuntimeError("Graph store not initialized")
+        graph = graph_summary(graph_store)
+    except Exception as e:
+        graph = {"_error": str(e)}
+    _dataset_stats = {
+        "file": data_file,
+        "count": doc_count,
+        "graph": graph,
+        "extraction": extraction,
+        "computed_at": time.time(),
     }
+    if "_error" in graph:
+        print(f"⚠ Dataset stats computed without graph (will retry on next request): {graph['_error']}")
+    else:
+        print(f"✓ Dataset stats computed: {doc_count} documents, {graph['nodes']} nodes, {graph['edges']} edges")
+    return _dataset_stats
+
+
+def get_dataset_stats(default_file: str, refresh: bool = False) -> Dict:
+    """
+    Dataset statistics served from memory (no file read or graph query).
     
-    # Known products and features that should be prioritized (extract first)
-    known_products = ["Acme Search", "Globex Graph"]
-    known_features = ["Semantic Index", "Policy Audit", "Realtime Query"]
-    
-    for known_product in known_products:
-        if known_product in text and known_product not in entities["products"]:
-            entities["products"].append(known_product)
-    
-    for known_feature in known_features:
-        if known_feature in text and known_feature not in entities["features"]:
-            entities["features"].append(known_feature)
-    
-    # Product patterns: "Name Platform", "Name Pro", "Name Suite", "Name Manager", etc.
-    # Also includes known products like "Acme Search", "Globex Graph"
-    # Exclude known features from product patterns
-    product_patterns = [
-        r'\b([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*)*)\s+(?:Platform|Pro|Suite|Manager|Engine|System|Tool|Service|Core|Hub|Framework|Studio|Builder)\b',
-        r'\b([A-Z][a-zA-Z]+\s+(?:Search|Graph|Vault|Guard|Bridge|Optimizer|Collector|Analyzer|Scanner|Delivery|Campaign|Bot))\b',  # Removed Index from this pattern
-        r'\b(Acme\s+Search|Globex\s+Graph|CloudBridge\s+Platform|DataVault\s+Pro|NetworkGuard\s+Suite)\b',
-        # Also match standalone product names that appear in "Product Name は" pattern
-        r'\b([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*)\s+は'
-    ]
-    
-    for pattern in product_patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            product_name = match if isinstance(match, str) else match[0] if isinstance(match, tuple) else str(match)
-            product_name = product_name.strip()
-            # Filter out common Japanese words, policy names, and known features
-            if (len(product_name) > 3 and 
-                product_name not in ["POL-001", "POL-002", "Personal", "Data", "Protection", "Model", "Governance"] and
-                product_name not in entities["products"] and
-                product_name not in entities["features"]):  # Don't add if already identified as a feature
-                entities["products"].append(product_name)
-    
-    # Feature patterns: "Feature Name" (typically capitalized words)
-    feature_patterns = [
-        r'\b(Semantic\s+Index|Policy\s+Audit|Realtime\s+Query)\b',  # Known features (already added above, but keep for consistency)
-        r'\b([A-Z][a-zA-Z]+\s+(?:Index|Query|Audit|Engine|Manager|Optimizer|Analyzer|Scanner|Framework|Builder))\b',
-        # Features that appear after "機能" or "を提供" or "を搭載"
-        r'(?:機能|を提供|を搭載)[する]?\s*([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*)'
-    ]
-    
-    for pattern in feature_patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            feature_name = match if isinstance(match, str) else match[0] if isinstance(match, tuple) else str(match)
-            feature_name = feature_name.strip()
-            if (len(feature_name) > 3 and 
-                feature_name not in entities["features"] and
-                feature_name not in entities["products"]):  # Avoid duplicates
-                entities["features"].append(feature_name)
-    
-    # Policy patterns: POL-XXX or "Policy Name (POL-XXX)"
-    policy_patterns = [
-        r'\bPOL-(\d+)\b',
-        r'\(POL-(\d+)\)',
-        r'\b(Personal\s+Data\s+Protection|AI\s+Model\s+Governance)\b'
-    ]
-    
-    for pattern in policy_patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            if isinstance(match, tuple):
-                match = match[0] if match else ""
-            policy_id = f"POL-{match}" if match.isdigit() else match
-            policy_id = policy_id.strip()
-            if policy_id and policy_id not in entities["policies"]:
-                entities["policies"].append(policy_id)
-    
-    return entities
+    Computed at the end of every seed. They are recomputed on first use when
+    this process has not seeded, after a failed graph read, or with
+    `refresh=True` (reads the graph store again and recounts the file).
+    """
+    stats = _dataset_stats
+    data_file = stats["file"] if stats else default_file
+    if refresh or stats is None:
+        stats = refresh_dataset_stats(data_file)
+    elif "_error" in stats["graph"]:
+        # Retry the graph part only; the document count is already known
+        stats = refresh_dataset_stats(data_file, stats["count"])
+    return stats
 
 
-def initialize_clients(neo4j_drv, qdrant_clt):
-    """Initialize pipeline with database clients."""
-    global neo4j_driver, qdrant_client
-    neo4j_driver = neo4j_drv
-    qdrant_client = qdrant_clt
+def build_graph_rows(docs: List[Dict], doc_entities: List[Dict[str, List[str]]]) -> Dict[str, List[Dict]]:
+    """
+    Build deduplicated node and edge rows for bulk seeding.
+    
+    Relationship rules are applied per document; each edge appears once no
+    matter how many documents mention it. `doc_ref` is the last document that
+    linked the product to a feature.
+    """
+    product_doc_ref = {}
+    features = set()
+    policies = set()
+    has_feature = {}
+    regulates = {}
+    relates_to = {}
+    
+    for doc, entities in zip(docs, doc_entities):
+        doc_id = doc.get("id", "")
+        text = doc.get("text", "")
+        doc_products = entities["products"]
+        doc_features = entities["features"]
+        doc_policies = entities["policies"]
+        
+        for product in doc_products:
+            product_doc_ref.setdefault(product, None)
+        features.update(doc_features)
+        policies.update(doc_policies)
+        
+        # Product-Feature relationships
+        for product in doc_products:
+            for feature in doc_features:
+                has_feature[(product, feature)] = None
+                product_doc_ref[product] = doc_id
+        
+        # Feature-Policy relationships (any feature that mentions a policy)
+        # Also create if text mentions "Policy" near a feature
+        if "Policy" in text or any("Policy" in f or "POL" in p for f in doc_features for p in doc_policies):
+            for feature in doc_features:
+                for policy in doc_policies:
+                    regulates[(feature, policy)] = None
+        
+        # Product-Product relationships (if text mentions dependency/compatibility)
+        if any(keyword in text for keyword in RELATION_KEYWORDS):
+            for i in range(len(doc_products)):
+                for j in range(i + 1, len(doc_products)):
+                    relates_to[(doc_products[i], doc_products[j])] = None
+    
+    return {
+        "products": [{"name": name, "doc_ref": ref} for name, ref in product_doc_ref.items()],
+        "features": [{"name": name} for name in sorted(features)],
+        "policies": [{"name": name} for name in sorted(policies)],
+        "has_feature": [{"product": p, "feature": f} for p, f in has_feature],
+        "regulates": [{"feature": f, "policy": p} for f, p in regulates],
+        "relates_to": [{"p1": p1, "p2": p2} for p1, p2 in relates_to],
+    }
+
+
+# Node label of each node row list produced by build_graph_rows
+_NODE_ROWS = [("products", "Product"), ("features", "Feature"), ("policies", "Policy")]
+
+# Relationship type, (source label, column) and (target label, column) of each edge row list
+_EDGE_ROWS = [
+    ("has_feature", "HAS_FEATURE", ("Product", "product"), ("Feature", "feature")),
+    ("regulates", "REGULATES", ("Feature", "feature"), ("Policy", "policy")),
+    ("relates_to", "RELATES_TO", ("Product", "p1"), ("Product", "p2")),
+]
 
 
-def seed_data(data_file: str = "data/docs-light.jsonl", collection_name: str = "graphrag_docs"):
+# Identity columns of each row list (the remaining columns are properties)
+_ROW_KEYS = {
+    "products": ("name",),
+    "features": ("name",),
+    "policies": ("name",),
+    "has_feature": ("product", "feature"),
+    "regulates": ("feature", "policy"),
+    "relates_to": ("p1", "p2"),
+}
+
+def _doc_key(doc: Dict) -> str:
+    """Identity of a document: its id plus a hash of its text."""
+    digest = hashlib.blake2b(doc.get("text", "").encode("utf-8"), digest_size=8).hexdigest()
+    return f"{doc.get('id', '')}:{digest}"
+
+
+def diff_graph_rows(old: Dict[str, List[Dict]], new: Dict[str, List[Dict]]) -> Dict[str, Dict[str, List[Dict]]]:
     """
-    Seed data into Qdrant and Neo4j.
+    Compare two build_graph_rows results.
+    
+    Returns `upsert` (rows that are new or whose properties changed) and
+    `delete` (rows that are gone), both keyed like build_graph_rows.
+    """
+    upsert = {}
+    delete = {}
+    for key, columns in _ROW_KEYS.items():
+        old_rows = {tuple(row[c] for c in columns): row for row in old[key]}
+        new_rows = {tuple(row[c] for c in columns): row for row in new[key]}
+        upsert[key] = [row for k, row in new_rows.items() if old_rows.get(k) != row]
+        delete[key] = [row for k, row in old_rows.items() if k not in new_rows]
+    return {"upsert": upsert, "delete": delete}
+
+
+def _edge_rows(rows: List[Dict], source: str, target: str) -> List[Dict]:
+    """Edge rows for the graph store from the rows of one build_graph_rows edge list."""
+    return [{"source": row[source], "target": row[target]} for row in rows]
+
+
+def delete_graph_rows(store: GraphStore, graph_rows: Dict[str, List[Dict]], batch_size: Optional[int] = None) -> int:
+    """Delete the given edges, then nodes (with their edges); returns the number of transactions."""
+    batch_size = max(1, batch_size or SEED_BATCH_SIZE)
+    transactions = 0
+    for key, rel_type, (source_label, source), (target_label, target) in _EDGE_ROWS:
+        rows = _edge_rows(graph_rows[key], source, target)
+        transactions += store.delete_edges(rel_type, source_label, target_label, rows, batch_size)
+    for key, label in _NODE_ROWS:
+        transactions += store.delete_nodes(label, graph_rows[key], batch_size)
+    return transactions
+
+
+def write_graph_rows(store: GraphStore, graph_rows: Dict[str, List[Dict]], batch_size: Optional[int] = None) -> Dict:
+    """Write rows from build_graph_rows to the graph store (nodes first) and return throughput stats."""
+    import time
+    
+    batch_size = max(1, batch_size or SEED_BATCH_SIZE)
+    start = time.time()
+    transactions = 0
+    for key, label in _NODE_ROWS:
+        rows = [{**row, "created_from": "auto_extract"} for row in graph_rows[key]]
+        transactions += store.merge_nodes(label, rows, batch_size)
+    for key, rel_type, (source_label, source), (target_label, target) in _EDGE_ROWS:
+        rows = _edge_rows(graph_rows[key], source, target)
+        transactions += store.merge_edges(rel_type, source_label, target_label, rows, batch_size)
+    elapsed = time.time() - start
+    
+    rows = sum(len(graph_rows[key]) for key in _ROW_KEYS)
+    return {
+        "rows": rows,
+        "counts": {key: len(graph_rows[key]) for key in _ROW_KEYS},
+        "batch_size": batch_size,
+        "transactions": transactions,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def _extraction_timings(seconds: float, doc_count: int, extraction_cache) -> Dict:
+    """Entity extraction timings of a seed, as reported by /dataset."""
+    return {
+        "seconds": round(seconds, 4),
+        "docs_per_sec": round(doc_count / seconds, 1) if seconds > 0 else None,
+        "ms_per_doc": round(seconds * 1000 / doc_count, 4) if doc_count else None,
+        "cache": extraction_cache.stats(),
+    }
+
+
+def _seed_data(
+    data_file: str = "data/docs-light.jsonl",
+    collection_name: str = "graphrag_docs",
+    batch_size: Optional[int] = None,
+    incremental: bool = False
+):
+    """
+    Seed data into Qdrant and the graph store (Neo4j or in-memory).
     This is a simplified version - in production, GraphRAG CLI would handle this.
+    
+    Nodes and edges are built client-side and written with chunked UNWIND
+    transactions of `batch_size` rows (default: SEED_BATCH_SIZE).
+    
+    With `incremental=True` and a dataset already loaded, only the nodes and
+    edges that differ from the loaded dataset are written or deleted instead
+    of clearing the graph. The graph version stored with the graph must still
+    be the one written by that load: otherwise the graph was reseeded from
+    elsewhere (the LightRAG service seeds the same Neo4j graph) and the seed is
+    a full one.
     """
     import json
+    global _loaded_state, _graph_snapshot
     
-    if not qdrant_client or not neo4j_driver:
+    if not qdrant_client or graph_store is None:
         raise RuntimeError("Clients not initialized")
     
     # Read data
@@ -142,114 +448,213 @@ def seed_data(data_file: str = "data/docs-light.jsonl", collection_name: str = "
         )
         print(f"✓ Created Qdrant collection: {collection_name}")
     
-    # Seed Neo4j graph (simplified - extract entities and relationships)
-    with neo4j_driver.session() as session:
+    # Extract entities and relationships from text
+    # Collect all unique entities across all documents
+    all_products = set()
+    all_features = set()
+    all_policies = set()
+    doc_entities = []
+    extraction_cache = get_extraction_cache()
+    extract_start = time.perf_counter()
+    
+    for doc in docs:
+        # Extract entities using improved pattern matching (cached by content hash)
+        entities = extraction_cache.extract(doc.get("text", ""))
+        doc_entities.append(entities)
+        all_products.update(entities["products"])
+        all_features.update(entities["features"])
+        all_policies.update(entities["policies"])
+    extract_seconds = time.perf_counter() - extract_start
+    extraction_cache.save()
+    
+    print(f"✓ Extracted entities: {len(all_products)} products, {len(all_features)} features, {len(all_policies)} policies")
+    
+    graph_rows = build_graph_rows(docs, doc_entities)
+    
+    doc_keys = {_doc_key(doc) for doc in docs}
+    previous = _loaded_state if incremental else None
+    _loaded_state = None  # Unknown until the write below succeeds
+    if previous is not None and graph_store.graph_version() != previous["graph_version"]:
+        print("⚠ Graph version changed since the last seed, seeding in full")
+        previous = None
+    
+    # Seed the graph store (simplified - extract entities and relationships)
+    # Unique name per label: backs MERGE and every label-qualified lookup with an index
+    graph_store.ensure_constraints(NODE_LABELS)
+    if previous is None:
         # Clear existing data
-        session.run("MATCH (n) DETACH DELETE n")
-        
-        # Extract entities and relationships from text
-        # Collect all unique entities across all documents
-        all_products = set()
-        all_features = set()
-        all_policies = set()
-        
-        for doc in docs:
-            doc_id = doc.get("id", "")
-            text = doc.get("text", "")
-            
-            # Extract entities using improved pattern matching
-            entities = extract_entities(text)
-            all_products.update(entities["products"])
-            all_features.update(entities["features"])
-            all_policies.update(entities["policies"])
-        
-        print(f"✓ Extracted entities: {len(all_products)} products, {len(all_features)} features, {len(all_policies)} policies")
-        
-        # Create all nodes first
-        for product in all_products:
-            with neo4j_driver.session() as session:
-                session.run(
-                    "MERGE (p:Product {name: $name}) SET p.created_from = 'auto_extract'",
-                    name=product
-                )
-        
-        for feature in all_features:
-            with neo4j_driver.session() as session:
-                session.run(
-                    "MERGE (f:Feature {name: $name}) SET f.created_from = 'auto_extract'",
-                    name=feature
-                )
-        
-        for policy in all_policies:
-            with neo4j_driver.session() as session:
-                session.run(
-                    "MERGE (pol:Policy {name: $name}) SET pol.created_from = 'auto_extract'",
-                    name=policy
-                )
-        
-        # Extract relationships from documents
-        for doc in docs:
-            doc_id = doc.get("id", "")
-            text = doc.get("text", "")
-            
-            # Extract entities for this document
-            entities = extract_entities(text)
-            products = entities["products"]
-            features = entities["features"]
-            policies = entities["policies"]
-            
-            # Create relationships (nodes already created above)
-            with neo4j_driver.session() as session:
-                # Product-Feature relationships
-                for product in products:
-                    for feature in features:
-                        session.run(
-                            "MATCH (p:Product {name: $product}), (f:Feature {name: $feature}) "
-                            "MERGE (p)-[:HAS_FEATURE]->(f) "
-                            "SET p.doc_ref = $doc_id",
-                            product=product, feature=feature, doc_id=doc_id
-                        )
-                
-                # Feature-Policy relationships (any feature that mentions a policy)
-                # Also create if text mentions "Policy" near a feature
-                if "Policy" in text or any("Policy" in f or "POL" in p for f in features for p in policies):
-                    for feature in features:
-                        for policy in policies:
-                            session.run(
-                                "MATCH (f:Feature {name: $feature}), (pol:Policy {name: $policy}) "
-                                "MERGE (f)-[:REGULATES]->(pol)",
-                                feature=feature, policy=policy
-                            )
-                
-                # Product-Product relationships (if text mentions dependency/compatibility)
-                if any(keyword in text for keyword in ["依存", "連携", "統合", "互換", "利用"]):
-                    product_list = list(products)
-                    for i in range(len(product_list)):
-                        for j in range(i+1, len(product_list)):
-                            session.run(
-                                "MATCH (p1:Product {name: $p1}), (p2:Product {name: $p2}) "
-                                "MERGE (p1)-[:RELATES_TO]->(p2)",
-                                p1=product_list[i], p2=product_list[j]
-                            )
-        
-        print(f"✓ Seeded {len(docs)} documents to Neo4j")
+        graph_store.clear()
+        seed_stats = write_graph_rows(graph_store, graph_rows, batch_size=batch_size)
+        seed_stats["mode"] = "full"
+    else:
+        delta = diff_graph_rows(previous["graph_rows"], graph_rows)
+        delete_transactions = delete_graph_rows(graph_store, delta["delete"], batch_size=batch_size)
+        seed_stats = write_graph_rows(graph_store, delta["upsert"], batch_size=batch_size)
+        seed_stats["mode"] = "incremental"
+        seed_stats["transactions"] += delete_transactions
+        seed_stats["delta"] = {
+            "docs_added": len(doc_keys - previous["doc_keys"]),
+            "docs_removed": len(previous["doc_keys"] - doc_keys),
+            "rows_upserted": seed_stats["rows"],
+            "rows_deleted": sum(len(rows) for rows in delta["delete"].values()),
+            "rows_unchanged": sum(len(rows) for rows in graph_rows.values()) - seed_stats["rows"],
+            "deleted": {key: len(rows) for key, rows in delta["delete"].items()},
+        }
+    seed_stats["graph_store"] = graph_store.backend
+    graph_version = uuid.uuid4().hex
+    graph_store.set_graph_version(graph_version)
+    
+    _loaded_state = {"data_file": data_file, "doc_keys": doc_keys, "graph_rows": graph_rows, "graph_version": graph_version}
+    if GRAPH_ENGINE == "snapshot":
+        refresh_graph_snapshot()
+    else:
+        # The neo4j engine never reads it: loaded on first use
+        _graph_snapshot = None
+    refresh_name_catalog()
+    refresh_dataset_stats(
+        data_file,
+        len(docs),
+        _extraction_timings(extract_seconds, len(docs), extraction_cache),
+    )
     
-    return {"status": "success", "doc_count": len(docs)}
+    print(
+        f"✓ Seeded {len(docs)} documents to the {graph_store.backend} graph store ({seed_stats['mode']}: "
+        f"{seed_stats['rows']} rows in {seed_stats['seconds']}s, {seed_stats['rows_per_sec']} rows/sec)"
+    )
+    
+    return {
+        "status": "success",
+        "doc_count": len(docs),
+        "seed_stats": seed_stats,
+        "extraction_cache": extraction_cache.stats()
+    }
 
 
-def query_graph(
-    question: str,
-    max_depth: int = 3,
-    prune_threshold: float = 0.2,
-    collection_name: str = "graphrag_docs"
+def seed_data(
+    data_file: str = "data/docs-light.jsonl",
+    collection_name: str = "graphrag_docs",
+    batch_size: Optional[int] = None,
+    incremental: bool = False
+):
+    """
+    Seed data (see _seed_data) and move cached /ask results to a new graph version.
+    
+    The version is bumped even if seeding fails halfway, since part of the
+    graph may already have changed.
+    """
+    try:
+        return _seed_data(data_file, collection_name, batch_size, incremental)
+    finally:
+        answer_cache.bump("seed", _loaded_state["graph_version"] if _loaded_state else None)
+
+
+def _neighbors(names: List[str], **options) -> Optional[List[Dict]]:
+    """
+    graph_store.neighbors of names, grouped by label through the name catalog.
+    Returns None (nothing is read) when none of the names is in the graph.
+    """
+    groups = get_name_catalog().group_by_label(names)
+    if not groups:
+        return None
+    return graph_store.neighbors(groups, **options)
+
+
+async def _neighbors_async(names: List[str], **options) -> Optional[List[Dict]]:
+    groups = get_name_catalog().group_by_label(names)
+    if not groups:
+        return None
+    return await graph_store.neighbors_async(groups, **options)
+
+
+# Features of several products at once (graph_store.neighbors options)
+_PRODUCT_FEATURES = {"rel_type": "HAS_FEATURE", "outgoing": True}
+
+
+def _missing_products(products: List[str], cache: Dict[str, List[str]]) -> List[str]:
+    """Products not in cache yet; they are added with no features until the query result is stored."""
+    missing = [p for p in dict.fromkeys(products) if p not in cache]
+    for product in missing:
+        cache[product] = []
+    return missing
+
+
+def _store_product_features(records, cache: Dict[str, List[str]]) -> None:
+    for record in records:
+        cache[record["source"]] = [n["name"] for n in record["neighbors"]]
+
+
+def _fetch_product_features(products: List[str], cache: Dict[str, List[str]]) -> int:
+    """
+    Fill cache with the HAS_FEATURE targets of products not already in it.
+    Returns the number of queries run (0 or 1).
+    """
+    missing = _missing_products(products, cache)
+    if not missing:
+        return 0
+    _store_product_features(graph_store.neighbors({"Product": missing}, **_PRODUCT_FEATURES), cache)
+    return 1
+
+
+def _walk_snapshot(
+    snapshot: GraphSnapshot,
+    seed_nodes: List[str],
+    max_depth: int,
+    prune_threshold: float
 ) -> Dict:
     """
-    Query GraphRAG pipeline with graph walk using max_depth and prune_threshold.
+    Graph walk of query_graph run against the in-process snapshot.
+    
+    Same rules as the query walk: score = parent score * (w_struct or 1.0),
+    neighbors below prune_threshold are dropped, and each node is visited once.
+    Each level is scored with array operations over the whole frontier.
     """
-    if not qdrant_client or not neo4j_driver:
-        raise RuntimeError("Clients not initialized")
+    visited = np.zeros(snapshot.node_count, dtype=bool)
+    seed_ids = [snapshot.index[n] for n in seed_nodes if n in snapshot.index]
+    visited[seed_ids] = True
+    scores = np.zeros(snapshot.node_count, dtype=np.float64)
+    scores[seed_ids] = 1.0
+    # Edge weights as the query walk reads them (`w_struct or 1.0`)
+    edge_weight = np.where(snapshot.w_struct == 0, 1.0, snapshot.w_struct)
     
-    # Step 1: Find seed nodes from question using improved entity extraction
+    frontier = np.asarray(seed_ids, dtype=np.int64)
+    explored = []
+    depth = 0
+    for depth in range(max_depth):
+        # All edges leaving the frontier, in frontier order
+        sources, neighbors, edges = snapshot.expand(frontier)
+        open_mask = ~visited[neighbors]
+        sources, neighbors, edges = sources[open_mask], neighbors[open_mask], edges[open_mask]
+        neighbor_scores = scores[frontier[sources]] * edge_weight[edges]
+        passing = neighbor_scores >= prune_threshold
+        neighbors, neighbor_scores = neighbors[passing], neighbor_scores[passing]
+        # A node reached from several parents (or parallel edges) is claimed by
+        # the first passing edge, as in the sequential walk
+        _, first = np.unique(neighbors, return_index=True)
+        first.sort()
+        frontier = neighbors[first]
+        visited[frontier] = True
+        scores[frontier] = neighbor_scores[first]
+        explored.extend(frontier.tolist())
+        if not len(frontier):
+            break
+    
+    node_scores = {name: 1.0 for name in seed_nodes}
+    node_scores.update({snapshot.names[i]: float(scores[i]) for i in explored})
+    return {"node_scores": node_scores, "depth": depth, "frontier": frontier.tolist()}
+
+
+# Words never used for partial name matches when looking for seed nodes
+_STOPWORDS = ["the", "and", "or", "not", "is", "are", "was", "were", "will", "can", "does", "do", "did", "all", "what", "which", "who", "が", "を", "に", "の"]
+
+# Product aliases used in questions (e.g., "Acme" -> "Acme Search")
+_PRODUCT_ALIASES = {"Acme": "Acme Search", "Globex": "Globex Graph"}
+
+
+def _question_seeds(question: str) -> List[str]:
+    """
+    Seed nodes named in the question: extracted entities, product aliases and,
+    if fewer than two were found, partial matches from the name catalog.
+    """
     # First, use extract_entities to get products, features, and policies
     question_entities = extract_entities(question)
     seed_nodes = []
@@ -260,8 +665,7 @@ def query_graph(
     extracted_policies = question_entities.get("policies", [])
     
     # Also check for product aliases (e.g., "Acme" -> "Acme Search")
-    product_aliases = {"Acme": "Acme Search", "Globex": "Globex Graph"}
-    for alias, canonical in product_aliases.items():
+    for alias, canonical in _PRODUCT_ALIASES.items():
         if alias in question and canonical not in extracted_products:
             extracted_products.append(canonical)
     
@@ -270,264 +674,428 @@ def query_graph(
     seed_nodes.extend(extracted_features)
     seed_nodes.extend(extracted_policies)
     
-    # Also search for partial matches in Neo4j if we don't have enough entities
+    # Also search for partial matches if we don't have enough entities
+    # (n-gram name index instead of a `CONTAINS` scan over all Neo4j nodes)
     if len(seed_nodes) < 2:
-        import re
         question_words = re.findall(r'\b([A-Z][a-z]+)\b', question)
-        with neo4j_driver.session() as session:
-            for word in question_words:
-                if word.lower() not in ["the", "and", "or", "not", "is", "are", "was", "were", "will", "can", "does", "do", "did", "all", "what", "which", "who", "が", "を", "に", "の"]:
-                    result = session.run("""
-                        MATCH (n)
-                        WHERE n.name CONTAINS $keyword
-                        RETURN n.name as name
-                        LIMIT 3
-                    """, keyword=word)
-                    for record in result:
-                        node_name = record["name"]
-                        if node_name not in seed_nodes:
-                            seed_nodes.append(node_name)
-    
-    # Fallback: For global questions or if no entities found, get top nodes by centrality
-    if not seed_nodes:
-        with neo4j_driver.session() as session:
-            # Check if this is a global question
-            is_global = any(keyword in question.lower() for keyword in ["すべて", "全て", "all", "すべての", "全ての", "要約", "関係"])
-            
-            if is_global:
-                # Get top nodes by degree for global questions
-                result = session.run("""
-                    MATCH (n)
-                    WHERE n.degree IS NOT NULL
-                    RETURN n.name as name, n.degree as degree
-                    ORDER BY n.degree DESC
-                    LIMIT 20
-                """)
-                seed_nodes = [r["name"] for r in result]
-            else:
-                # For specific questions, just get a few products
-                result = session.run("MATCH (p:Product) RETURN p.name as name LIMIT 3")
-                seed_nodes = [r["name"] for r in result]
-    
-    # Step 2: Graph walk with max_depth and prune_threshold
-    visited = set(seed_nodes)
-    frontier = list(seed_nodes)
-    all_nodes = set(seed_nodes)
-    node_scores = {}  # Track scores for pruning
+        catalog = get_name_catalog()
+        for word in question_words:
+            if word.lower() not in _STOPWORDS:
+                for node_name in catalog.contains(word, limit=3):
+                    if node_name not in seed_nodes:
+                        seed_nodes.append(node_name)
+    return seed_nodes
+
+
+def _is_global_question(question: str) -> bool:
+    return any(keyword in question.lower() for keyword in ["すべて", "全て", "all", "すべての", "全ての", "要約", "関係"])
+
+
+def _fallback_seeds(question: str) -> List[str]:
+    """Seeds used when the question names no node: top 20 nodes by degree (global questions) or 3 products."""
+    if _is_global_question(question):
+        return [r["name"] for r in graph_store.top_degree(20)]
+    return [r["name"] for r in graph_store.names("Product", limit=3)]
+
+
+async def _fallback_seeds_async(question: str) -> List[str]:
+    if _is_global_question(question):
+        return [r["name"] for r in await graph_store.top_degree_async(20)]
+    return [r["name"] for r in await graph_store.names_async("Product", limit=3)]
+
+
+def _heuristic_targets(question: str):
+    """Products (with aliases) and features mentioned in the question, boosted after the walk."""
+    question_entities = extract_entities(question)
+    heuristic_products = set(question_entities.get("products", []))
+    heuristic_features = set(question_entities.get("features", []))
+    for alias, canonical in _PRODUCT_ALIASES.items():
+        if alias in question:
+            heuristic_products.add(canonical)
+    return heuristic_products, heuristic_features
+
+
+def _walk_level(
+    frontier: List[str],
+    records: Optional[List],
+    visited: Set[str],
+    all_nodes: Set[str],
+    node_scores: Dict[str, float],
+    prune_threshold: float
+) -> List[str]:
+    """Score the neighbors returned for one frontier level; returns the next frontier."""
+    new_frontier = []
+    neighbors_by_source = {}
+    # A name used by several labels gets the neighbors of all its nodes
+    for record in records or []:
+        neighbors_by_source.setdefault(record["source"], []).extend(record["neighbors"])
     
-    with neo4j_driver.session() as session:
-        # Initialize seed node scores
-        for node_name in seed_nodes:
-            node_scores[node_name] = 1.0
-        
-        # Perform graph walk up to max_depth
-        for depth in range(max_depth):
-            new_frontier = []
-            
-            for node_name in frontier:
-                # Get neighbors with relationship information
-                result = session.run("""
-                    MATCH (n {name: $name})-[r]-(neighbor)
-                    WHERE NOT neighbor.name IN $visited
-                    RETURN 
-                        neighbor.name as name,
-                        labels(neighbor)[0] as type,
-                        type(r) as rel_type,
-                        coalesce(r.w_struct, 1.0) as edge_weight
-                """, name=node_name, visited=list(visited))
+    for node_name in frontier:
+        for record in neighbors_by_source.get(node_name, []):
+            neighbor_name = record["name"]
+            # Nodes visited earlier in this level are filtered here
+            if neighbor_name not in visited:
+                # Calculate score: parent score * edge weight (simplified scoring)
+                edge_weight = record["w_struct"] or 1.0
+                parent_score = node_scores.get(node_name, 1.0)
+                neighbor_score = parent_score * edge_weight
                 
-                for record in result:
-                    neighbor_name = record["name"]
-                    if neighbor_name not in visited:
-                        # Calculate score: parent score * edge weight (simplified scoring)
-                        edge_weight = record["edge_weight"] or 1.0
-                        parent_score = node_scores.get(node_name, 1.0)
-                        neighbor_score = parent_score * edge_weight
-                        
-                        # Prune based on threshold
-                        if neighbor_score >= prune_threshold:
-                            visited.add(neighbor_name)
-                            all_nodes.add(neighbor_name)
-                            node_scores[neighbor_name] = neighbor_score
-                            new_frontier.append(neighbor_name)
-            
-            frontier = new_frontier
-            if not new_frontier:
-                break
-        
-        # Build nodes list with scores
-        nodes = []
-        for node_name in sorted(all_nodes, key=lambda n: node_scores.get(n, 0.0), reverse=True):
-            # Get node type and related info
-            result = session.run("""
-                MATCH (n {name: $name})
-                OPTIONAL MATCH (n)-[r]-(related)
-                RETURN 
-                    labels(n)[0] as type,
-                    collect(DISTINCT related.name) as related
-                LIMIT 1
-            """, name=node_name)
-            
-            record = result.single()
-            node_type = record["type"] if record else "Unknown"
-            related = [r for r in (record["related"] if record else []) if r]
-            
-            nodes.append({
-                "name": node_name,
-                "type": node_type,
-                "score": node_scores.get(node_name, 0.0),
-                "related": related[:3]  # Limit related nodes
-            })
-        
-        # Heuristic adjustment: boost explicitly mentioned entities and their connected features
-        seen_names = {n["name"] for n in nodes}
-        question_entities = extract_entities(question)
-        explicit_products = question_entities.get("products", [])
-        explicit_features = question_entities.get("features", [])
+                # Prune based on threshold
+                if neighbor_score >= prune_threshold:
+                    visited.add(neighbor_name)
+                    all_nodes.add(neighbor_name)
+                    node_scores[neighbor_name] = neighbor_score
+                    new_frontier.append(neighbor_name)
+    return new_frontier
 
-        product_aliases = {"Acme": "Acme Search", "Globex": "Globex Graph"}
 
-        heuristic_products = set(explicit_products)
-        heuristic_features = set(explicit_features)
+def _ranked_nodes(ranked_names: List[str], records: Optional[List], node_scores: Dict[str, float]) -> List[Dict]:
+    """Nodes with type, score and up to three related names, from the neighbor records of the nodes."""
+    details = {}
+    # A name used by several labels is described by its first label
+    for record in records or []:
+        details.setdefault(record["source"], record)
+    
+    nodes = []
+    for node_name in ranked_names:
+        record = details.get(node_name)
+        node_type = record["type"] if record else "Unknown"
+        related = list(dict.fromkeys(n["name"] for n in record["neighbors"] if n["name"])) if record else []
+        
+        nodes.append({
+            "name": node_name,
+            "type": node_type,
+            "score": node_scores.get(node_name, 0.0),
+            "related": related[:3]  # Limit related nodes
+        })
+    return nodes
 
-        for alias, canonical in product_aliases.items():
-            if alias in question:
-                heuristic_products.add(canonical)
 
-        # Ensure explicitly mentioned features are present with a high score
-        for feature in heuristic_features:
-            if feature not in seen_names:
-                node_scores[feature] = max(node_scores.get(feature, 0.0), 1.0)
+def _apply_heuristics(
+    nodes: List[Dict],
+    node_scores: Dict[str, float],
+    heuristic_products: Set[str],
+    heuristic_features: Set[str],
+    product_features: Dict[str, List[str]]
+) -> None:
+    """Boost explicitly mentioned entities and their connected features (updates nodes in place)."""
+    seen_names = {n["name"] for n in nodes}
+    
+    # Ensure explicitly mentioned features are present with a high score
+    for feature in heuristic_features:
+        if feature not in seen_names:
+            node_scores[feature] = max(node_scores.get(feature, 0.0), 1.0)
+            nodes.append({
+                "name": feature,
+                "type": "Feature",
+                "score": node_scores[feature],
+                "related": []
+            })
+            seen_names.add(feature)
+    
+    # Ensure products and their features are represented
+    for product in heuristic_products:
+        if product not in seen_names:
+            node_scores[product] = max(node_scores.get(product, 0.0), 0.95)
+            nodes.append({
+                "name": product,
+                "type": "Product",
+                "score": node_scores[product],
+                "related": []
+            })
+            seen_names.add(product)
+        
+        related_features = []
+        for feature_name in product_features[product]:
+            related_features.append(feature_name)
+            node_scores[feature_name] = max(node_scores.get(feature_name, 0.0), 0.9)
+            
+            if feature_name not in seen_names:
                 nodes.append({
-                    "name": feature,
+                    "name": feature_name,
                     "type": "Feature",
-                    "score": node_scores[feature],
-                    "related": []
+                    "score": node_scores[feature_name],
+                    "related": [product]
                 })
-                seen_names.add(feature)
+                seen_names.add(feature_name)
+            else:
+                for node in nodes:
+                    if node["name"] == feature_name:
+                        related_set = set(node.get("related", []))
+                        related_set.add(product)
+                        node["related"] = list(related_set)
+                        node["score"] = max(node["score"], node_scores[feature_name])
+                        break
+        
+        # Update the product node with related features information
+        for node in nodes:
+            if node["name"] == product:
+                related_set = set(node.get("related", []))
+                related_set.update(related_features)
+                node["related"] = list(related_set)
+                node["score"] = max(node["score"], node_scores[product])
+                break
 
-        # Ensure products and their features are represented
-        for product in heuristic_products:
-            if product not in seen_names:
-                node_scores[product] = max(node_scores.get(product, 0.0), 0.95)
-                nodes.append({
-                    "name": product,
-                    "type": "Product",
-                    "score": node_scores[product],
-                    "related": []
-                })
-                seen_names.add(product)
-
-            result = session.run(
-                """
-                MATCH (p:Product {name: $product})-[:HAS_FEATURE]->(f:Feature)
-                RETURN f.name as feature
-                """,
-                product=product,
-            )
-
-            related_features = []
-            for record in result:
-                feature_name = record.get("feature")
-                if not feature_name:
-                    continue
-                related_features.append(feature_name)
-                node_scores[feature_name] = max(node_scores.get(feature_name, 0.0), 0.9)
 
-                if feature_name not in seen_names:
-                    nodes.append({
-                        "name": feature_name,
-                        "type": "Feature",
-                        "score": node_scores[feature_name],
-                        "related": [product]
-                    })
-                    seen_names.add(feature_name)
-                else:
-                    for node in nodes:
-                        if node["name"] == feature_name:
-                            related_set = set(node.get("related", []))
-                            related_set.add(product)
-                            node["related"] = list(related_set)
-                            node["score"] = max(node["score"], node_scores[feature_name])
-                            break
-
-            # Update the product node with related features information
-            for node in nodes:
-                if node["name"] == product:
-                    related_set = set(node.get("related", []))
-                    related_set.update(related_features)
-                    node["related"] = list(related_set)
-                    node["score"] = max(node["score"], node_scores[product])
-                    break
-
-        # Build answer
-        if "product" in question.lower() or "製品" in question:
-            product_nodes = [n for n in nodes if n["type"] == "Product"]
-            if product_nodes:
-                answer = f"製品一覧: {', '.join([n['name'] for n in product_nodes])}"
-            else:
-                answer = f"検索結果: {', '.join([n['name'] for n in nodes[:5]])}"
-        elif "policy" in question.lower() or "ポリシー" in question or "政策" in question:
-            policy_nodes = [n for n in nodes if n["type"] == "Policy"]
-            if policy_nodes:
-                answer = f"関連ポリシー: {', '.join([n['name'] for n in policy_nodes])}"
+def _build_answer(question: str, nodes: List[Dict]) -> str:
+    """Answer text from the ranked nodes, by question type (products, policies or relations)."""
+    if "product" in question.lower() or "製品" in question:
+        product_nodes = [n for n in nodes if n["type"] == "Product"]
+        if product_nodes:
+            return f"製品一覧: {', '.join([n['name'] for n in product_nodes])}"
+        return f"検索結果: {', '.join([n['name'] for n in nodes[:5]])}"
+    if "policy" in question.lower() or "ポリシー" in question or "政策" in question:
+        policy_nodes = [n for n in nodes if n["type"] == "Policy"]
+        if policy_nodes:
+            return f"関連ポリシー: {', '.join([n['name'] for n in policy_nodes])}"
+        return f"検索結果: {', '.join([n['name'] for n in nodes[:5]])}"
+    # Default: show top nodes with relationships
+    top_answer_nodes = nodes[:5]
+    if top_answer_nodes:
+        answer_parts = []
+        for node in top_answer_nodes:
+            if node["related"]:
+                answer_parts.append(f"{node['name']} ({node['type']}) は {', '.join(node['related'])} と関連")
             else:
-                answer = f"検索結果: {', '.join([n['name'] for n in nodes[:5]])}"
-        else:
-            # Default: show top nodes with relationships
-            top_answer_nodes = nodes[:5]
-            if top_answer_nodes:
-                answer_parts = []
-                for node in top_answer_nodes:
-                    if node["related"]:
-                        answer_parts.append(f"{node['name']} ({node['type']}) は {', '.join(node['related'])} と関連")
-                    else:
-                        answer_parts.append(f"{node['name']} ({node['type']})")
-                answer = "製品と機能の関係:\n" + "\n".join(answer_parts)
-            else:
-                answer = f"検索結果: {', '.join([n['name'] for n in nodes[:5]])}"
+                answer_parts.append(f"{node['name']} ({node['type']})")
+        return "製品と機能の関係:\n" + "\n".join(answer_parts)
+    return f"検索結果: {', '.join([n['name'] for n in nodes[:5]])}"
+
+
+def _top_returned(nodes: List[Dict]) -> List[Dict]:
+    """
+    Limit returned nodes to top ones by score.
     
-    # Limit returned nodes to top ones by score
-    # GraphRAG typically explores many nodes, but for fair comparison with LightRAG
-    # we limit the returned nodes to top-scoring ones (similar to LightRAG's top_k)
-    top_returned_nodes = sorted(nodes, key=lambda n: n["score"], reverse=True)[:6]  # Limit to top 6 (similar to LightRAG)
+    GraphRAG typically explores many nodes, but for fair comparison with
+    LightRAG the returned nodes are limited to the top 6 (similar to top_k).
+    """
+    return sorted(nodes, key=lambda n: n["score"], reverse=True)[:6]
 
-    # Include directly connected features for returned products to aid downstream evaluation
+
+def _expand_returned(top_returned_nodes: List[Dict], product_features: Dict[str, List[str]]) -> List[Dict]:
+    """Returned nodes plus the directly connected features of returned products (aids evaluation)."""
     expanded_nodes = []
     seen_names = set()
-    with neo4j_driver.session() as session:
-        for node in top_returned_nodes:
-            name = node["name"]
-            node_type = node["type"]
-            if name not in seen_names:
-                expanded_nodes.append({"name": name, "type": node_type})
-                seen_names.add(name)
-
-            if node_type == "Product":
-                feature_result = session.run(
-                    """
-                    MATCH (:Product {name: $product})-[:HAS_FEATURE]->(f:Feature)
-                    RETURN f.name as feature
-                    """,
-                    product=name,
-                )
-                for feature_record in feature_result:
-                    feature_name = feature_record.get("feature")
-                    if feature_name and feature_name not in seen_names:
-                        expanded_nodes.append({"name": feature_name, "type": "Feature"})
-                        seen_names.add(feature_name)
+    for node in top_returned_nodes:
+        name = node["name"]
+        node_type = node["type"]
+        if name not in seen_names:
+            expanded_nodes.append({"name": name, "type": node_type})
+            seen_names.add(name)
+        
+        if node_type == "Product":
+            for feature_name in product_features[name]:
+                if feature_name not in seen_names:
+                    expanded_nodes.append({"name": feature_name, "type": "Feature"})
+                    seen_names.add(feature_name)
+    return expanded_nodes
 
+
+def _check_engine(engine: Optional[str]) -> str:
+    engine = engine or GRAPH_ENGINE
+    if engine not in GRAPH_ENGINES:
+        raise ValueError(f"Unknown graph engine: {engine} (expected one of {', '.join(GRAPH_ENGINES)})")
+    return engine
+
+
+def query_graph(
+    question: str,
+    max_depth: int = 3,
+    prune_threshold: float = 0.2,
+    collection_name: str = "graphrag_docs",
+    engine: Optional[str] = None
+) -> Dict:
+    """
+    Query GraphRAG pipeline with graph walk using max_depth and prune_threshold.
+    
+    `engine` selects the walk backend ("neo4j" or "snapshot", default:
+    GRAPH_ENGINE).
+    
+    The walk fetches the neighbors of a whole frontier per query, and node
+    details and product features are fetched in one query each, so the
+    number of round trips (reported in metadata) grows with depth only.
+    """
+    if not qdrant_client or graph_store is None:
+        raise RuntimeError("Clients not initialized")
+    engine = _check_engine(engine)
+    
+    # Step 1: Find seed nodes from question using improved entity extraction
+    seed_nodes = _question_seeds(question)
+    round_trips = 0
+    
+    # Fallback: For global questions or if no entities found, get top nodes by centrality
+    if not seed_nodes:
+        seed_nodes = _fallback_seeds(question)
+        round_trips += 1
+    
+    # Step 2: Graph walk with max_depth and prune_threshold
+    visited = set(seed_nodes)
+    frontier = list(seed_nodes)
+    all_nodes = set(seed_nodes)
+    # Track scores for pruning (seed nodes start at 1.0)
+    node_scores = {node_name: 1.0 for node_name in seed_nodes}
+    depth = 0
+    
+    # Perform graph walk up to max_depth
+    if engine == "snapshot":
+        # In-process walk: no graph store round trips
+        walk = _walk_snapshot(get_graph_snapshot(), seed_nodes, max_depth, prune_threshold)
+        node_scores = walk["node_scores"]
+        all_nodes.update(node_scores)
+        depth, frontier = walk["depth"], walk["frontier"]
+    else:
+        for depth in range(max_depth):
+            # One query per level for the neighbors of the whole frontier
+            records = _neighbors(frontier, exclude=list(visited))
+            if records is not None:
+                round_trips += 1
+            frontier = _walk_level(frontier, records, visited, all_nodes, node_scores, prune_threshold)
+            if not frontier:
+                break
+    
+    # Build nodes list with scores (details for all nodes in one query)
+    ranked_names = sorted(all_nodes, key=lambda n: node_scores.get(n, 0.0), reverse=True)
+    records = _neighbors(ranked_names)
+    if records is not None:
+        round_trips += 1
+    nodes = _ranked_nodes(ranked_names, records, node_scores)
+    
+    # Heuristic adjustment: boost explicitly mentioned entities and their connected features
+    heuristic_products, heuristic_features = _heuristic_targets(question)
+    product_features: Dict[str, List[str]] = {}
+    round_trips += _fetch_product_features(list(heuristic_products), product_features)
+    _apply_heuristics(nodes, node_scores, heuristic_products, heuristic_features, product_features)
+    
+    answer = _build_answer(question, nodes)
+    
+    # Include directly connected features for returned products to aid downstream evaluation
+    # (products already expanded by the heuristic step are not fetched again)
+    top_returned_nodes = _top_returned(nodes)
+    returned_products = [n["name"] for n in top_returned_nodes if n["type"] == "Product"]
+    round_trips += _fetch_product_features(returned_products, product_features)
+    
     return {
         "answer": answer,
-        "graph_nodes": expanded_nodes,
+        "graph_nodes": _expand_returned(top_returned_nodes, product_features),
         "metadata": {
             "max_depth": max_depth,
             "prune_threshold": prune_threshold,
             "nodes_explored": len(all_nodes),
             "nodes_returned": len(top_returned_nodes),
             "actual_depth": depth + 1 if frontier else depth,
+            "round_trips": round_trips,
+            "graph_engine": engine,
+            "io": "sync",
             "pipeline": "graphrag-simplified"
         }
     }
 
 
+async def _fetch_product_features_async(products: List[str], cache: Dict[str, List[str]]) -> int:
+    """Async _fetch_product_features. Returns the number of queries run (0 or 1)."""
+    missing = _missing_products(products, cache)
+    if not missing:
+        return 0
+    _store_product_features(await graph_store.neighbors_async({"Product": missing}, **_PRODUCT_FEATURES), cache)
+    return 1
+
+
+async def _walk_async(
+    question: str,
+    seed_nodes: List[str],
+    max_depth: int,
+    prune_threshold: float,
+    engine: str
+) -> Dict:
+    """Seed fallback, graph walk and node details of query_graph on the async graph store reads."""
+    round_trips = 0
+    if not seed_nodes:
+        seed_nodes = await _fallback_seeds_async(question)
+        round_trips += 1
+    
+    visited = set(seed_nodes)
+    frontier = list(seed_nodes)
+    all_nodes = set(seed_nodes)
+    node_scores = {node_name: 1.0 for node_name in seed_nodes}
+    depth = 0
+    if engine == "snapshot":
+        walk = _walk_snapshot(get_graph_snapshot(), seed_nodes, max_depth, prune_threshold)
+        node_scores = walk["node_scores"]
+        all_nodes.update(node_scores)
+        depth, frontier = walk["depth"], walk["frontier"]
+    else:
+        for depth in range(max_depth):
+            records = await _neighbors_async(frontier, exclude=list(visited))
+            if records is not None:
+                round_trips += 1
+            frontier = _walk_level(frontier, records, visited, all_nodes, node_scores, prune_threshold)
+            if not frontier:
+                break
+    
+    ranked_names = sorted(all_nodes, key=lambda n: node_scores.get(n, 0.0), reverse=True)
+    records = await _neighbors_async(ranked_names)
+    if records is not None:
+        round_trips += 1
+    return {
+        "nodes": _ranked_nodes(ranked_names, records, node_scores),
+        "node_scores": node_scores,
+        "all_nodes": all_nodes,
+        "depth": depth,
+        "frontier": frontier,
+        "round_trips": round_trips,
+    }
+
+
+async def query_graph_async(
+    question: str,
+    max_depth: int = 3,
+    prune_threshold: float = 0.2,
+    collection_name: str = "graphrag_docs",
+    engine: Optional[str] = None
+) -> Dict:
+    """
+    query_graph on the async graph store reads (async Neo4j driver), for the
+    async /ask endpoint.
+    
+    Returns the same nodes, answer and round trips. The features of the
+    products named in the question only depend on the question, so they are
+    fetched concurrently with the seed lookup, walk and node details (each
+    read in its own session) instead of after them.
+    """
+    if graph_store is None:
+        raise RuntimeError("Graph store not initialized")
+    engine = _check_engine(engine)
+    
+    seed_nodes = _question_seeds(question)
+    heuristic_products, heuristic_features = _heuristic_targets(question)
+    product_features: Dict[str, List[str]] = {}
+    heuristic_trips, walk = await asyncio.gather(
+        _fetch_product_features_async(list(heuristic_products), product_features),
+        _walk_async(question, seed_nodes, max_depth, prune_threshold, engine),
+    )
+    round_trips = walk["round_trips"] + heuristic_trips
+    
+    nodes, node_scores = walk["nodes"], walk["node_scores"]
+    _apply_heuristics(nodes, node_scores, heuristic_products, heuristic_features, product_features)
+    answer = _build_answer(question, nodes)
+    
+    top_returned_nodes = _top_returned(nodes)
+    returned_products = [n["name"] for n in top_returned_nodes if n["type"] == "Product"]
+    round_trips += await _fetch_product_features_async(returned_products, product_features)
+    
+    frontier, depth = walk["frontier"], walk["depth"]
+    return {
+        "answer": answer,
+        "graph_nodes": _expand_returned(top_returned_nodes, product_features),
+        "metadata": {
+            "max_depth": max_depth,
+            "prune_threshold": prune_threshold,
+            "nodes_explored": len(walk["all_nodes"]),
+            "nodes_returned": len(top_returned_nodes),
+            "actual_depth": depth + 1 if frontier else depth,
+            "round_trips": round_trips,
+            "graph_engine": engine,
+            "io": "async",
+            "pipeline": "graphrag-simplified"
+        }
+    }
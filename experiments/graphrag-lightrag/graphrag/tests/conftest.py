@@ -0,0 +1,14 @@
+"""
+Run the pipeline on the in-process graph store and vector index, so the tests
+need neither Neo4j nor Qdrant. The service directory (for `pipeline`) and its
+parent (for `common`) go on sys.path, as /app and /opt/shared do in the image.
+"""
+import os
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SERVICE_DIR, os.path.dirname(SERVICE_DIR)]
+
+# Read when pipeline is imported: memory graph store, no extraction cache on disk
+os.environ["GRAPH_STORE"] = "memory"
+os.environ["EXTRACTION_CACHE_DIR"] = ""
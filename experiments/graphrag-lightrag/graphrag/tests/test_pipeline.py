@@ -0,0 +1,114 @@
+"""
+Pipeline tests on GRAPH_STORE=memory and LocalVectorIndex (see conftest.py).
+
+    cd graphrag && python -m pytest tests
+"""
+import asyncio
+import json
+import os
+from collections import Counter
+
+import pytest
+
+import pipeline
+from common.graph_snapshot import GraphSnapshot
+from common.vector_index import LocalVectorIndex
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "docs-300.jsonl")
+COLLECTION = "graphrag_docs"
+
+with open(DATA_FILE, encoding="utf-8") as f:
+    DOCS = [json.loads(line) for line in f if line.strip()]
+
+
+def _write_docs(path, docs) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        for doc in docs:
+            f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+    return str(path)
+
+
+def _reset_clients() -> None:
+    """A new, empty memory graph and vector index."""
+    pipeline.graph_store = None
+    pipeline.initialize_clients(None, LocalVectorIndex())
+
+
+def _graph(store):
+    """Every node and edge of a memory store with its properties."""
+    return dict(store._nodes), dict(store._edges)
+
+
+@pytest.fixture
+def seeded(tmp_path):
+    """Seed all of DATA_FILE into a new memory graph and vector index; returns the data file."""
+    _reset_clients()
+    data_file = _write_docs(tmp_path / "docs.jsonl", DOCS)
+    pipeline.seed_data(data_file, COLLECTION)
+    return data_file
+
+
+def test_dataset_stats_match_graph_store(seeded):
+    store = pipeline.graph_store
+    graph = pipeline.get_dataset_stats(seeded, refresh=True)["graph"]
+    stats = store.stats()
+    assert graph["nodes"] == stats["nodes"]
+    assert graph["edges"] == stats["edges"]
+    assert graph["labels"] == dict(Counter(label for _, label in store.nodes()))
+    assert sum(graph["edge_types"].values()) == stats["edges"]
+    assert sum(graph["degree"]["histogram"].values()) == stats["nodes"]
+    # Every edge adds one to the degree of both of its endpoints
+    assert graph["degree"]["mean"] == round(2 * stats["edges"] / stats["nodes"], 3)
+    # The data has same-named nodes of different labels, which the snapshot merges
+    assert GraphSnapshot.load(store).node_count < stats["nodes"]
+
+
+def test_incremental_switch_matches_full_seed(tmp_path):
+    first = _write_docs(tmp_path / "first.jsonl", DOCS[:200])
+    # Drops 50 documents, adds 50 and rewrites one that stays
+    second_docs = DOCS[50:250]
+    second_docs[3] = dict(second_docs[3], text=DOCS[260]["text"])
+    second = _write_docs(tmp_path / "second.jsonl", second_docs)
+
+    _reset_clients()
+    pipeline.seed_data(first, COLLECTION)
+    result = pipeline.seed_data(second, COLLECTION, incremental=True)
+    assert result["seed_stats"]["mode"] == "incremental"
+    assert result["seed_stats"]["delta"]["rows_deleted"] > 0
+    incremental = _graph(pipeline.graph_store)
+
+    _reset_clients()
+    pipeline.seed_data(second, COLLECTION)
+    full = _graph(pipeline.graph_store)
+
+    assert incremental[0] == full[0]
+    assert incremental[1] == full[1]
+
+
+def _questions(store):
+    """Questions naming nodes of every label, plus a global one."""
+    by_label = {}
+    for name, label in store.nodes():
+        by_label.setdefault(label, []).append(name)
+    products, features, policies = by_label["Product"], by_label["Feature"], by_label["Policy"]
+    return [
+        f"{products[0]} の機能は？",
+        f"{features[0]} を提供する製品で、{features[1]} を提供していない製品は？",
+        f"{policies[0]} に関係する製品は？",
+        f"{products[1]} と {products[2]} の関係は？",
+        "すべての製品",
+    ]
+
+
+@pytest.mark.parametrize("engine", ["neo4j", "snapshot"])
+def test_sync_and_async_queries_match(seeded, engine):
+    answered = 0
+    for question in _questions(pipeline.graph_store):
+        for max_depth in (1, 3):
+            result = pipeline.query_graph(question, max_depth, 0.2, COLLECTION, engine=engine)
+            async_result = asyncio.run(pipeline.query_graph_async(question, max_depth, 0.2, COLLECTION, engine=engine))
+            assert result["metadata"].pop("io") == "sync"
+            assert async_result["metadata"].pop("io") == "async"
+            assert async_result == result
+            answered += bool(result["graph_nodes"])
+    assert answered
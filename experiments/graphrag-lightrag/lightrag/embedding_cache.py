@@ -0,0 +1,221 @@
+"""
+Disk-backed embedding cache for LightRAG seeding.
+
+Vectors are appended to a raw float32 file that is read back through
+`numpy.memmap`, and their keys (128-bit BLAKE2b of the text) to a parallel
+file of 16-byte records. Both files are named after the model, so each model
+has its own cache and a different model never returns foreign vectors.
+
+    cache/embeddings-<model-slug>-<dim>.f32   float32[n, dim]
+    cache/embeddings-<model-slug>-<dim>.keys  bytes16[n]
+
+Only new texts are sent to the model, in batches of `batch_size`.
+
+`QueryEmbeddingCache` is a small in-memory LRU/TTL cache for question
+embeddings, so repeated `/ask`, `/compare` and `/eval` questions skip model
+inference.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+KEY_SIZE = 16
+
+
+def text_key(text: str) -> bytes:
+    """128-bit content hash used as cache key."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=KEY_SIZE).digest()
+
+
+class EmbeddingCache:
+    """Append-only, memory-mapped vector cache keyed by text hash and model name."""
+
+    def __init__(self, cache_dir: Optional[str], model_name: str, dim: int):
+        self.model_name = model_name
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index: Dict[bytes, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._pending: List[np.ndarray] = []  # Used when cache_dir is None (memory only)
+        if cache_dir:
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+            base = os.path.join(cache_dir, f"embeddings-{slug}-{dim}")
+            self.vectors_path = f"{base}.f32"
+            self.keys_path = f"{base}.keys"
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load()
+        else:
+            self.vectors_path = self.keys_path = None
+
+    def _load(self) -> None:
+        keys = b""
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, "rb") as f:
+                keys = f.read()
+        vector_bytes = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        # Vectors are written before keys, so a partial write leaves extra vectors only
+        count = min(len(keys) // KEY_SIZE, vector_bytes // self.row_bytes)
+        # Cut both files back to the complete rows: `_append` writes at the end of
+        # the files but indexes from count, so a leftover row would shift every later one
+        for path, size in ((self.vectors_path, count * self.row_bytes), (self.keys_path, count * KEY_SIZE)):
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+        self._index = {keys[i * KEY_SIZE:(i + 1) * KEY_SIZE]: i for i in range(count)}
+        self._remap(count)
+
+    def _remap(self, count: int) -> None:
+        self._vectors = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim)) if count else None
+        )
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _load_rows(self, rows: List[int]) -> np.ndarray:
+        if not rows:
+            return np.empty((0, self.dim), dtype=np.float32)
+        if self.vectors_path:
+            return np.asarray(self._vectors[rows])
+        return np.array([self._pending[i] for i in rows], dtype=np.float32)
+
+    def _append(self, keys: List[bytes], vectors: np.ndarray) -> None:
+        rows = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock:
+            start = len(self._index)
+            if self.vectors_path:
+                with open(self.vectors_path, "ab") as f:
+                    f.write(rows.tobytes())
+                with open(self.keys_path, "ab") as f:
+                    f.write(b"".join(keys))
+                self._remap(start + len(keys))
+            else:
+                self._pending.extend(rows)
+            for offset, key in enumerate(keys):
+                self._index[key] = start + offset
+
+    def encode(self, model, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """
+        Return float32[len(texts), dim] embeddings for texts.
+
+        Cached vectors are read from the memory-mapped file; the rest are
+        encoded with `model.encode` in batches and appended to the cache.
+        """
+        keys = [text_key(t) for t in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self._index and key not in missing:
+                missing[key] = text
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            missing_keys = list(missing)
+            vectors = model.encode(
+                [missing[k] for k in missing_keys],
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            self._append(missing_keys, np.asarray(vectors, dtype=np.float32).reshape(len(missing_keys), self.dim))
+
+        return self._load_rows([self._index[key] for key in keys])
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "entries": len(self._index),
+            "model": self.model_name,
+            "dim": self.dim,
+            "vector_bytes": len(self._index) * self.row_bytes,
+            "path": self.vectors_path,
+        }
+
+
+def normalize_query(text: str) -> str:
+    """NFKC-normalize and collapse whitespace (case is kept: it can change the embedding)."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings with an optional TTL.
+    
+    Keys are (model name, normalized question). The model encodes the
+    normalized text, so every spelling that maps to the same key gets the
+    same vector. `max_entries=0` disables caching; `ttl_seconds=0` never expires.
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Tuple[float, ...]]]" = OrderedDict()
+
+    def _get(self, key: Tuple[str, str]) -> Optional[Tuple[float, ...]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, vector = entry
+                if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+            self.misses += 1
+            return None
+
+    def _put(self, key: Tuple[str, str], vector: Tuple[float, ...]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def encode(self, model, question: str) -> List[float]:
+        """Return the embedding of question as a list, encoding it only on a miss."""
+        text = normalize_query(question)
+        key = (self.model_name, text)
+        vector = self._get(key)
+        if vector is None:
+            vector = tuple(float(x) for x in model.encode(text))
+            self._put(key, vector)
+        return list(vector)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "model": self.model_name,
+        }
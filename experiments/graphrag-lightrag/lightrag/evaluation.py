@@ -0,0 +1,400 @@
+"""
+Concurrent evaluation engine behind `/eval` and `/compare`.
+
+Questions used to be evaluated one at a time, with a new connection to
+GraphRAG per question and LightRAG run after GraphRAG returned, so an eval took
+the sum of all question latencies. Now:
+- questions run concurrently, at most `concurrency` (EVAL_CONCURRENCY) at a time,
+- for each question the GraphRAG request and the LightRAG query run in
+  parallel (`query_lightrag` is synchronous, so it runs in a worker thread),
+- every GraphRAG request goes through one shared keep-alive
+  `httpx.AsyncClient` (created at startup, closed at shutdown),
+- each case records wall time per stage (`stages_ms`), and the summary
+  reports the eval wall time with p50/p95/max per stage,
+- scoring expands returned products with their features from a
+  product -> features map loaded in one query per eval run
+  (`load_product_features`), instead of one query per node.
+
+An eval therefore takes about as long as its slowest question when
+`concurrency` is at least the number of questions. `/compare` uses the same
+fan-out for a single question (`compare_question`), with a timeout per backend,
+and its diff adds node-set Jaccard and rank overlap.
+
+The client is HTTP/2-capable (HTTP2_ENABLED). httpx negotiates HTTP/2 through
+TLS ALPN, so a plain `http://` GRAPHRAG_URL stays on HTTP/1.1 keep-alive; the
+version used is reported as `http_version`.
+"""
+import asyncio
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Dict, Iterable, List, Set
+
+import httpx
+
+# GraphRAG API base URL
+GRAPHRAG_URL = os.getenv("GRAPHRAG_URL", "http://graphrag:8000")
+
+# Per-backend timeouts in seconds: GraphRAG HTTP request, local LightRAG query
+GRAPHRAG_TIMEOUT = float(os.getenv("GRAPHRAG_TIMEOUT", "20"))
+LIGHTRAG_TIMEOUT = float(os.getenv("LIGHTRAG_TIMEOUT", "20"))
+
+# Questions evaluated at the same time, and pooled keep-alive connections to GraphRAG
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "8"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "32"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") == "1"
+
+# LightRAG parameters used for every eval question
+EVAL_LIGHTRAG_PARAMS = {"top_k": 6, "depth": 2, "theta": 0.3}
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Keep-alive client for GraphRAG, shared by all requests of the process."""
+    return httpx.AsyncClient(
+        base_url=GRAPHRAG_URL,
+        timeout=GRAPHRAG_TIMEOUT,
+        http2=HTTP2_ENABLED,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+        ),
+    )
+
+
+class StageTimer:
+    """Wall time per named stage, in milliseconds."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    async def timed(self, name: str, awaitable: Awaitable):
+        with self.stage(name):
+            return await awaitable
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in [0, 100]); 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+async def post_graphrag(
+    client: httpx.AsyncClient,
+    question: str,
+    max_depth: int = 3,
+    prune_threshold: float = 0.2,
+    engine=None,
+    timeout: float = GRAPHRAG_TIMEOUT,
+) -> httpx.Response:
+    """
+    POST /ask to GraphRAG over the shared client.
+    
+    GraphRAG's result cache is bypassed: the local LightRAG query is never
+    cached, so both sides are timed on a real run.
+    """
+    return await client.post(
+        "/ask",
+        json={
+            "question": question,
+            "graph_walk": {"max_depth": max_depth, "prune_threshold": prune_threshold, "engine": engine},
+        },
+        headers={"Cache-Control": "no-store"},
+        timeout=timeout,
+    )
+
+
+async def ask_lightrag(question: str, timeout: float = LIGHTRAG_TIMEOUT, **params) -> dict:
+    """
+    Run `query_lightrag` in a worker thread, giving up after timeout seconds.
+    
+    The thread itself cannot be cancelled; on timeout it finishes in the
+    background and its result is dropped.
+    """
+    from pipeline import query_lightrag
+
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(query_lightrag, question=question, **params), timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"timed out after {timeout:g}s") from None
+
+
+def jaccard(a: Iterable[str], b: Iterable[str]) -> float:
+    """|A ∩ B| / |A ∪ B| of two node sets (1.0 when both are empty)."""
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def rank_overlap(a: List[str], b: List[str], depth: int = 0) -> float:
+    """
+    Average overlap of two rankings: the mean over d = 1..depth of
+    |a[:d] ∩ b[:d]| / d. 1.0 means same nodes in the same order, 0.0 disjoint;
+    unlike Jaccard, disagreement at the top ranks costs more than at the tail.
+    `depth` defaults to the longer ranking.
+    """
+    depth = depth or max(len(a), len(b))
+    if not depth:
+        return 1.0
+    seen_a: Set[str] = set()
+    seen_b: Set[str] = set()
+    shared = 0
+    total = 0.0
+    for d in range(depth):
+        x = a[d] if d < len(a) else None
+        y = b[d] if d < len(b) else None
+        if x is not None and x == y:
+            shared += 1
+        else:
+            shared += (x is not None and x in seen_b) + (y is not None and y in seen_a)
+        if x is not None:
+            seen_a.add(x)
+        if y is not None:
+            seen_b.add(y)
+        total += shared / (d + 1)
+    return total / depth
+
+
+async def compare_question(
+    client: httpx.AsyncClient,
+    question: str,
+    top_k: int = 4,
+    depth: int = 2,
+    theta: float = 0.3,
+    engine=None,
+    graphrag_timeout: float = GRAPHRAG_TIMEOUT,
+    lightrag_timeout: float = LIGHTRAG_TIMEOUT,
+) -> dict:
+    """
+    Ask GraphRAG and LightRAG the same question concurrently.
+    
+    Returns {"graphrag", "lightrag", "latency_ms"}; a failed or timed-out side
+    is reported as {"error": ...} without failing the other.
+    """
+    timer = StageTimer()
+    with timer.stage("wall"):
+        gr, lr = await asyncio.gather(
+            timer.timed("graphrag", post_graphrag(
+                client, question, max_depth=depth + 1, prune_threshold=0.2, engine=engine, timeout=graphrag_timeout
+            )),
+            timer.timed("lightrag", ask_lightrag(
+                question, timeout=lightrag_timeout, top_k=max(top_k, 6), depth=depth, theta=theta, engine=engine
+            )),
+            return_exceptions=True,
+        )
+
+    gr_latency = {"total": timer.stages["graphrag"]}
+    if isinstance(gr, BaseException):
+        # httpx timeouts can have an empty message
+        gr_data = {"error": f"GraphRAG request failed: {str(gr) or type(gr).__name__}"}
+    else:
+        try:
+            gr_data = gr.json()
+        except Exception as e:
+            gr_data = {"error": f"GraphRAG request failed: {e}"}
+        gr_latency["http_version"] = gr.http_version
+        server_ms = gr_data.get("metadata", {}).get("server_ms")
+        if server_ms is not None:
+            gr_latency["server"] = server_ms
+            gr_latency["transport"] = round(gr_latency["total"] - server_ms, 2)
+
+    lr_latency = {"total": timer.stages["lightrag"]}
+    if isinstance(lr, BaseException):
+        lr_api = {"error": f"LightRAG query failed: {lr}"}
+    else:
+        # shape to API-like
+        lr_api = {
+            "answer": lr.get("answer"),
+            "graph_nodes": [n.get("name") for n in lr.get("graph_nodes", [])],
+            "metadata": lr.get("metadata", {}),
+        }
+        lr_latency.update(lr_api["metadata"].get("timings_ms", {}))
+
+    return {
+        "graphrag": gr_data,
+        "lightrag": lr_api,
+        "latency_ms": {
+            "graphrag": gr_latency,
+            "lightrag": lr_latency,
+            # Concurrent wall time vs. running the two sides one after the other
+            "wall": timer.stages["wall"],
+            "serial": round(timer.stages["graphrag"] + timer.stages["lightrag"], 2),
+        },
+    }
+
+
+def load_product_features(store) -> Dict[str, List[str]]:
+    """Product name -> feature names for the whole graph (one HAS_FEATURE edge read)."""
+    if store is None:
+        return {}
+    product_features: Dict[str, List[str]] = {}
+    for product, feature, _, _, _ in store.edges("HAS_FEATURE"):
+        product_features.setdefault(product, []).append(feature)
+    return product_features
+
+
+def expand_with_related_features(nodes: Set[str], product_features: Dict[str, List[str]]) -> Set[str]:
+    """Add the features of every product in nodes."""
+    expanded = set(nodes)
+    for name in nodes:
+        expanded.update(product_features.get(name, ()))
+    return expanded
+
+
+def _is_ok(expected: Set[str], nodes: Set[str]) -> bool:
+    return bool(expected) and expected.issubset(nodes) or (not expected and bool(nodes))
+
+
+async def evaluate_question(
+    client: httpx.AsyncClient,
+    item: dict,
+    product_features: Dict[str, List[str]],
+    semaphore: asyncio.Semaphore,
+) -> dict:
+    """Run one question on both systems in parallel and score it."""
+    q = item.get("ask")
+    expected = set(item.get("expected", []))
+    timer = StageTimer()
+    errors = {}
+
+    async with semaphore:
+        with timer.stage("total"):
+            gr, lr = await asyncio.gather(
+                timer.timed("graphrag", post_graphrag(client, q)),
+                timer.timed("lightrag", ask_lightrag(q, **EVAL_LIGHTRAG_PARAMS)),
+                return_exceptions=True,
+            )
+
+            # GraphRAG
+            if isinstance(gr, BaseException):
+                errors["graphrag"] = f"GraphRAG request failed: {str(gr) or type(gr).__name__}"
+                gr = {}
+            else:
+                try:
+                    gr = gr.json()
+                except Exception as e:
+                    errors["graphrag"] = f"GraphRAG request failed: {e}"
+                    gr = {}
+            gr_nodes_raw = set(gr.get("metadata", {}).get("graph_nodes", []) or gr.get("graph_nodes", []) or [])
+            gr_metadata = gr.get("metadata", {})
+
+            # LightRAG
+            if isinstance(lr, BaseException):
+                errors["lightrag"] = f"LightRAG query failed: {lr}"
+                lr = {}
+            lr_nodes_raw = set([n.get("name") if isinstance(n, dict) else n for n in lr.get("graph_nodes", [])])
+            lr_subgraph = lr.get("subgraph") or {}
+
+            with timer.stage("expand"):
+                gr_nodes = expand_with_related_features(gr_nodes_raw, product_features)
+                lr_nodes = expand_with_related_features(lr_nodes_raw, product_features)
+
+    case = {
+        "id": item.get("id"), "ask": q,
+        "expected": list(expected),
+        "graphrag_nodes": sorted(gr_nodes),
+        "lightrag_nodes": sorted(lr_nodes),
+        "gr_ok": _is_ok(expected, gr_nodes), "lr_ok": _is_ok(expected, lr_nodes),
+        # Additional metrics for comparison
+        "graphrag_metrics": {
+            "nodes_explored": gr_metadata.get("nodes_explored", 0),
+            "nodes_returned": gr_metadata.get("nodes_returned", 0),
+            "actual_depth": gr_metadata.get("actual_depth", 0),
+            "latency_ms": timer.stages["graphrag"],
+        },
+        "lightrag_metrics": {
+            "nodes_explored": lr_subgraph.get("total_nodes", 0),
+            "nodes_returned": len(lr_nodes_raw),
+            "actual_depth": lr_subgraph.get("depth", 0),
+            "latency_ms": timer.stages["lightrag"],
+            "timings_ms": lr.get("metadata", {}).get("timings_ms", {}),
+        },
+        "stages_ms": timer.stages,
+    }
+    if errors:
+        case["errors"] = errors
+    return case
+
+
+def summarize(results: List[dict], wall_ms: float, concurrency: int) -> dict:
+    """Aggregate accuracy, exploration and latency over all cases."""
+    ok_gr = sum(int(r["gr_ok"]) for r in results)
+    ok_lr = sum(int(r["lr_ok"]) for r in results)
+    total_gr_explored = sum(r["graphrag_metrics"]["nodes_explored"] for r in results)
+    total_lr_explored = sum(r["lightrag_metrics"]["nodes_explored"] for r in results)
+    avg_gr_latency = sum(r["graphrag_metrics"]["latency_ms"] for r in results) / len(results) if results else 0
+    avg_lr_latency = sum(r["lightrag_metrics"]["latency_ms"] for r in results) / len(results) if results else 0
+
+    stage_names: List[str] = []
+    for r in results:
+        stage_names.extend(name for name in r["stages_ms"] if name not in stage_names)
+    stages = {}
+    for name in stage_names:
+        values = [r["stages_ms"][name] for r in results if name in r["stages_ms"]]
+        stages[name] = {
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": max(values),
+        }
+
+    return {
+        "graphrag_ok": ok_gr,
+        "lightrag_ok": ok_lr,
+        "total": len(results),
+        "accuracy": {
+            "graphrag": f"{ok_gr}/{len(results)}",
+            "lightrag": f"{ok_lr}/{len(results)}",
+        },
+        "exploration": {
+            "graphrag_total_nodes_explored": total_gr_explored,
+            "lightrag_total_nodes_explored": total_lr_explored,
+            "graphrag_avg_explored_per_query": round(total_gr_explored / len(results), 1) if results else 0,
+            "lightrag_avg_explored_per_query": round(total_lr_explored / len(results), 1) if results else 0,
+        },
+        "performance": {
+            "graphrag_avg_latency_ms": round(avg_gr_latency, 2),
+            "lightrag_avg_latency_ms": round(avg_lr_latency, 2),
+            # Eval wall time vs. what a serial run of the same cases would take
+            "wall_ms": round(wall_ms, 2),
+            "sum_of_case_ms": round(sum(r["stages_ms"]["total"] for r in results), 2),
+            "concurrency": concurrency,
+            "stages_ms": stages,
+        },
+    }
+
+
+async def run_eval(
+    client: httpx.AsyncClient,
+    questions: Iterable[dict],
+    store,
+    concurrency: int = EVAL_CONCURRENCY,
+) -> dict:
+    """
+    Evaluate all questions with bounded concurrency; cases keep question order.
+    
+    The product -> features map used for scoring is loaded once, before the
+    questions start, and timed separately (`feature_map_ms`) so it does not
+    show up in per-question latencies.
+    """
+    feature_map_start = time.perf_counter()
+    product_features = await asyncio.to_thread(load_product_features, store)
+    feature_map_ms = (time.perf_counter() - feature_map_start) * 1000
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(evaluate_question(client, item, product_features, semaphore) for item in questions))
+    wall_ms = (time.perf_counter() - start) * 1000
+    summary = summarize(results, wall_ms, concurrency)
+    summary["performance"]["feature_map_ms"] = round(feature_map_ms, 2)
+    summary["performance"]["feature_map_products"] = len(product_features)
+    return {"summary": summary, "cases": results}
@@ -0,0 +1,317 @@
+"""
+Write-behind ingestion for LightRAG `/feedback`.
+
+`/feedback` used to keep every payload in an unbounded list and run one Cypher
+update over all edges of the node per request, so a burst of feedback on a hub
+node turned into a write storm. Feedback now goes through `FeedbackWriter`:
+
+- each accepted item is appended to `FeedbackLog`, a JSONL file that rotates
+  by size (`feedback.jsonl`, `feedback.jsonl.1`, ...), and the most recent
+  items are kept in memory for `/feedback-log`;
+- items wait in a bounded queue; when it is full the item is rejected
+  (`/feedback` answers 429) instead of growing memory;
+- a background thread drains the queue every `flush_interval` seconds and
+  coalesces it per node. Every item multiplies the node's edges by
+  `1 + weight`, so the items of a window collapse into one factor
+  `(1 + w1) * (1 + w2) * ...`, written with batched `UNWIND` queries by the
+  `apply` callable (`pipeline.apply_feedback_factors`);
+- `stats()` reports the backlog and the flush lag (time from enqueue to the
+  write that applied it).
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Feedback items waiting for the next flush (further items are rejected with 429)
+FEEDBACK_QUEUE_SIZE = int(os.getenv("FEEDBACK_QUEUE_SIZE", "10000"))
+# Seconds between flushes; items of the same node within a window are coalesced
+FEEDBACK_FLUSH_INTERVAL = float(os.getenv("FEEDBACK_FLUSH_INTERVAL", "0.5"))
+# Append-only feedback log (empty disables the file) and its size-based rotation
+FEEDBACK_LOG_PATH = os.getenv("FEEDBACK_LOG_PATH", "cache/feedback.jsonl")
+FEEDBACK_LOG_MAX_BYTES = int(os.getenv("FEEDBACK_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+FEEDBACK_LOG_BACKUPS = int(os.getenv("FEEDBACK_LOG_BACKUPS", "5"))
+# Most recent items returned by /feedback-log
+FEEDBACK_LOG_RECENT = int(os.getenv("FEEDBACK_LOG_RECENT", "1000"))
+
+LAG_WINDOW = 1024
+
+
+class FeedbackLog:
+    """Append-only JSONL log with size-based rotation and an in-memory tail."""
+
+    def __init__(self, path: Optional[str], max_bytes: int = 10 * 1024 * 1024, backups: int = 5, recent: int = 1000):
+        self.path = path or None
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.rotations = 0
+        self.errors = 0
+        self._recent: deque = deque(maxlen=recent)
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def _rotate(self) -> None:
+        """feedback.jsonl -> .1 -> .2 ... -> .<backups> (the oldest is dropped)."""
+        self._file.close()
+        self._file = None
+        if self.backups > 0:
+            for index in range(self.backups - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+
+    def _write(self, record: Dict) -> None:
+        if not self.path:
+            return
+        try:
+            f = self._open()
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            if self.max_bytes and f.tell() >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            self.errors += 1
+            print(f"⚠ Feedback log write failed: {e}")
+
+    def append(self, record: Dict) -> None:
+        with self._lock:
+            self._recent.append(record)
+            self._write(record)
+
+    def recent(self) -> List[Dict]:
+        with self._lock:
+            return list(self._recent)
+
+    def clear_recent(self, reason: str) -> None:
+        """Forget the in-memory tail; the file keeps everything and gets a marker line."""
+        with self._lock:
+            self._recent.clear()
+            self._write({"event": "clear", "reason": reason, "ts": time.time()})
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> Dict:
+        size = None
+        if self.path and os.path.exists(self.path):
+            size = os.path.getsize(self.path)
+        return {
+            "path": self.path,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "backups": self.backups,
+            "rotations": self.rotations,
+            "recent": len(self._recent),
+            "errors": self.errors,
+        }
+
+
+class FeedbackWriter:
+    """
+    Bounded queue of feedback items, flushed per node in the background.
+
+    `apply(factors)` receives {node_id: factor} and returns a dict with at
+    least "edges". If it raises, the factors stay pending and are merged into
+    the next flush, so no accepted item is lost while Neo4j is unavailable.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[Dict[str, float]], Dict],
+        log: FeedbackLog,
+        max_queue: int = 10000,
+        flush_interval: float = 0.5,
+    ):
+        self.apply = apply
+        self.log = log
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Tuple[str, float, float]]" = queue.Queue(maxsize=max_queue)
+        # Guards the queue drain together with _oldest (the enqueue time of the oldest queued item)
+        self._enqueue_lock = threading.Lock()
+        self._oldest: Optional[float] = None
+        # Serializes flushes, clear() and hold(); reentrant so flush() works inside hold()
+        self._flush_lock = threading.RLock()
+        self._pending: Dict[str, float] = {}
+        self._pending_events = 0
+        self._pending_since: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lags: deque = deque(maxlen=LAG_WINDOW)
+        self.accepted = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.flushed_events = 0
+        self.flushed_nodes = 0
+        self.edges_updated = 0
+        self.write_errors = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+        self.last_flush: Optional[Dict] = None
+
+    def submit(self, node_id: str, weight: float) -> bool:
+        """Queue one item; False if the queue is full (the item is neither queued nor logged)."""
+        now = time.monotonic()
+        with self._enqueue_lock:
+            try:
+                self._queue.put_nowait((node_id, 1.0 + weight, now))
+            except queue.Full:
+                self.rejected += 1
+                return False
+            if self._oldest is None:
+                self._oldest = now
+            self.accepted += 1
+        self.log.append({"node_id": node_id, "weight": weight, "ts": time.time()})
+        return True
+
+    def _drain(self) -> Tuple[List[Tuple[str, float, float]], Optional[float]]:
+        items = []
+        with self._enqueue_lock:
+            oldest, self._oldest = self._oldest, None
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    return items, oldest
+
+    def flush(self) -> Dict:
+        """Coalesce everything queued (plus retried factors) and write it in one batch."""
+        with self._flush_lock:
+            items, oldest = self._drain()
+            factors = self._pending
+            events = self._pending_events + len(items)
+            if self._pending_since is not None:
+                oldest = self._pending_since if oldest is None else min(oldest, self._pending_since)
+            for node_id, factor, _ in items:
+                factors[node_id] = factors.get(node_id, 1.0) * factor
+            if not factors:
+                return {"events": 0, "nodes": 0}
+
+            self._pending, self._pending_events, self._pending_since = {}, 0, None
+            started = time.perf_counter()
+            try:
+                result = self.apply(factors)
+            except Exception as e:
+                # Keep the coalesced factors for the next flush
+                for node_id, factor in factors.items():
+                    self._pending[node_id] = self._pending.get(node_id, 1.0) * factor
+                self._pending_events += events
+                self._pending_since = oldest
+                self.write_errors += 1
+                self.last_error = str(e)
+                print(f"⚠ Feedback flush failed ({events} items kept for retry): {e}")
+                return {"events": events, "nodes": len(factors), "error": str(e)}
+
+            lag = time.monotonic() - oldest
+            self._lags.append(lag)
+            self.flushes += 1
+            self.flushed_events += events
+            self.flushed_nodes += len(factors)
+            self.edges_updated += result.get("edges", 0)
+            self.last_flush = {
+                **result,
+                "events": events,
+                "nodes": len(factors),
+                "write_ms": round((time.perf_counter() - started) * 1000, 2),
+                "lag_ms": round(lag * 1000, 2),
+            }
+            return self.last_flush
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> Dict:
+        """Stop the background thread and flush what is left."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        result = self.flush()
+        self.log.close()
+        return result
+
+    @contextmanager
+    def hold(self):
+        """Keep flushes out while the graph is re-seeded or the snapshot reloaded."""
+        with self._flush_lock:
+            yield
+
+    def clear(self, reason: str) -> int:
+        """Drop queued and pending items (the graph they target is being replaced)."""
+        with self._flush_lock:
+            items, _ = self._drain()
+            dropped = len(items) + self._pending_events
+            self._pending, self._pending_events, self._pending_since = {}, 0, None
+            self.dropped += dropped
+            self.log.clear_recent(reason)
+            return dropped
+
+    def recent(self) -> List[Dict]:
+        return self.log.recent()
+
+    def backlog(self) -> int:
+        """Accepted items not written yet (queued plus pending retry)."""
+        return self._queue.qsize() + self._pending_events
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        oldest = [ts for ts in (self._oldest, self._pending_since) if ts is not None]
+        lags = np.array(self._lags) * 1000 if self._lags else None
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "backlog": self.backlog(),
+            "queued": self._queue.qsize(),
+            "pending_nodes": len(self._pending),
+            "max_queue": self.max_queue,
+            "flush_interval_s": self.flush_interval,
+            "flushes": self.flushes,
+            "flushed_events": self.flushed_events,
+            "flushed_nodes": self.flushed_nodes,
+            # Items per node write: > 1 means coalescing saved writes
+            "coalescing_ratio": round(self.flushed_events / self.flushed_nodes, 2) if self.flushed_nodes else None,
+            "edges_updated": self.edges_updated,
+            "write_errors": self.write_errors,
+            "last_error": self.last_error,
+            "last_flush": self.last_flush,
+            "lag_ms": {
+                "current": round((now - min(oldest)) * 1000, 2) if oldest else 0.0,
+                "p50": round(float(np.percentile(lags, 50)), 2) if lags is not None else None,
+                "p95": round(float(np.percentile(lags, 95)), 2) if lags is not None else None,
+                "max": round(float(lags.max()), 2) if lags is not None else None,
+            },
+            "log": self.log.stats(),
+        }
+
+
+def create_feedback_writer(apply: Callable[[Dict[str, float]], Dict]) -> FeedbackWriter:
+    """FeedbackWriter configured from the FEEDBACK_* environment variables."""
+    log = FeedbackLog(FEEDBACK_LOG_PATH, FEEDBACK_LOG_MAX_BYTES, FEEDBACK_LOG_BACKUPS, FEEDBACK_LOG_RECENT)
+    return FeedbackWriter(apply, log, FEEDBACK_QUEUE_SIZE, FEEDBACK_FLUSH_INTERVAL)
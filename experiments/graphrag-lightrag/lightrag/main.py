@@ -1,13 +1,32 @@
 import os
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
 from pydantic import BaseModel, Field
 
+from common.graph_store import GRAPH_STORE
+from common.vector_index import VECTOR_STORE, AsyncLocalVectorIndex, LocalVectorIndex, open_local_index
+from feedback import create_feedback_writer
+
 # Database clients (initialized on startup)
 neo4j_driver = None
 qdrant_client = None
 embedding_model = None
+# Async Neo4j driver and Qdrant client for /ask-async
+neo4j_async_driver = None
+qdrant_async_client = None
+# Shared keep-alive HTTP client for GraphRAG (created on startup)
+http_client = None
+
+# Connection pool size of the async Neo4j driver (/ask-async holds up to two sessions per request)
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+
+
+def graph_ready(async_io: bool = False) -> bool:
+    """Graph store usable: the in-memory store, or the (async) Neo4j driver is up."""
+    if GRAPH_STORE == "memory":
+        return True
+    return (neo4j_async_driver if async_io else neo4j_driver) is not None
 
 
 class AskPayload(BaseModel):
@@ -15,6 +34,10 @@ class AskPayload(BaseModel):
     top_k: int = Field(4, ge=1, le=20)
     depth: int = Field(2, ge=1, le=4)
     theta: float = Field(0.3, ge=0.0, le=1.0)
+    # Graph walk backend (default: GRAPH_ENGINE)
+    engine: Optional[Literal["neo4j", "snapshot"]] = None
+    # Alpha/beta fusion: weighted sum or reciprocal-rank fusion (default: SCORE_FUSION)
+    fusion: Optional[Literal["weighted", "rrf"]] = None
 
 
 class AskResponse(BaseModel):
@@ -30,8 +53,18 @@ class FeedbackPayload(BaseModel):
     weight: float = Field(..., ge=0.0, le=2.0)
 
 
+class FeedbackEntry(FeedbackPayload):
+    ts: float
+
+
+def _write_feedback(factors: Dict[str, float]) -> Dict:
+    from pipeline import apply_feedback_factors
+    return apply_feedback_factors(factors)
+
+
 app = FastAPI(title="LightRAG API", version="0.1.0")
-feedback_log: List[FeedbackPayload] = []
+# Write-behind feedback: bounded queue, coalesced per node, flushed in the background
+feedback_writer = create_feedback_writer(_write_feedback)
 
 
 class CompareResponse(BaseModel):
@@ -39,49 +72,66 @@ class CompareResponse(BaseModel):
     graphrag: dict
     lightrag: dict
     differences: dict
+    latency_ms: Optional[dict] = None
 
 
-def _calc_differences(gr: dict, lr: dict) -> dict:
+def _calc_differences(gr: dict, lr: dict, top_k: int = 4) -> dict:
+    from evaluation import jaccard, rank_overlap
+    
     diffs = {}
     # node counts (best-effort)
     gr_nodes = gr.get("graph_nodes") or gr.get("metadata", {}).get("graph_nodes") or []
     lr_nodes = lr.get("graph_nodes") or []
     diffs["node_count"] = {"graphrag": len(gr_nodes), "lightrag": len(lr_nodes)}
+    # Set agreement, and rank agreement weighted toward the top of both lists
+    diffs["jaccard"] = round(jaccard(gr_nodes, lr_nodes), 3)
+    diffs["rank_overlap"] = round(rank_overlap(gr_nodes, lr_nodes), 3)
+    diffs["rank_overlap_at_k"] = {"k": top_k, "value": round(rank_overlap(gr_nodes, lr_nodes, top_k), 3)}
+    diffs["shared"] = [n for n in gr_nodes if n in set(lr_nodes)]
+    diffs["only_graphrag"] = [n for n in gr_nodes if n not in set(lr_nodes)]
+    diffs["only_lightrag"] = [n for n in lr_nodes if n not in set(gr_nodes)]
     return diffs
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database connections and embedding model on startup."""
-    global neo4j_driver, qdrant_client, embedding_model
+    global neo4j_driver, qdrant_client, embedding_model, http_client, neo4j_async_driver, qdrant_async_client
     
-    # Initialize Neo4j driver
-    try:
-        from neo4j import GraphDatabase
-        neo4j_uri = os.getenv("NEO4J_URI", "bolt://neo4j:7687")
-        neo4j_user = os.getenv("NEO4J_USER", "neo4j")
-        neo4j_password = os.getenv("NEO4J_PASSWORD", "password")
-        neo4j_driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
-        # Test connection
-        with neo4j_driver.session() as session:
-            session.run("RETURN 1")
-        print(f"✓ Neo4j connection established: {neo4j_uri}")
-    except Exception as e:
-        print(f"⚠ Neo4j connection failed (will retry): {e}")
-        neo4j_driver = None
+    # Initialize Neo4j driver (not needed with the in-memory graph store)
+    if GRAPH_STORE == "memory":
+        print("✓ In-memory graph store (GRAPH_STORE=memory): Neo4j is not used")
+    else:
+        try:
+            from neo4j import GraphDatabase
+            neo4j_uri = os.getenv("NEO4J_URI", "bolt://neo4j:7687")
+            neo4j_user = os.getenv("NEO4J_USER", "neo4j")
+            neo4j_password = os.getenv("NEO4J_PASSWORD", "password")
+            neo4j_driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+            # Test connection
+            with neo4j_driver.session() as session:
+                session.run("RETURN 1")
+            print(f"✓ Neo4j connection established: {neo4j_uri}")
+        except Exception as e:
+            print(f"⚠ Neo4j connection failed (will retry): {e}")
+            neo4j_driver = None
     
-    # Initialize Qdrant client
-    try:
-        from qdrant_client import QdrantClient
-        qdrant_host = os.getenv("QDRANT_HOST", "qdrant")
-        qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
-        qdrant_client = QdrantClient(host=qdrant_host, port=qdrant_port)
-        # Test connection
-        qdrant_client.get_collections()
-        print(f"✓ Qdrant connection established: {qdrant_host}:{qdrant_port}")
-    except Exception as e:
-        print(f"⚠ Qdrant connection failed (will retry): {e}")
-        qdrant_client = None
+    # Initialize Qdrant client (or the in-process index with VECTOR_STORE=local)
+    qdrant_client = open_local_index()
+    if qdrant_client is not None:
+        print(f"✓ Local vector index (VECTOR_STORE=local): {len(qdrant_client.get_collections().collections)} collections in {qdrant_client.path or 'memory'}")
+    else:
+        try:
+            from qdrant_client import QdrantClient
+            qdrant_host = os.getenv("QDRANT_HOST", "qdrant")
+            qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
+            qdrant_client = QdrantClient(host=qdrant_host, port=qdrant_port)
+            # Test connection
+            qdrant_client.get_collections()
+            print(f"✓ Qdrant connection established: {qdrant_host}:{qdrant_port}")
+        except Exception as e:
+            print(f"⚠ Qdrant connection failed (will retry): {e}")
+            qdrant_client = None
     
     # Initialize embedding model (for LightRAG vector retrieval)
     try:
@@ -93,8 +143,42 @@ async def startup_event():
         print(f"⚠ Embedding model loading failed: {e}")
         embedding_model = None
     
+    # Async Neo4j driver and Qdrant client for /ask-async (connect on first use;
+    # no Neo4j driver with the in-memory graph store, and the local vector index
+    # is searched in place)
+    try:
+        from pipeline import initialize_async_clients
+        if GRAPH_STORE != "memory":
+            from neo4j import AsyncGraphDatabase
+            neo4j_async_driver = AsyncGraphDatabase.driver(
+                os.getenv("NEO4J_URI", "bolt://neo4j:7687"),
+                auth=(os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "password")),
+                max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+            )
+        if isinstance(qdrant_client, LocalVectorIndex):
+            qdrant_async_client = AsyncLocalVectorIndex(qdrant_client)
+        else:
+            from qdrant_client import AsyncQdrantClient
+            qdrant_async_client = AsyncQdrantClient(
+                host=os.getenv("QDRANT_HOST", "qdrant"),
+                port=int(os.getenv("QDRANT_PORT", "6333")),
+            )
+        initialize_async_clients(neo4j_async_driver, qdrant_async_client)
+        if neo4j_async_driver:
+            print(f"✓ Async Neo4j driver and Qdrant client created (pool size {NEO4J_MAX_POOL_SIZE})")
+        else:
+            print("✓ Async Qdrant client created")
+    except Exception as e:
+        print(f"⚠ Async client creation failed: {e}")
+        neo4j_async_driver = None
+        qdrant_async_client = None
+    
+    # Pooled HTTP client for GraphRAG requests (/eval, /compare)
+    from evaluation import create_http_client
+    http_client = create_http_client()
+    
     # Initialize pipeline and seed data if clients are ready
-    if neo4j_driver and qdrant_client:
+    if graph_ready() and qdrant_client:
         try:
             from pipeline import initialize_clients, seed_data
             initialize_clients(neo4j_driver, qdrant_client, embedding_model)
@@ -103,15 +187,31 @@ async def startup_event():
             print(f"✓ Data seeding: {result.get('status')}")
         except Exception as e:
             print(f"⚠ Data seeding failed: {e}")
+    
+    feedback_writer.start()
+    print(f"✓ Feedback writer started (flush every {feedback_writer.flush_interval}s)")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connections on shutdown."""
-    global neo4j_driver
+    global neo4j_driver, http_client, neo4j_async_driver, qdrant_async_client
+    # Write what is still queued before the driver goes away
+    result = feedback_writer.stop()
+    if result.get("events"):
+        print(f"✓ Feedback flushed on shutdown: {result['events']} items")
     if neo4j_driver:
         neo4j_driver.close()
         print("✓ Neo4j connection closed")
+    if neo4j_async_driver:
+        await neo4j_async_driver.close()
+        neo4j_async_driver = None
+    if qdrant_async_client:
+        await qdrant_async_client.close()
+        qdrant_async_client = None
+    if http_client:
+        await http_client.aclose()
+        http_client = None
 
 
 @app.get("/healthz")
@@ -123,9 +223,12 @@ def healthcheck() -> dict:
         "version": app.version,
         "connections": {
             "neo4j": neo4j_driver is not None,
+            "neo4j_async": neo4j_async_driver is not None,
             "qdrant": qdrant_client is not None,
             "embedding_model": embedding_model is not None,
         },
+        "graph_store": GRAPH_STORE,
+        "vector_store": VECTOR_STORE,
     }
 
 
@@ -161,13 +264,42 @@ def check_connections() -> dict:
     else:
         result["qdrant"]["error"] = "Client not initialized"
     
+    # Graph store used by the pipeline (Neo4j or in-memory)
+    from pipeline import graph_store
+    result["graph_store"] = graph_store.stats() if graph_store is not None else {"backend": GRAPH_STORE, "error": "Not initialized"}
+    
+    # Vector store: Qdrant server or the local index (VECTOR_STORE=local)
+    result["vector_store"] = qdrant_client.stats() if isinstance(qdrant_client, LocalVectorIndex) else {"backend": VECTOR_STORE}
+    
     return result
 
 
+def _ask_response(payload: AskPayload, result: dict, cache: dict) -> AskResponse:
+    metadata = {
+        "question": payload.question,
+        "params": payload.model_dump(exclude={"question"}),
+        **result.get("metadata", {}),
+        "cache": cache
+    }
+    
+    return AskResponse(
+        answer=result.get("answer", "No answer generated"),
+        vector_nodes=result.get("vector_nodes", []),
+        graph_nodes=[n["name"] for n in result.get("graph_nodes", [])],
+        subgraph=result.get("subgraph"),
+        metadata=metadata
+    )
+
+
 @app.post("/ask", response_model=AskResponse)
-def ask_question(payload: AskPayload) -> AskResponse:
-    """Query LightRAG pipeline."""
-    if not neo4j_driver or not qdrant_client:
+def ask_question(payload: AskPayload, cache_control: Optional[str] = Header(None)) -> AskResponse:
+    """
+    Query LightRAG pipeline.
+    
+    Results are cached per question, parameters and graph version (see /ask-cache);
+    send `Cache-Control: no-cache` to recompute or `no-store` to skip the cache.
+    """
+    if not graph_ready() or not qdrant_client:
         from fastapi import HTTPException
         raise HTTPException(
             status_code=503,
@@ -175,27 +307,60 @@ def ask_question(payload: AskPayload) -> AskResponse:
         )
     
     try:
-        from pipeline import query_lightrag
-        result = query_lightrag(
-            question=payload.question,
-            top_k=payload.top_k,
-            depth=payload.depth,
-            theta=payload.theta
+        from pipeline import answer_cache, query_lightrag, sync_graph_version
+        sync_graph_version()
+        key = answer_cache.key("sync", payload.question, payload.model_dump(exclude={"question"}))
+        result, status = answer_cache.fetch(key, cache_control)
+        if result is None:
+            result = query_lightrag(
+                question=payload.question,
+                top_k=payload.top_k,
+                depth=payload.depth,
+                theta=payload.theta,
+                engine=payload.engine,
+                fusion=payload.fusion
+            )
+            answer_cache.store(key, result, cache_control)
+        return _ask_response(payload, result, {"status": status, "version": key[-1]})
+    except Exception as e:
+        from fastapi import HTTPException
+        raise HTTPException(
+            status_code=500,
+            detail=f"Query failed: {str(e)}"
         )
-        
-        metadata = {
-            "question": payload.question,
-            "params": payload.model_dump(exclude={"question"}),
-            **result.get("metadata", {})
-        }
-        
-        return AskResponse(
-            answer=result.get("answer", "No answer generated"),
-            vector_nodes=result.get("vector_nodes", []),
-            graph_nodes=[n["name"] for n in result.get("graph_nodes", [])],
-            subgraph=result.get("subgraph"),
-            metadata=metadata
+
+
+@app.post("/ask-async", response_model=AskResponse)
+async def ask_question_async(payload: AskPayload, cache_control: Optional[str] = Header(None)) -> AskResponse:
+    """
+    Query LightRAG pipeline on the async Neo4j driver and Qdrant client.
+    
+    Same request, response and result cache as /ask, but the request runs on the
+    event loop instead of holding a threadpool thread while it waits on Neo4j and Qdrant.
+    """
+    if not graph_ready(async_io=True) or not qdrant_async_client:
+        from fastapi import HTTPException
+        raise HTTPException(
+            status_code=503,
+            detail="Database connections not ready"
         )
+    
+    try:
+        from pipeline import answer_cache, query_lightrag_async, sync_graph_version_async
+        await sync_graph_version_async()
+        key = answer_cache.key("async", payload.question, payload.model_dump(exclude={"question"}))
+        result, status = answer_cache.fetch(key, cache_control)
+        if result is None:
+            result = await query_lightrag_async(
+                question=payload.question,
+                top_k=payload.top_k,
+                depth=payload.depth,
+                theta=payload.theta,
+                engine=payload.engine,
+                fusion=payload.fusion
+            )
+            answer_cache.store(key, result, cache_control)
+        return _ask_response(payload, result, {"status": status, "version": key[-1]})
     except Exception as e:
         from fastapi import HTTPException
         raise HTTPException(
@@ -204,56 +369,76 @@ def ask_question(payload: AskPayload) -> AskResponse:
         )
 
 
+@app.get("/ask-cache")
+def get_ask_cache_stats() -> dict:
+    """Hits, misses, evictions and graph version of the /ask result cache."""
+    from pipeline import answer_cache
+    return answer_cache.stats()
+
+
 @app.post("/feedback")
 def submit_feedback(payload: FeedbackPayload) -> dict:
-    """Update edge weights (w_attn) in Neo4j based on feedback."""
-    feedback_log.append(payload)
+    """
+    Queue feedback for the edge weights (w_attn) of a node.
     
-    # Update Neo4j edge weights
-    if neo4j_driver:
-        try:
-            with neo4j_driver.session() as session:
-                # Update w_attn for all edges connected to the specified node
-                # Formula: w_attn = w_attn * (1 + weight) where weight is the feedback value
-                result = session.run("""
-                    MATCH (n {name: $node_id})-[r]-()
-                    SET r.w_attn = coalesce(r.w_attn, 0.0) * (1.0 + $weight),
-                        r.ts = timestamp()
-                    RETURN count(r) as updated_edges
-                """, node_id=payload.node_id, weight=payload.weight)
-                
-                record = result.single()
-                updated_count = record["updated_edges"] if record else 0
-                
-                return {
-                    "status": "accepted",
-                    "count": len(feedback_log),
-                    "updated_edges": updated_count,
-                    "node_id": payload.node_id,
-                    "weight": payload.weight
-                }
-        except Exception as e:
-            return {
-                "status": "accepted_log_only",
-                "count": len(feedback_log),
-                "error": str(e),
-                "note": "Feedback logged but Neo4j update failed"
-            }
+    The background writer applies w_attn = w_attn * (1 + weight) to every edge
+    of the node in the graph store and the snapshot within FEEDBACK_FLUSH_INTERVAL
+    seconds, coalescing the items of the same node. A node that is not in the
+    name catalog answers 404 (nothing would be written), a full queue 429.
+    The graph version is checked first, so a reseed by the GraphRAG service
+    reloads the catalog before the lookup.
+    """
+    from fastapi import HTTPException
+    from pipeline import get_name_catalog, sync_graph_version
+    try:
+        sync_graph_version()
+        known = payload.node_id in get_name_catalog()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Name catalog not available: {str(e)}")
+    if not known:
+        raise HTTPException(status_code=404, detail=f"Unknown node: {payload.node_id}")
     
-    return {"status": "accepted", "count": len(feedback_log)}
+    if not feedback_writer.submit(payload.node_id, payload.weight):
+        raise HTTPException(
+            status_code=429,
+            detail="Feedback queue full, retry later",
+            headers={"Retry-After": str(max(1, round(feedback_writer.flush_interval)))},
+        )
+    
+    return {
+        "status": "queued",
+        "count": feedback_writer.accepted,
+        "backlog": feedback_writer.backlog(),
+        "node_id": payload.node_id,
+        "weight": payload.weight
+    }
+
+
+@app.post("/feedback/flush")
+def flush_feedback() -> dict:
+    """Write queued feedback now instead of waiting for the next flush window."""
+    return feedback_writer.flush()
 
 
-@app.get("/feedback-log", response_model=List[FeedbackPayload])
-def get_feedback_log() -> List[FeedbackPayload]:
-    return feedback_log
+@app.get("/feedback-stats")
+def get_feedback_stats() -> dict:
+    """Backlog, flush lag, coalescing and log rotation metrics of the feedback writer."""
+    return feedback_writer.stats()
+
+
+@app.get("/feedback-log", response_model=List[FeedbackEntry])
+def get_feedback_log() -> List[dict]:
+    """Most recent feedback items (FEEDBACK_LOG_RECENT); the full history is in FEEDBACK_LOG_PATH."""
+    return feedback_writer.recent()
 
 
 @app.post("/reset")
 def reset_state() -> dict:
     """Reset feedback log and re-seed data."""
-    feedback_log.clear()
+    # Queued feedback targets the graph that is about to be rebuilt
+    feedback_writer.clear("reset")
     
-    if not neo4j_driver or not qdrant_client:
+    if not graph_ready() or not qdrant_client:
         from fastapi import HTTPException
         raise HTTPException(status_code=503, detail="Database connections not ready")
     
@@ -261,7 +446,8 @@ def reset_state() -> dict:
         from pipeline import initialize_clients, seed_data
         initialize_clients(neo4j_driver, qdrant_client, embedding_model)
         data_file = os.getenv("DATA_FILE", "data/docs-light.jsonl")
-        result = seed_data(data_file)
+        with feedback_writer.hold():
+            result = seed_data(data_file)
         return {"status": "reset", **result}
     except Exception as e:
         from fastapi import HTTPException
@@ -269,14 +455,19 @@ def reset_state() -> dict:
 
 
 @app.post("/switch-dataset")
-def switch_dataset(file: str) -> dict:
-    """Switch dataset dynamically (similar to kg-no-rag)."""
-    if not neo4j_driver or not qdrant_client:
+def switch_dataset(file: str, incremental: bool = True) -> dict:
+    """
+    Switch dataset dynamically (similar to kg-no-rag).
+    
+    By default only the difference from the loaded dataset is applied;
+    pass incremental=false to clear and rebuild the graph.
+    """
+    if not graph_ready() or not qdrant_client:
         from fastapi import HTTPException
         raise HTTPException(status_code=503, detail="Database connections not ready")
     
     # Validate file name
-    allowed_files = ["data/docs.jsonl", "data/docs-light.jsonl", "data/docs-50.jsonl", "data/docs-300.jsonl", "data/docs-500.jsonl", "data/docs-1000.jsonl"]
+    allowed_files = ["data/docs.jsonl", "data/docs-light.jsonl", "data/docs-50.jsonl", "data/docs-100.jsonl", "data/docs-200.jsonl", "data/docs-300.jsonl", "data/docs-500.jsonl", "data/docs-1000.jsonl"]
     if file not in allowed_files:
         return {
             "status": "error",
@@ -288,14 +479,19 @@ def switch_dataset(file: str) -> dict:
         from pipeline import initialize_clients, seed_data
         initialize_clients(neo4j_driver, qdrant_client, embedding_model)
         
-        # Re-seed data with new file
-        result = seed_data(file)
-        feedback_log.clear()  # Clear feedback log on dataset switch
+        # Re-seed data with new file; queued feedback is written to the old graph first,
+        # and no flush runs while the snapshot is reloaded
+        with feedback_writer.hold():
+            feedback_writer.flush()
+            result = seed_data(file, incremental=incremental)
+            feedback_writer.clear("switch-dataset")  # Clear feedback log on dataset switch
         
         return {
             "status": "success",
             "dataset": file,
             "doc_count": result.get("doc_count", 0),
+            "seed_stats": result.get("seed_stats"),
+            "extraction_cache": result.get("extraction_cache"),
             "message": f"Switched to {file} ({result.get('doc_count', 0)} documents)"
         }
     except FileNotFoundError:
@@ -307,96 +503,69 @@ def switch_dataset(file: str) -> dict:
 
 
 @app.get("/dataset")
-def get_dataset() -> dict:
-    """Get current dataset information."""
-    data_file = os.getenv("DATA_FILE", "data/docs-light.jsonl")
-    
-    # Count documents
-    doc_count = 0
-    try:
-        if os.path.exists(data_file):
-            import json
-            with open(data_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    if line.strip():
-                        doc_count += 1
-    except:
-        pass
+def get_dataset(refresh: bool = False) -> dict:
+    """
+    Get current dataset information.
     
-    # Count nodes in Neo4j graph
-    graph_stats = {}
-    if neo4j_driver:
-        try:
-            with neo4j_driver.session() as session:
-                # Count nodes by label
-                result = session.run("""
-                    MATCH (n)
-                    WITH labels(n)[0] as label, count(n) as count
-                    RETURN collect({label: label, count: count}) as stats
-                """).single()
-                if result and result["stats"]:
-                    graph_stats = {s["label"]: s["count"] for s in result["stats"]}
-                
-                # Total node count
-                total_result = session.run("MATCH (n) RETURN count(n) as total").single()
-                total_nodes = total_result["total"] if total_result else 0
-                
-                # Total edge count
-                edge_result = session.run("MATCH ()-[r]->() RETURN count(r) as total").single()
-                total_edges = edge_result["total"] if edge_result else 0
-                
-                graph_stats["_total_nodes"] = total_nodes
-                graph_stats["_total_edges"] = total_edges
-        except Exception as e:
-            graph_stats["_error"] = str(e)
+    Document count, label histogram, edge counts by type, degree distribution
+    and extraction timings are computed at seed time and served from memory;
+    pass refresh=true to recompute them from the graph store.
+    """
+    from common.extractor import get_extraction_cache
+    from pipeline import get_dataset_stats, get_graph_snapshot_stats, get_name_catalog_stats, query_cache
     
     return {
-        "file": data_file,
-        "count": doc_count,
-        "graph": graph_stats
+        **get_dataset_stats(os.getenv("DATA_FILE", "data/docs-light.jsonl"), refresh=refresh),
+        "extraction_cache": get_extraction_cache().stats(),
+        "query_embedding_cache": query_cache.stats(),
+        "graph_snapshot": get_graph_snapshot_stats(),
+        "name_catalog": get_name_catalog_stats()
     }
 
 
 @app.get("/compare", response_model=CompareResponse)
-def compare(question: str, top_k: int = 4, depth: int = 2, theta: float = 0.3):
-    """Execute same question on GraphRAG and LightRAG, and return diff."""
-    # GraphRAG HTTP call
-    import httpx
-    try:
-        gr_resp = httpx.post(
-            "http://graphrag:8000/ask",
-            json={
-                "question": question,
-                "graph_walk": {"max_depth": depth + 1, "prune_threshold": 0.2},
-            },
-            timeout=20.0,
-        )
-        gr_data = gr_resp.json()
-    except Exception as e:
-        gr_data = {"error": f"GraphRAG request failed: {e}"}
-
-    # LightRAG internal call
-    from pipeline import query_lightrag
-    try:
-        lr_data = query_lightrag(question=question, top_k=max(top_k, 6), depth=depth, theta=theta)
-        # shape to API-like
-        lr_api = {
-            "answer": lr_data.get("answer"),
-            "graph_nodes": [n.get("name") for n in lr_data.get("graph_nodes", [])],
-            "metadata": lr_data.get("metadata", {}),
-        }
-    except Exception as e:
-        lr_api = {"error": f"LightRAG query failed: {e}"}
+async def compare(
+    question: str,
+    top_k: int = 4,
+    depth: int = 2,
+    theta: float = 0.3,
+    engine: Optional[str] = None,
+    graphrag_timeout: Optional[float] = None,
+    lightrag_timeout: Optional[float] = None,
+):
+    """
+    Execute same question on GraphRAG and LightRAG concurrently, and return diff.
+    
+    Timeouts default to GRAPHRAG_TIMEOUT / LIGHTRAG_TIMEOUT; `latency_ms` breaks
+    down the time spent on each side.
+    """
+    from evaluation import GRAPHRAG_TIMEOUT, LIGHTRAG_TIMEOUT, compare_question, create_http_client
+    params = dict(
+        top_k=top_k, depth=depth, theta=theta, engine=engine,
+        graphrag_timeout=graphrag_timeout or GRAPHRAG_TIMEOUT,
+        lightrag_timeout=lightrag_timeout or LIGHTRAG_TIMEOUT,
+    )
+    if http_client is None:
+        async with create_http_client() as client:
+            result = await compare_question(client, question, **params)
+    else:
+        result = await compare_question(http_client, question, **params)
 
-    diffs = _calc_differences(gr_data, lr_api)
-    return CompareResponse(question=question, graphrag=gr_data, lightrag=lr_api, differences=diffs)
+    gr_data, lr_api = result["graphrag"], result["lightrag"]
+    diffs = _calc_differences(gr_data, lr_api, top_k=top_k)
+    return CompareResponse(question=question, graphrag=gr_data, lightrag=lr_api, differences=diffs, latency_ms=result["latency_ms"])
 
 
 @app.get("/eval")
-def eval_all() -> dict:
-    """Run predefined questions and summarize results for both systems."""
+async def eval_all(concurrency: Optional[int] = None) -> dict:
+    """
+    Run predefined questions and summarize results for both systems.
+    
+    Questions run concurrently (at most `concurrency`, default EVAL_CONCURRENCY)
+    and GraphRAG/LightRAG run in parallel for each question.
+    """
     import json as _json
-    import httpx
+    from evaluation import EVAL_CONCURRENCY, create_http_client, run_eval
     questions_path = os.getenv("QUESTIONS_FILE", "questions.json")
     try:
         with open(questions_path, "r", encoding="utf-8") as f:
@@ -404,126 +573,8 @@ def eval_all() -> dict:
     except Exception as e:
         return {"error": f"failed to read questions.json: {e}"}
 
-    results = []
-    ok_gr = ok_lr = 0
-
-    def expand_with_related_features(nodes: set) -> set:
-        if not nodes or not neo4j_driver:
-            return nodes
-
-        expanded = set(nodes)
-        with neo4j_driver.session() as session:
-            for name in list(nodes):
-                result = session.run(
-                    """
-                    MATCH (:Product {name: $name})-[:HAS_FEATURE]->(f:Feature)
-                    RETURN f.name as feature
-                    """,
-                    name=name,
-                )
-                for record in result:
-                    feature_name = record.get("feature")
-                    if feature_name:
-                        expanded.add(feature_name)
-        return expanded
-
-    for it in qs:
-        q = it.get("ask")
-        expected = set(it.get("expected", []))
-
-        # GraphRAG
-        import time
-        gr_start = time.time()
-        try:
-            gr = httpx.post(
-                "http://graphrag:8000/ask",
-                json={"question": q, "graph_walk": {"max_depth": 3, "prune_threshold": 0.2}},
-                timeout=20.0,
-            ).json()
-            gr_latency = time.time() - gr_start
-            gr_nodes_raw = set(gr.get("metadata", {}).get("graph_nodes", []) or gr.get("graph_nodes", []) or [])
-            gr_metadata = gr.get("metadata", {})
-            gr_nodes_explored = gr_metadata.get("nodes_explored", 0)
-            gr_nodes_returned = gr_metadata.get("nodes_returned", 0)
-            gr_actual_depth = gr_metadata.get("actual_depth", 0)
-        except Exception as e:
-            gr_latency = time.time() - gr_start
-            gr_nodes_raw = set()
-            gr_nodes_explored = 0
-            gr_nodes_returned = 0
-            gr_actual_depth = 0
-
-        # LightRAG (internal)
-        lr_start = time.time()
-        from pipeline import query_lightrag
-        try:
-            lr = query_lightrag(question=q, top_k=6, depth=2, theta=0.3)
-            lr_latency = time.time() - lr_start
-            lr_nodes_raw = set([n.get("name") if isinstance(n, dict) else n for n in lr.get("graph_nodes", [])])
-            lr_metadata = lr.get("metadata", {})
-            lr_subgraph = lr.get("subgraph", {})
-            lr_nodes_explored = lr_subgraph.get("total_nodes", 0) if isinstance(lr_subgraph, dict) else 0
-            lr_nodes_returned = len(lr_nodes_raw)
-            lr_actual_depth = lr_subgraph.get("depth", 0) if isinstance(lr_subgraph, dict) else 0
-        except Exception as e:
-            lr_latency = time.time() - lr_start
-            lr_nodes_raw = set()
-            lr_nodes_explored = 0
-            lr_nodes_returned = 0
-            lr_actual_depth = 0
-
-        gr_nodes = expand_with_related_features(gr_nodes_raw)
-        lr_nodes = expand_with_related_features(lr_nodes_raw)
-
-        v_gr = bool(expected) and expected.issubset(gr_nodes) or (not expected and bool(gr_nodes))
-        v_lr = bool(expected) and expected.issubset(lr_nodes) or (not expected and bool(lr_nodes))
-        ok_gr += int(v_gr); ok_lr += int(v_lr)
-        results.append({
-            "id": it.get("id"), "ask": q,
-            "expected": list(expected),
-            "graphrag_nodes": sorted(gr_nodes),
-            "lightrag_nodes": sorted(lr_nodes),
-            "gr_ok": v_gr, "lr_ok": v_lr,
-            # Additional metrics for comparison
-            "graphrag_metrics": {
-                "nodes_explored": gr_nodes_explored,
-                "nodes_returned": gr_nodes_returned,
-                "actual_depth": gr_actual_depth,
-                "latency_ms": round(gr_latency * 1000, 2),
-            },
-            "lightrag_metrics": {
-                "nodes_explored": lr_nodes_explored,
-                "nodes_returned": lr_nodes_returned,
-                "actual_depth": lr_actual_depth,
-                "latency_ms": round(lr_latency * 1000, 2),
-            },
-        })
-
-    # Calculate aggregated metrics
-    total_gr_explored = sum(r.get("graphrag_metrics", {}).get("nodes_explored", 0) for r in results)
-    total_lr_explored = sum(r.get("lightrag_metrics", {}).get("nodes_explored", 0) for r in results)
-    avg_gr_latency = sum(r.get("graphrag_metrics", {}).get("latency_ms", 0) for r in results) / len(results) if results else 0
-    avg_lr_latency = sum(r.get("lightrag_metrics", {}).get("latency_ms", 0) for r in results) / len(results) if results else 0
-    
-    return {
-        "summary": {
-            "graphrag_ok": ok_gr,
-            "lightrag_ok": ok_lr,
-            "total": len(results),
-            "accuracy": {
-                "graphrag": f"{ok_gr}/{len(results)}",
-                "lightrag": f"{ok_lr}/{len(results)}",
-            },
-            "exploration": {
-                "graphrag_total_nodes_explored": total_gr_explored,
-                "lightrag_total_nodes_explored": total_lr_explored,
-                "graphrag_avg_explored_per_query": round(total_gr_explored / len(results), 1) if results else 0,
-                "lightrag_avg_explored_per_query": round(total_lr_explored / len(results), 1) if results else 0,
-            },
-            "performance": {
-                "graphrag_avg_latency_ms": round(avg_gr_latency, 2),
-                "lightrag_avg_latency_ms": round(avg_lr_latency, 2),
-            },
-        },
-        "cases": results,
-    }
+    from pipeline import graph_store
+    if http_client is None:
+        async with create_http_client() as client:
+            return await run_eval(client, qs, graph_store, concurrency or EVAL_CONCURRENCY)
+    return await run_eval(http_client, qs, graph_store, concurrency or EVAL_CONCURRENCY)
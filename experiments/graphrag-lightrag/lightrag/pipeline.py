@@ -2,118 +2,561 @@
 LightRAG pipeline implementation.
 This implements the core LightRAG algorithm with hierarchical retrieval.
 """
+import asyncio
+import hashlib
 import os
 import re
-from typing import List, Dict, Optional, Set
+import time
+import uuid
+from typing import List, Dict, Optional, Set, Tuple
+import numpy as np
 from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct
+from qdrant_client.models import VectorParams, Distance, PointStruct, PointIdsList
 from neo4j import GraphDatabase
 
+from common.answer_cache import AnswerCache
+from common.extractor import extract_entities, get_extraction_cache
+from common.graph_snapshot import GraphSnapshot
+from common.graph_store import GraphStore, create_graph_store, graph_summary
+from common.name_index import NameCatalog
+from common.vector_index import LocalVectorIndex
+from embedding_cache import EmbeddingCache, QueryEmbeddingCache
+from scoring import FUSION_METHODS, CandidateScores, normalize_min_max
+
 # Global clients (initialized from main.py)
 neo4j_driver = None
 qdrant_client = None
 embedding_model = None
 
+# Async clients for query_lightrag_async (initialized from main.py)
+neo4j_async_driver = None
+qdrant_async_client = None
 
-def extract_entities(text: str) -> Dict[str, List[str]]:
-    """
-    Extract entities (products, features, policies) from text using pattern matching.
-    This is a simplified NER implementation for demonstration purposes.
-    """
-    entities = {
-        "products": [],
-        "features": [],
-        "policies": []
-    }
-    
-    # Known products and features that should be prioritized (extract first)
-    known_products = ["Acme Search", "Globex Graph"]
-    known_features = ["Semantic Index", "Policy Audit", "Realtime Query"]
-    
-    for known_product in known_products:
-        if known_product in text and known_product not in entities["products"]:
-            entities["products"].append(known_product)
-    
-    for known_feature in known_features:
-        if known_feature in text and known_feature not in entities["features"]:
-            entities["features"].append(known_feature)
-    
-    # Product patterns: "Name Platform", "Name Pro", "Name Suite", "Name Manager", etc.
-    # Also includes known products like "Acme Search", "Globex Graph"
-    # Exclude known features from product patterns
-    product_patterns = [
-        r'\b([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*)*)\s+(?:Platform|Pro|Suite|Manager|Engine|System|Tool|Service|Core|Hub|Framework|Studio|Builder)\b',
-        r'\b([A-Z][a-zA-Z]+\s+(?:Search|Graph|Vault|Guard|Bridge|Optimizer|Collector|Analyzer|Scanner|Delivery|Campaign|Bot))\b',  # Removed Index from this pattern
-        r'\b(Acme\s+Search|Globex\s+Graph|CloudBridge\s+Platform|DataVault\s+Pro|NetworkGuard\s+Suite)\b',
-        # Also match standalone product names that appear in "Product Name は" pattern
-        r'\b([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*)\s+は'
-    ]
-    
-    for pattern in product_patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            product_name = match if isinstance(match, str) else match[0] if isinstance(match, tuple) else str(match)
-            product_name = product_name.strip()
-            # Filter out common Japanese words, policy names, and known features
-            if (len(product_name) > 3 and 
-                product_name not in ["POL-001", "POL-002", "Personal", "Data", "Protection", "Model", "Governance"] and
-                product_name not in entities["products"] and
-                product_name not in entities["features"]):  # Don't add if already identified as a feature
-                entities["products"].append(product_name)
-    
-    # Feature patterns: "Feature Name" (typically capitalized words)
-    feature_patterns = [
-        r'\b(Semantic\s+Index|Policy\s+Audit|Realtime\s+Query)\b',  # Known features (already added above, but keep for consistency)
-        r'\b([A-Z][a-zA-Z]+\s+(?:Index|Query|Audit|Engine|Manager|Optimizer|Analyzer|Scanner|Framework|Builder))\b',
-        # Features that appear after "機能" or "を提供" or "を搭載"
-        r'(?:機能|を提供|を搭載)[する]?\s*([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*)'
-    ]
-    
-    for pattern in feature_patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            feature_name = match if isinstance(match, str) else match[0] if isinstance(match, tuple) else str(match)
-            feature_name = feature_name.strip()
-            if (len(feature_name) > 3 and 
-                feature_name not in entities["features"] and
-                feature_name not in entities["products"]):  # Avoid duplicates
-                entities["features"].append(feature_name)
-    
-    # Policy patterns: POL-XXX or "Policy Name (POL-XXX)"
-    policy_patterns = [
-        r'\bPOL-(\d+)\b',
-        r'\(POL-(\d+)\)',
-        r'\b(Personal\s+Data\s+Protection|AI\s+Model\s+Governance)\b'
-    ]
-    
-    for pattern in policy_patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            if isinstance(match, tuple):
-                match = match[0] if match else ""
-            policy_id = f"POL-{match}" if match.isdigit() else match
-            policy_id = policy_id.strip()
-            if policy_id and policy_id not in entities["policies"]:
-                entities["policies"].append(policy_id)
-    
-    return entities
+# Graph store on the Neo4j drivers above, or in-memory (GRAPH_STORE=memory)
+graph_store: Optional[GraphStore] = None
+
+
+# Rows per UNWIND transaction when seeding the graph store
+SEED_BATCH_SIZE = int(os.getenv("SEED_BATCH_SIZE", "1000"))
+# Nodes per UNWIND query when writing coalesced feedback (one transaction per flush)
+FEEDBACK_BATCH_SIZE = int(os.getenv("FEEDBACK_BATCH_SIZE", "500"))
+
+# Embedding stage: texts per model.encode call, points per Qdrant upsert, vector cache location
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "256"))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "cache")
+
+# Query embedding cache: max entries (0 disables) and TTL in seconds (0 never expires)
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "1024"))
+QUERY_EMBED_CACHE_TTL = float(os.getenv("QUERY_EMBED_CACHE_TTL", "3600"))
+
+# Text keywords that mark a Product-Product relationship (dependency/compatibility)
+RELATION_KEYWORDS = ["依存", "連携", "統合", "互換", "利用"]
+
+NODE_LABELS = ["Product", "Feature", "Policy"]
+
+# (relationship type, source label, target label)
+EDGE_TYPES = [
+    ("HAS_FEATURE", "Product", "Feature"),
+    ("REGULATES", "Feature", "Policy"),
+    ("RELATES_TO", "Product", "Product"),
+]
+
+# Score integration: fusion method ("weighted" or "rrf"), alpha weight for
+# "weighted" (beta gets 1 - weight) and the k constant for "rrf"
+SCORE_FUSION = os.getenv("SCORE_FUSION", "weighted")
+ALPHA_WEIGHT = float(os.getenv("ALPHA_WEIGHT", "0.6"))
+RRF_K = float(os.getenv("RRF_K", "60"))
+
+# Disk-backed vector cache for document embeddings (created on first seed)
+vector_cache = None
+
+# In-memory LRU cache for question embeddings
+query_cache = QueryEmbeddingCache(EMBEDDING_MODEL_NAME, QUERY_EMBED_CACHE_SIZE, QUERY_EMBED_CACHE_TTL)
+
+# Versioned /ask result cache: max entries (0 disables); seeding and feedback bump the version
+ASK_CACHE_SIZE = int(os.getenv("ASK_CACHE_SIZE", "1024"))
+answer_cache = AnswerCache(ASK_CACHE_SIZE)
+
+# Seconds between two reads of the graph version behind /ask (0: every request). A version
+# written by the GraphRAG service's seed drops the cached answers (see sync_graph_version)
+GRAPH_VERSION_CHECK_SECONDS = float(os.getenv("GRAPH_VERSION_CHECK_SECONDS", "2"))
+_graph_version_checked = 0.0
+
+# Dataset currently loaded into the graph store and Qdrant (document keys, graph rows and
+# the graph version written with them), used by seed_data(incremental=True) to apply only the delta
+_loaded_state: Optional[Dict] = None
+
+# Graph walk backend: "neo4j" (one graph store query per level, whatever GRAPH_STORE is)
+# or "snapshot" (in-process CSR copy)
+GRAPH_ENGINES = ("neo4j", "snapshot")
+GRAPH_ENGINE = os.getenv("GRAPH_ENGINE", "neo4j")
+
+# In-process graph snapshot, updated by feedback: reloaded after every seed with
+# GRAPH_ENGINE=snapshot, otherwise loaded on first use (a snapshot request)
+_graph_snapshot: Optional[GraphSnapshot] = None
+
+# Name -> label catalog with an n-gram substring index, reloaded after every seed
+_name_catalog: Optional[NameCatalog] = None
+
+# Statistics served by /dataset, computed after every seed (see get_dataset_stats)
+_dataset_stats: Optional[Dict] = None
 
 
 def initialize_clients(neo4j_drv, qdrant_clt, emb_model=None):
-    """Initialize pipeline with database clients and embedding model."""
-    global neo4j_driver, qdrant_client, embedding_model
+    """Initialize pipeline with database clients and embedding model (neo4j_drv is None with GRAPH_STORE=memory)."""
+    global neo4j_driver, qdrant_client, embedding_model, graph_store
     neo4j_driver = neo4j_drv
     qdrant_client = qdrant_clt
     embedding_model = emb_model
+    graph_store = create_graph_store(neo4j_driver, neo4j_async_driver, graph_store)
+
+
+def initialize_async_clients(neo4j_drv, qdrant_clt):
+    """Initialize the async Neo4j driver and Qdrant client used by query_lightrag_async."""
+    global neo4j_async_driver, qdrant_async_client, graph_store
+    neo4j_async_driver = neo4j_drv
+    qdrant_async_client = qdrant_clt
+    graph_store = create_graph_store(neo4j_driver, neo4j_async_driver, graph_store)
+
+
+def get_graph_snapshot() -> GraphSnapshot:
+    """Return the in-process graph snapshot, loading it from the graph store if needed."""
+    global _graph_snapshot
+    if _graph_snapshot is None:
+        if graph_store is None:
+            raise RuntimeError("Graph store not initialized")
+        _graph_snapshot = GraphSnapshot.load(graph_store)
+    return _graph_snapshot
+
+
+def get_graph_snapshot_stats() -> Optional[Dict]:
+    """Stats of the loaded snapshot, or None if it is not loaded."""
+    return _graph_snapshot.stats() if _graph_snapshot is not None else None
+
+
+def refresh_graph_snapshot() -> Optional[GraphSnapshot]:
+    """Reload the snapshot after the graph changed; on failure it is reloaded lazily."""
+    global _graph_snapshot
+    _graph_snapshot = None
+    try:
+        snapshot = get_graph_snapshot()
+    except Exception as e:
+        print(f"⚠ Graph snapshot reload failed (will retry on first use): {e}")
+        return None
+    print(f"✓ Graph snapshot loaded: {snapshot.node_count} nodes, {snapshot.edge_count} edges")
+    return snapshot
+
+
+def get_name_catalog() -> NameCatalog:
+    """Return the name -> label catalog, loading it from the graph store if needed."""
+    global _name_catalog
+    if _name_catalog is None:
+        if graph_store is None:
+            raise RuntimeError("Graph store not initialized")
+        _name_catalog = NameCatalog.from_store(graph_store)
+    return _name_catalog
+
+
+def get_name_catalog_stats() -> Optional[Dict]:
+    """Stats of the loaded catalog, or None if it is not loaded."""
+    return _name_catalog.stats() if _name_catalog is not None else None
+
+
+def refresh_name_catalog() -> Optional[NameCatalog]:
+    """Reload the catalog after the graph changed; on failure it is reloaded lazily."""
+    global _name_catalog
+    _name_catalog = None
+    try:
+        catalog = get_name_catalog()
+    except Exception as e:
+        print(f"⚠ Name catalog reload failed (will retry on first use): {e}")
+        return None
+    print(f"✓ Name catalog loaded: {len(catalog)} names")
+    return catalog
+
+
+def _graph_version_due() -> bool:
+    global _graph_version_checked
+    now = time.monotonic()
+    if graph_store is None or now - _graph_version_checked < GRAPH_VERSION_CHECK_SECONDS:
+        return False
+    _graph_version_checked = now
+    return True
+
+
+def _on_graph_version(version: Optional[str]) -> bool:
+    """Drop the cached answers, snapshot and catalog if the graph was reseeded elsewhere."""
+    global _graph_snapshot, _name_catalog
+    if not answer_cache.sync(version):
+        return False
+    print("⚠ Graph version changed outside this service, cached answers dropped")
+    # Reloaded on first use
+    _graph_snapshot = None
+    _name_catalog = None
+    return True
+
+
+def sync_graph_version() -> bool:
+    """
+    Compare the version stored with the graph (at most every
+    GRAPH_VERSION_CHECK_SECONDS) with the one of the cached answers. The
+    GraphRAG service seeds the same Neo4j graph without telling this one.
+    """
+    if not _graph_version_due():
+        return False
+    return _on_graph_version(graph_store.graph_version())
+
+
+async def sync_graph_version_async() -> bool:
+    """sync_graph_version on the async driver."""
+    if not _graph_version_due():
+        return False
+    return _on_graph_version(await graph_store.graph_version_async())
+
+
+def _count_docs(data_file: str) -> int:
+    """Number of non-empty lines in a JSONL file (0 if it does not exist)."""
+    if not os.path.exists(data_file):
+        return 0
+    with open(data_file, "r", encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def refresh_dataset_stats(
+    data_file: str,
+    doc_count: Optional[int] = None,
+    extraction: Optional[Dict] = None
+) -> Dict:
+    """
+    Recompute the /dataset statistics from the graph store and cache them.
+    
+    The graph part counts the store's (label, name) nodes, not the snapshot
+    (which merges same-named nodes), so it matches `graph_store.stats()`.
+    seed_data passes the document count and extraction timings it measured;
+    otherwise the file is counted once and the last extraction timings for the
+    same file are kept.
+    """
+    global _dataset_stats
+    previous = _dataset_stats if _dataset_stats and _dataset_stats["file"] == data_file else None
+    if doc_count is None:
+        doc_count = _count_docs(data_file)
+    if extraction is None and previous:
+        extraction = previous["extraction"]
+    try:
+        if graph_store is None:
+            raise RuntimeError("Graph store not initialized")
+        graph = graph_summary(graph_store)
+    except Exception as e:
+        graph = {"_error": str(e)}
+    _dataset_stats = {
+        "file": data_file,
+        "count": doc_count,
+        "graph": graph,
+        "extraction": extraction,
+        "computed_at": time.time(),
+    }
+    if "_error" in graph:
+        print(f"⚠ Dataset stats computed without graph (will retry on next request): {graph['_error']}")
+    else:
+        print(f"✓ Dataset stats computed: {doc_count} documents, {graph['nodes']} nodes, {graph['edges']} edges")
+    return _dataset_stats
+
+
+def get_dataset_stats(default_file: str, refresh: bool = False) -> Dict:
+    """
+    Dataset statistics served from memory (no file read or graph query).
+    
+    Computed at the end of every seed. They are recomputed on first use when
+    this process has not seeded, after a failed graph read, or with
+    `refresh=True` (reads the graph store again and recounts the file).
+    """
+    stats = _dataset_stats
+    data_file = stats["file"] if stats else default_file
+    if refresh or stats is None:
+        stats = refresh_dataset_stats(data_file)
+    elif "_error" in stats["graph"]:
+        # Retry the graph part only; the document count is already known
+        stats = refresh_dataset_stats(data_file, stats["count"])
+    return stats
+
+
+def apply_feedback_factors(factors: Dict[str, float], batch_size: Optional[int] = None) -> Dict:
+    """
+    Write coalesced feedback (node -> product of 1 + weight) to the graph store and the snapshot.
+    
+    Nodes are grouped by label through the name catalog, and every group is
+    written with `UNWIND` queries of batch_size rows, so a flush costs a few
+    queries however many items it coalesced. All queries run in one
+    transaction: if it fails nothing was applied, and the caller can retry
+    the same factors. Unknown names are skipped.
+    """
+    if graph_store is None:
+        raise RuntimeError("Graph store not initialized")
+    batch_size = batch_size or FEEDBACK_BATCH_SIZE
+    
+    groups = get_name_catalog().group_by_label(factors)
+    edges, queries = graph_store.scale_attention(groups, factors, batch_size)
+    
+    # Keep the in-process graph snapshot in step with the graph store
+    if _graph_snapshot is not None:
+        for name, factor in factors.items():
+            _graph_snapshot.scale_attention(name, factor)
+    # Cached /ask results were ranked with the old weights
+    answer_cache.bump("feedback")
+    
+    known = {name for names in groups.values() for name in names}
+    return {"edges": edges, "queries": queries, "unknown_nodes": len(factors) - len(known)}
+
+
+def aggregate_graph_rows(docs: List[Dict], doc_entities: List[Dict[str, List[str]]]) -> Dict:
+    """
+    Aggregate per-document relationships into unique edges and final node degrees.
+    
+    Each unique edge is counted once for `degree` no matter how many documents
+    mention it; `mentions` keeps the multiplicity and `doc_ref` the last
+    document that mentioned it.
+    """
+    nodes = {label: {} for label in NODE_LABELS}
+    edges = {rel_type: {} for rel_type, _, _ in EDGE_TYPES}
+    mentions = 0
+    
+    def add_edge(rel_type: str, source: str, target: str, doc_id: str):
+        edge = edges[rel_type].get((source, target))
+        if edge is None:
+            edges[rel_type][(source, target)] = {"source": source, "target": target, "mentions": 1, "doc_ref": doc_id}
+        else:
+            edge["mentions"] += 1
+            edge["doc_ref"] = doc_id
+    
+    for doc, entities in zip(docs, doc_entities):
+        doc_id = doc.get("id", "")
+        text = doc.get("text", "")
+        products = entities["products"]
+        features = entities["features"]
+        policies = entities["policies"]
+        
+        for label, names in (("Product", products), ("Feature", features), ("Policy", policies)):
+            for name in names:
+                nodes[label].setdefault(name, {"name": name, "degree": 0, "doc_ref": None})
+        
+        # Product-Feature relationships
+        for product in products:
+            for feature in features:
+                add_edge("HAS_FEATURE", product, feature, doc_id)
+                mentions += 1
+                nodes["Product"][product]["doc_ref"] = doc_id
+        
+        # Feature-Policy relationships (any feature that mentions a policy)
+        # Also create if text mentions "Policy" near a feature
+        if "Policy" in text or any("Policy" in f or "POL" in p for f in features for p in policies):
+            for feature in features:
+                for policy in policies:
+                    add_edge("REGULATES", feature, policy, doc_id)
+                    mentions += 1
+        
+        # Product-Product relationships (if text mentions dependency/compatibility)
+        if any(keyword in text for keyword in RELATION_KEYWORDS):
+            for i in range(len(products)):
+                for j in range(i + 1, len(products)):
+                    add_edge("RELATES_TO", products[i], products[j], doc_id)
+                    mentions += 1
+    
+    for rel_type, source_label, target_label in EDGE_TYPES:
+        for source, target in edges[rel_type]:
+            nodes[source_label][source]["degree"] += 1
+            nodes[target_label][target]["degree"] += 1
+    
+    return {
+        "nodes": {label: list(rows.values()) for label, rows in nodes.items()},
+        "edges": {rel_type: list(rows.values()) for rel_type, rows in edges.items()},
+        "mentions": mentions,
+    }
+
+
+def get_embedding_cache():
+    """Vector cache for the current embedding model (None without a model)."""
+    global vector_cache
+    if embedding_model is None:
+        return None
+    dim = embedding_model.get_sentence_embedding_dimension()
+    if vector_cache is None or vector_cache.dim != dim:
+        vector_cache = EmbeddingCache(EMBEDDING_CACHE_DIR or None, EMBEDDING_MODEL_NAME, dim)
+    return vector_cache
+
+
+def embed_and_upsert(items: List, collection_name: str) -> int:
+    """
+    Embed (key, doc) items and upsert them to Qdrant in chunks.
+    
+    Each chunk of UPSERT_BATCH_SIZE documents is encoded in batches of
+    EMBED_BATCH_SIZE (through the vector cache) and upserted before the next
+    one starts, so peak memory is bounded by one chunk.
+    """
+    cache = get_embedding_cache()
+    for start in range(0, len(items), UPSERT_BATCH_SIZE):
+        chunk = items[start:start + UPSERT_BATCH_SIZE]
+        vectors = cache.encode(embedding_model, [doc.get("text", "") for _, doc in chunk], batch_size=EMBED_BATCH_SIZE)
+        qdrant_client.upsert(
+            collection_name=collection_name,
+            points=[
+                PointStruct(
+                    id=_point_id(key),
+                    vector=vector.tolist(),
+                    payload={
+                        "id": doc.get("id", ""),
+                        "text": doc.get("text", "")
+                    }
+                )
+                for (key, doc), vector in zip(chunk, vectors)
+            ]
+        )
+    return len(items)
+
+
+def _vector_store_name() -> str:
+    return "local index" if isinstance(qdrant_client, LocalVectorIndex) else "Qdrant"
+
+
+def _doc_key(doc: Dict) -> str:
+    """Identity of a document: its id plus a hash of its text."""
+    digest = hashlib.blake2b(doc.get("text", "").encode("utf-8"), digest_size=8).hexdigest()
+    return f"{doc.get('id', '')}:{digest}"
+
+
+def _point_id(doc_key: str) -> str:
+    """Stable Qdrant point id (UUID) for a document key."""
+    return str(uuid.UUID(bytes=hashlib.blake2b(doc_key.encode("utf-8"), digest_size=16).digest()))
+
+
+def diff_graph_rows(old: Dict, new: Dict) -> Dict[str, Dict]:
+    """
+    Compare two aggregate_graph_rows results.
+    
+    Returns `upsert` (nodes/edges that are new or whose degree, mentions or
+    doc_ref changed) and `delete` (nodes/edges that are gone), both shaped
+    like aggregate_graph_rows.
+    """
+    def split(old_rows: List[Dict], new_rows: List[Dict], columns):
+        old_index = {tuple(row[c] for c in columns): row for row in old_rows}
+        new_index = {tuple(row[c] for c in columns): row for row in new_rows}
+        upsert = [row for k, row in new_index.items() if old_index.get(k) != row]
+        delete = [row for k, row in old_index.items() if k not in new_index]
+        return upsert, delete
+    
+    upsert = {"nodes": {}, "edges": {}, "mentions": new["mentions"]}
+    delete = {"nodes": {}, "edges": {}}
+    for label in NODE_LABELS:
+        upsert["nodes"][label], delete["nodes"][label] = split(
+            old["nodes"][label], new["nodes"][label], ("name",)
+        )
+    for rel_type, _, _ in EDGE_TYPES:
+        upsert["edges"][rel_type], delete["edges"][rel_type] = split(
+            old["edges"][rel_type], new["edges"][rel_type], ("source", "target")
+        )
+    return {"upsert": upsert, "delete": delete}
+
+
+def delete_graph_rows(store: GraphStore, graph_rows: Dict, batch_size: Optional[int] = None) -> int:
+    """Delete the given edges, then nodes (with their edges); returns the number of transactions."""
+    batch_size = max(1, batch_size or SEED_BATCH_SIZE)
+    transactions = 0
+    for rel_type, source_label, target_label in EDGE_TYPES:
+        transactions += store.delete_edges(rel_type, source_label, target_label, graph_rows["edges"][rel_type], batch_size)
+    for label in NODE_LABELS:
+        transactions += store.delete_nodes(label, graph_rows["nodes"][label], batch_size)
+    return transactions
+
+
+def write_graph_rows(
+    store: GraphStore,
+    graph_rows: Dict,
+    batch_size: Optional[int] = None,
+    loaded: Optional[Dict] = None
+) -> Dict:
+    """
+    Write aggregated rows to the graph store in one bulk pass and return throughput stats.
+    
+    Nodes are written with their final degree (centrality = degree); edges carry
+    w_struct, w_attn, ts, doc_ref and mentions. Edges that are already in
+    `loaded` (the rows of the dataset in the store) only get their doc_ref and
+    mentions updated, so they keep the w_attn learned from feedback and their ts.
+    """
+    import time
+    
+    batch_size = max(1, batch_size or SEED_BATCH_SIZE)
+    seed_ts = int(time.time() * 1000)
+    start = time.time()
+    transactions = 0
+    
+    for label in NODE_LABELS:
+        rows = [
+            {**row, "text_ref": "", "created_from": "auto_extract", "centrality": row["degree"]}
+            for row in graph_rows["nodes"][label]
+        ]
+        transactions += store.merge_nodes(label, rows, batch_size)
+    
+    for rel_type, source_label, target_label in EDGE_TYPES:
+        existing = {(row["source"], row["target"]) for row in loaded["edges"][rel_type]} if loaded else set()
+        rows = [
+            row if (row["source"], row["target"]) in existing
+            else {**row, "w_struct": 1.0, "w_attn": 0.0, "ts": seed_ts}
+            for row in graph_rows["edges"][rel_type]
+        ]
+        transactions += store.merge_edges(rel_type, source_label, target_label, rows, batch_size)
+    
+    elapsed = time.time() - start
+    node_count = sum(len(rows) for rows in graph_rows["nodes"].values())
+    edge_count = sum(len(rows) for rows in graph_rows["edges"].values())
+    rows = node_count + edge_count
+    return {
+        "rows": rows,
+        "nodes": node_count,
+        "edges": edge_count,
+        "mentions": graph_rows["mentions"],
+        "edges_by_type": {rel_type: len(edge_rows) for rel_type, edge_rows in graph_rows["edges"].items()},
+        "batch_size": batch_size,
+        "transactions": transactions,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else None,
+    }
 
 
-def seed_data(data_file: str = "data/docs-light.jsonl", collection_name: str = "lightrag_docs"):
+def _extraction_timings(seconds: float, doc_count: int, extraction_cache) -> Dict:
+    """Entity extraction timings of a seed, as reported by /dataset."""
+    return {
+        "seconds": round(seconds, 4),
+        "docs_per_sec": round(doc_count / seconds, 1) if seconds > 0 else None,
+        "ms_per_doc": round(seconds * 1000 / doc_count, 4) if doc_count else None,
+        "cache": extraction_cache.stats(),
+    }
+
+
+def _seed_data(
+    data_file: str = "data/docs-light.jsonl",
+    collection_name: str = "lightrag_docs",
+    batch_size: Optional[int] = None,
+    incremental: bool = False
+):
     """
-    Seed data into Qdrant (vector store) and Neo4j (graph store).
+    Seed data into the vector store (Qdrant or local index) and the graph store (Neo4j or in-memory).
+    
+    Edges are aggregated in memory (see aggregate_graph_rows) and written with
+    chunked UNWIND transactions of `batch_size` rows (default: SEED_BATCH_SIZE).
+    
+    With `incremental=True` and a dataset already loaded, only documents,
+    nodes and edges that differ from the loaded dataset are embedded, written
+    or deleted. Edges that stay keep their w_attn and ts (see write_graph_rows).
+    The graph version stored with the graph must still be the one written by
+    that load: otherwise the graph was reseeded from elsewhere (the GraphRAG
+    service seeds the same Neo4j graph) and the seed is a full one.
     """
     import json
+    import time
+    global _loaded_state, _graph_snapshot
     
-    if not qdrant_client or not neo4j_driver:
+    if not qdrant_client or graph_store is None:
         raise RuntimeError("Clients not initialized")
     
     # Read data
@@ -128,10 +571,21 @@ def seed_data(data_file: str = "data/docs-light.jsonl", collection_name: str = "
         print(f"⚠ No data found in {data_file}")
         return {"status": "no_data"}
     
-    # Create Qdrant collection if needed
+    doc_keys = {_doc_key(doc): doc for doc in docs}
+    previous = _loaded_state if incremental else None
+    _loaded_state = None  # Unknown until the writes below succeed
+    if previous is not None and graph_store.graph_version() != previous["graph_version"]:
+        print("⚠ Graph version changed since the last seed, seeding in full")
+        previous = None
+    
+    # Create Qdrant collection if needed (a full seed starts from an empty one)
     collections = qdrant_client.get_collections().collections
     collection_exists = any(c.name == collection_name for c in collections)
     
+    if collection_exists and previous is None:
+        qdrant_client.delete_collection(collection_name=collection_name)
+        collection_exists = False
+    
     if not collection_exists:
         # Get embedding dimension from model (384 for all-MiniLM-L6-v2)
         if embedding_model:
@@ -143,147 +597,288 @@ def seed_data(data_file: str = "data/docs-light.jsonl", collection_name: str = "
             collection_name=collection_name,
             vectors_config=VectorParams(size=embed_dim, distance=Distance.COSINE)
         )
-        print(f"✓ Created Qdrant collection: {collection_name} (dim={embed_dim})")
+        print(f"✓ Created {_vector_store_name()} collection: {collection_name} (dim={embed_dim})")
     
-    # Seed Neo4j graph with nodes and edges
-    with neo4j_driver.session() as session:
+    # Extract entities and relationships from text
+    doc_entities = []
+    extraction_cache = get_extraction_cache()
+    extract_start = time.perf_counter()
+    for doc in docs:
+        # Extract entities using improved pattern matching (cached by content hash)
+        doc_entities.append(extraction_cache.extract(doc.get("text", "")))
+    extract_seconds = time.perf_counter() - extract_start
+    extraction_cache.save()
+    
+    # Aggregate edges client-side: one row per unique edge, final degrees in memory
+    graph_rows = aggregate_graph_rows(docs, doc_entities)
+    node_counts = {label: len(graph_rows["nodes"][label]) for label in NODE_LABELS}
+    print(f"✓ Extracted entities: {node_counts['Product']} products, {node_counts['Feature']} features, {node_counts['Policy']} policies")
+    
+    # Seed the graph store with nodes and edges
+    # Unique name per label: backs MERGE and every label-qualified lookup with an index
+    graph_store.ensure_constraints(NODE_LABELS)
+    if previous is None:
         # Clear existing data
-        session.run("MATCH (n) DETACH DELETE n")
-        
-        # Extract entities and relationships from text
-        # Collect all unique entities across all documents
-        all_products = set()
-        all_features = set()
-        all_policies = set()
-        
-        for doc in docs:
-            doc_id = doc.get("id", "")
-            text = doc.get("text", "")
-            
-            # Extract entities using improved pattern matching
-            entities = extract_entities(text)
-            all_products.update(entities["products"])
-            all_features.update(entities["features"])
-            all_policies.update(entities["policies"])
-        
-        print(f"✓ Extracted entities: {len(all_products)} products, {len(all_features)} features, {len(all_policies)} policies")
-        
-        # Create all nodes first
-        for product in all_products:
-            session.run(
-                """
-                MERGE (p:Product {name: $name})
-                SET p.text_ref = $text, p.degree = 0, p.created_from = 'auto_extract'
-                """,
-                name=product, text=""
-            )
-        
-        for feature in all_features:
-            session.run(
-                """
-                MERGE (f:Feature {name: $name})
-                SET f.text_ref = $text, f.degree = 0, f.created_from = 'auto_extract'
-                """,
-                name=feature, text=""
+        graph_store.clear()
+        seed_stats = write_graph_rows(graph_store, graph_rows, batch_size=batch_size)
+        seed_stats["mode"] = "full"
+    else:
+        delta = diff_graph_rows(previous["graph_rows"], graph_rows)
+        delete_transactions = delete_graph_rows(graph_store, delta["delete"], batch_size=batch_size)
+        seed_stats = write_graph_rows(graph_store, delta["upsert"], batch_size=batch_size, loaded=previous["graph_rows"])
+        seed_stats["mode"] = "incremental"
+        seed_stats["transactions"] += delete_transactions
+        seed_stats["delta"] = {
+            "docs_added": len(doc_keys.keys() - previous["doc_keys"]),
+            "docs_removed": len(previous["doc_keys"] - doc_keys.keys()),
+            "nodes_upserted": seed_stats["nodes"],
+            "nodes_deleted": sum(len(rows) for rows in delta["delete"]["nodes"].values()),
+            "edges_upserted": seed_stats["edges"],
+            "edges_deleted": sum(len(rows) for rows in delta["delete"]["edges"].values()),
+        }
+    seed_stats["graph_store"] = graph_store.backend
+    graph_version = uuid.uuid4().hex
+    graph_store.set_graph_version(graph_version)
+    
+    print(
+        f"✓ Seeded {len(docs)} documents to the {graph_store.backend} graph store ({seed_stats['mode']}: "
+        f"{seed_stats['edges']} edge rows, {seed_stats['mentions']} mentions, "
+        f"{seed_stats['rows_per_sec']} rows/sec)"
+    )
+    
+    # Seed Qdrant with embeddings if model is available
+    point_keys = set()
+    if embedding_model and qdrant_client:
+        loaded_keys = previous["point_keys"] if previous else set()
+        removed_keys = loaded_keys - doc_keys.keys()
+        if removed_keys:
+            qdrant_client.delete(
+                collection_name=collection_name,
+                points_selector=PointIdsList(points=[_point_id(k) for k in removed_keys])
             )
         
-        for policy in all_policies:
-            session.run(
-                """
-                MERGE (pol:Policy {name: $name})
-                SET pol.text_ref = $text, pol.degree = 0, pol.created_from = 'auto_extract'
-                """,
-                name=policy, text=""
-            )
+        # Same id and text as a loaded point: embedding is already stored
+        new_items = [(key, doc) for key, doc in doc_keys.items() if key not in loaded_keys]
+        embed_start = time.time()
+        upserted = embed_and_upsert(new_items, collection_name)
+        if isinstance(qdrant_client, LocalVectorIndex):
+            # Point ids and payloads reach disk with the snapshot (VECTOR_STORE=local)
+            qdrant_client.save(collection_name)
+        embed_seconds = time.time() - embed_start
+        print(f"✓ Seeded {upserted} embeddings to {_vector_store_name()} ({len(removed_keys)} removed, {embed_seconds:.2f}s)")
+        point_keys = set(doc_keys)
+        seed_stats["points_upserted"] = upserted
+        seed_stats["points_deleted"] = len(removed_keys)
+        seed_stats["embedding"] = {
+            "seconds": round(embed_seconds, 3),
+            "batch_size": EMBED_BATCH_SIZE,
+            "upsert_batch_size": UPSERT_BATCH_SIZE,
+            "cache": get_embedding_cache().stats(),
+        }
+    
+    _loaded_state = {
+        "data_file": data_file,
+        "doc_keys": set(doc_keys),
+        "point_keys": point_keys,
+        "graph_rows": graph_rows,
+        "graph_version": graph_version,
+    }
+    if GRAPH_ENGINE == "snapshot":
+        refresh_graph_snapshot()
+    else:
+        # The neo4j engine never reads it: loaded on first use
+        _graph_snapshot = None
+    refresh_name_catalog()
+    refresh_dataset_stats(
+        data_file,
+        len(docs),
+        _extraction_timings(extract_seconds, len(docs), extraction_cache),
+    )
+    
+    return {
+        "status": "success",
+        "doc_count": len(docs),
+        "seed_stats": seed_stats,
+        "extraction_cache": extraction_cache.stats()
+    }
+
+
+def seed_data(
+    data_file: str = "data/docs-light.jsonl",
+    collection_name: str = "lightrag_docs",
+    batch_size: Optional[int] = None,
+    incremental: bool = False
+):
+    """
+    Seed data (see _seed_data) and move cached /ask results to a new graph version.
+    
+    The version is bumped even if seeding fails halfway, since part of the
+    graph may already have changed.
+    """
+    try:
+        return _seed_data(data_file, collection_name, batch_size, incremental)
+    finally:
+        answer_cache.bump("seed", _loaded_state["graph_version"] if _loaded_state else None)
+
+
+# Neighbors expanded per frontier node and level in build_local_graph
+NEIGHBORS_PER_NODE = 5
+
+
+def _ranked_limit(visited: Set[str], frontier: List[str], max_nodes: Optional[int]) -> int:
+    """
+    Ranked rows to fetch per frontier node so that its NEIGHBORS_PER_NODE best
+    unvisited neighbors are included. Visited nodes are filtered client-side,
+    and earlier sources of the same level add up to NEIGHBORS_PER_NODE nodes
+    each, so the margin covers the visited set as it can be at the last source.
+    """
+    bound = len(visited) + NEIGHBORS_PER_NODE * len(frontier)
+    if max_nodes:
+        bound = min(bound, max_nodes)
+    return NEIGHBORS_PER_NODE + bound
+
+def _neighbors(names: List[str], **options) -> Optional[List[Dict]]:
+    """
+    graph_store.neighbors of names, grouped by label through the name catalog.
+    Returns None (nothing is read) when none of the names is in the graph.
+    """
+    groups = get_name_catalog().group_by_label(names)
+    if not groups:
+        return None
+    return graph_store.neighbors(groups, **options)
+
+
+async def _neighbors_async(names: List[str], **options) -> Optional[List[Dict]]:
+    groups = get_name_catalog().group_by_label(names)
+    if not groups:
+        return None
+    return await graph_store.neighbors_async(groups, **options)
+
+
+def _expand_on_snapshot(
+    snapshot: GraphSnapshot,
+    seed_nodes: List[str],
+    max_depth: int,
+    theta: float,
+    max_nodes: Optional[int]
+) -> Dict:
+    """
+    build_local_graph run against the in-process snapshot.
+    
+    Same rules as the query expansion: per frontier node, the
+    NEIGHBORS_PER_NODE best unvisited neighbors by w_struct * (1 + w_attn),
+    kept if their score is at least theta, until max_nodes are visited.
+    """
+    visited = set(seed_nodes)
+    visited_mask = np.zeros(snapshot.node_count, dtype=bool)
+    visited_mask[[snapshot.index[n] for n in seed_nodes if n in snapshot.index]] = True
+    beta_scores = {node_name: 1.0 for node_name in seed_nodes}
+    edge_scores = snapshot.w_struct * (1.0 + snapshot.w_attn)
+    
+    frontier = list(seed_nodes)
+    max_depth_reached = 0
+    for depth in range(max_depth):
+        if max_nodes and len(visited) >= max_nodes:
+            break
         
-        # Extract relationships from documents
-        for doc in docs:
-            doc_id = doc.get("id", "")
-            text = doc.get("text", "")
-            
-            # Extract entities for this document
-            entities = extract_entities(text)
-            products = entities["products"]
-            features = entities["features"]
-            policies = entities["policies"]
-            
-            # Create relationships (nodes already created above)
-            # Product-Feature relationships
-            for product in products:
-                for feature in features:
-                    session.run(
-                        """
-                        MATCH (p:Product {name: $product}), (f:Feature {name: $feature})
-                        MERGE (p)-[r:HAS_FEATURE]->(f)
-                        SET r.w_struct = 1.0, r.w_attn = 0.0, r.ts = timestamp()
-                        SET p.degree = p.degree + 1, f.degree = f.degree + 1
-                        SET p.doc_ref = $doc_id
-                        """,
-                        product=product, feature=feature, doc_id=doc_id
-                    )
+        new_frontier = []
+        for node_name in frontier:
+            if max_nodes and len(visited) >= max_nodes:
+                break
+            node = snapshot.index.get(node_name)
+            if node is None:
+                continue
             
-            # Feature-Policy relationships (any feature that mentions a policy)
-            # Also create if text mentions "Policy" near a feature
-            if "Policy" in text or any("Policy" in f or "POL" in p for f in features for p in policies):
-                for feature in features:
-                    for policy in policies:
-                        session.run(
-                            """
-                            MATCH (f:Feature {name: $feature}), (pol:Policy {name: $policy})
-                            MERGE (f)-[r:REGULATES]->(pol)
-                            SET r.w_struct = 1.0, r.w_attn = 0.0, r.ts = timestamp()
-                            SET f.degree = f.degree + 1, pol.degree = pol.degree + 1
-                            """,
-                            feature=feature, policy=policy
-                        )
+            neighbors, edges = snapshot.neighbors(node)
+            open_mask = ~visited_mask[neighbors]
+            neighbors, scores = neighbors[open_mask], edge_scores[edges[open_mask]]
+            best = np.argsort(-scores, kind="stable")[:NEIGHBORS_PER_NODE]
             
-            # Product-Product relationships (if text mentions dependency/compatibility)
-            if any(keyword in text for keyword in ["依存", "連携", "統合", "互換", "利用"]):
-                product_list = list(products)
-                for i in range(len(product_list)):
-                    for j in range(i+1, len(product_list)):
-                        session.run(
-                            """
-                            MATCH (p1:Product {name: $p1}), (p2:Product {name: $p2})
-                            MERGE (p1)-[r:RELATES_TO]->(p2)
-                            SET r.w_struct = 1.0, r.w_attn = 0.0, r.ts = timestamp()
-                            SET p1.degree = p1.degree + 1, p2.degree = p2.degree + 1
-                            """,
-                            p1=product_list[i], p2=product_list[j]
-                        )
-        
-        # Calculate initial centrality (simplified)
-        session.run("""
-            MATCH (n)
-            SET n.centrality = n.degree
-        """)
+            parent_beta = beta_scores.get(node_name, 1.0)
+            for neighbor, graph_score in zip(neighbors[best].tolist(), scores[best].tolist()):
+                if max_nodes and len(visited) >= max_nodes:
+                    break
+                neighbor_name = snapshot.names[neighbor]
+                if neighbor_name not in visited and graph_score >= theta:
+                    visited.add(neighbor_name)
+                    visited_mask[neighbor] = True
+                    beta_scores[neighbor_name] = graph_score * parent_beta
+                    new_frontier.append(neighbor_name)
         
-        print(f"✓ Seeded {len(docs)} documents to Neo4j")
+        max_depth_reached = depth + 1
+        frontier = new_frontier
+        if not new_frontier:
+            break
     
-    # Seed Qdrant with embeddings if model is available
-    if embedding_model and qdrant_client:
-        points = []
-        for i, doc in enumerate(docs):
-            doc_id = doc.get("id", f"doc_{i}")
-            text = doc.get("text", "")
+    return {
+        "nodes": list(visited),
+        "visited_count": len(visited),
+        "max_depth_reached": max_depth_reached,
+        "round_trips": 0,
+        "beta_scores": beta_scores
+    }
+
+
+def _merge_frontier_records(records: Optional[List]) -> Dict[str, List]:
+    """Ranked neighbors by source name from graph_store.neighbors(ranked=True) records."""
+    neighbors_by_source = {}
+    for record in records or []:
+        if record["source"] in neighbors_by_source:
+            # A name used by several labels: merge the rankings of all its nodes
+            merged = neighbors_by_source[record["source"]] + record["neighbors"]
+            neighbors_by_source[record["source"]] = sorted(merged, key=lambda n: n["score"], reverse=True)
+        else:
+            neighbors_by_source[record["source"]] = record["neighbors"]
+    return neighbors_by_source
+
+
+def _expand_level(
+    frontier: List[str],
+    records: Optional[List],
+    visited: Set[str],
+    all_nodes: Set[str],
+    beta_scores: Dict[str, float],
+    theta: float,
+    max_nodes: Optional[int]
+) -> List[str]:
+    """Apply one level of build_local_graph to the fetched neighbors; returns the next frontier."""
+    neighbors_by_source = _merge_frontier_records(records)
+    new_frontier = []
+    for node_name in frontier:
+        # Check node limit before processing each frontier node
+        if max_nodes and len(visited) >= max_nodes:
+            break
+        
+        # Same rows the per-node query returned: unvisited neighbors, best first
+        candidates = [
+            record for record in neighbors_by_source.get(node_name, [])
+            if record["name"] not in visited
+        ][:NEIGHBORS_PER_NODE]
+        
+        for record in candidates:
+            # Check node limit before adding each neighbor
+            if max_nodes and len(visited) >= max_nodes:
+                break
             
-            # Generate embedding
-            embedding = embedding_model.encode(text).tolist()
+            neighbor_name = record["name"]
+            graph_score = record["score"]  # This is beta (graph-level score)
             
-            points.append(PointStruct(
-                id=i,
-                vector=embedding,
-                payload={
-                    "id": doc_id,
-                    "text": text
-                }
-            ))
-        
-        if points:
-            qdrant_client.upsert(collection_name=collection_name, points=points)
-            print(f"✓ Seeded {len(points)} embeddings to Qdrant")
-    
-    return {"status": "success", "doc_count": len(docs)}
+            if neighbor_name not in visited and graph_score >= theta:
+                visited.add(neighbor_name)
+                all_nodes.add(neighbor_name)
+                # Store beta score (graph-level score)
+                # Use the graph score directly, or combine with parent's beta if available
+                parent_beta = beta_scores.get(node_name, 1.0)
+                beta_scores[neighbor_name] = graph_score * parent_beta  # Simplified: multiply parent beta
+                new_frontier.append(neighbor_name)
+    return new_frontier
+
+
+def _check_engine(engine: Optional[str]) -> str:
+    engine = engine or GRAPH_ENGINE
+    if engine not in GRAPH_ENGINES:
+        raise ValueError(f"Unknown graph engine: {engine} (expected one of {', '.join(GRAPH_ENGINES)})")
+    return engine
 
 
 def build_local_graph(
@@ -291,74 +886,50 @@ def build_local_graph(
     max_depth: int = 2,
     theta: float = 0.3,
     max_nodes: int = None,
-    collection_name: str = "lightrag_docs"
+    collection_name: str = "lightrag_docs",
+    engine: Optional[str] = None
 ) -> Dict:
     """
     Build local subgraph from seed nodes (LightRAG's graph-level retrieval).
     Returns nodes with their beta scores (graph-level scores).
     
+    Expansion is level-synchronous: the neighbors of the whole frontier are
+    fetched with one query per depth, and the visited set is applied
+    client-side, so round trips scale with depth rather than frontier size.
+    
     Args:
         seed_nodes: Starting nodes for graph traversal
         max_depth: Maximum depth of traversal
         theta: Minimum score threshold for including nodes
         max_nodes: Maximum number of nodes to visit (for lightweight constraint)
+        engine: "neo4j" or "snapshot" (default: GRAPH_ENGINE)
     """
-    if not neo4j_driver:
-        raise RuntimeError("Neo4j driver not initialized")
+    if graph_store is None:
+        raise RuntimeError("Graph store not initialized")
+    engine = _check_engine(engine)
+    if engine == "snapshot":
+        return _expand_on_snapshot(get_graph_snapshot(), seed_nodes, max_depth, theta, max_nodes)
     
     visited = set(seed_nodes)
     frontier = list(seed_nodes)
     all_nodes = set(seed_nodes)
-    beta_scores = {}  # Track beta scores (graph-level) for each node
-    
-    # Initialize seed nodes with beta score = 1.0
-    for node_name in seed_nodes:
-        beta_scores[node_name] = 1.0
+    # Track beta scores (graph-level) for each node; seed nodes start at 1.0
+    beta_scores = {node_name: 1.0 for node_name in seed_nodes}
     
     max_depth_reached = 0
+    round_trips = 0
     for depth in range(max_depth):
         # Check if we've reached the node limit (LightRAG's lightweight constraint)
         if max_nodes and len(visited) >= max_nodes:
             break
         
         new_frontier = []
-        
-        with neo4j_driver.session() as session:
-            for node_name in frontier:
-                # Check node limit before processing each frontier node
-                if max_nodes and len(visited) >= max_nodes:
-                    break
-                
-                # Get neighbors with scoring
-                result = session.run("""
-                    MATCH (n {name: $name})-[r]-(neighbor)
-                    WHERE NOT neighbor.name IN $visited
-                    RETURN 
-                        neighbor.name as name,
-                        labels(neighbor)[0] as type,
-                        type(r) as rel_type,
-                        coalesce(r.w_struct, 1.0) * (1.0 + coalesce(r.w_attn, 0.0)) as score,
-                        neighbor.centrality as centrality
-                    ORDER BY score DESC
-                    LIMIT 5
-                """, name=node_name, visited=list(visited))
-                
-                for record in result:
-                    # Check node limit before adding each neighbor
-                    if max_nodes and len(visited) >= max_nodes:
-                        break
-                    
-                    neighbor_name = record["name"]
-                    graph_score = record["score"]  # This is beta (graph-level score)
-                    
-                    if neighbor_name not in visited and graph_score >= theta:
-                        visited.add(neighbor_name)
-                        all_nodes.add(neighbor_name)
-                        # Store beta score (graph-level score)
-                        # Use the graph score directly, or combine with parent's beta if available
-                        parent_beta = beta_scores.get(node_name, 1.0)
-                        beta_scores[neighbor_name] = graph_score * parent_beta  # Simplified: multiply parent beta
-                        new_frontier.append(neighbor_name)
+        if frontier:
+            # One query per level: ranked neighbors of every frontier node
+            records = _neighbors(frontier, ranked=True, limit=_ranked_limit(visited, frontier, max_nodes))
+            if records is not None:
+                round_trips += 1
+            new_frontier = _expand_level(frontier, records, visited, all_nodes, beta_scores, theta, max_nodes)
         
         max_depth_reached = depth + 1
         frontier = new_frontier
@@ -369,16 +940,283 @@ def build_local_graph(
         "nodes": list(all_nodes),
         "visited_count": len(visited),
         "max_depth_reached": max_depth_reached,
+        "round_trips": round_trips,
         "beta_scores": beta_scores  # Return beta scores for integration
     }
 
 
+# Features of several products at once (graph_store.neighbors options)
+_PRODUCT_FEATURES = {"rel_type": "HAS_FEATURE", "outgoing": True}
+
+# Last-resort seeds: any nodes
+ANY_NODE_SEEDS = 10
+
+# Known names matched in the question when no embedding model is loaded
+_KEYWORD_SEEDS = [
+    (("Acme Search", "Acme"), "Acme Search"),
+    (("Globex Graph", "Globex"), "Globex Graph"),
+    (("Semantic Index",), "Semantic Index"),
+    (("Policy Audit",), "Policy Audit"),
+    (("Realtime Query",), "Realtime Query"),
+]
+
+# Product aliases used in questions (e.g., "Acme" -> "Acme Search")
+_PRODUCT_ALIASES = {"Acme": "Acme Search", "Globex": "Globex Graph"}
+
+
+def _features_by_product(records) -> Dict[str, List[str]]:
+    """Products with at least one feature -> feature names."""
+    return {
+        record["source"]: [n["name"] for n in record["neighbors"]]
+        for record in records
+        if record["neighbors"]
+    }
+
+
+def _vector_seeds(search_results) -> Tuple[List[str], Dict[str, float]]:
+    """Entities of the retrieved documents with min-max normalized alpha scores."""
+    # Extract seed nodes from retrieved documents with alpha scores
+    node_to_alpha = {}  # Map node name to its best alpha score
+    for result in search_results:
+        payload = result.payload or {}
+        text = payload.get("text", "")
+        score = result.score  # This is the vector similarity score (alpha)
+        
+        # Extract entities from retrieved text (seeded documents are cache hits)
+        entities = get_extraction_cache().extract(text)
+        entities_found = entities["products"] + entities["features"] + entities["policies"]
+        
+        # Assign alpha score to each entity (use max if entity appears multiple times)
+        for entity in entities_found:
+            if entity not in node_to_alpha or score > node_to_alpha[entity]:
+                node_to_alpha[entity] = score
+    
+    # Normalize alpha scores to [0, 1] range (min-max normalization)
+    alpha_scores = {}
+    if node_to_alpha:
+        raw_alpha = np.fromiter(node_to_alpha.values(), dtype=np.float64, count=len(node_to_alpha))
+        alpha_scores.update(zip(node_to_alpha, normalize_min_max(raw_alpha).tolist()))
+    return list(node_to_alpha), alpha_scores
+
+
+def _keyword_seeds(question: str) -> Tuple[List[str], Dict[str, float]]:
+    """Fallback if embedding model not available: known names matched in the question."""
+    seed_nodes = []
+    alpha_scores = {}
+    for keywords, name in _KEYWORD_SEEDS:
+        if any(keyword in question for keyword in keywords):
+            seed_nodes.append(name)
+            alpha_scores[name] = 1.0
+    return seed_nodes, alpha_scores
+
+
+def _is_global_question(question: str) -> bool:
+    return any(keyword in question.lower() for keyword in ["すべて", "全て", "all", "すべての", "全ての", "要約", "関係", "すべての製品", "すべての機能"])
+
+
+def _question_entity_seeds(question: str, top_k: int, alpha_scores: Dict[str, float]) -> List[str]:
+    """
+    Entities extracted from the question, plus partial matches (e.g., "Acme" ->
+    "Acme Search") from the n-gram name index instead of a `CONTAINS` scan over all nodes.
+    Sets their alpha scores; returns at most top_k * 2 seeds.
+    """
+    question_entities = extract_entities(question)
+    extracted = question_entities["products"] + question_entities["features"] + question_entities["policies"]
+    
+    if not extracted or len(extracted) < top_k:
+        # Extract potential product name keywords from question
+        question_words = re.findall(r'\b([A-Z][a-z]+)\b', question)
+        catalog = get_name_catalog()
+        for word in question_words:
+            if word.lower() not in ["the", "and", "or", "not", "is", "are", "was", "were", "will", "can", "does", "do", "did"]:
+                for node_name in catalog.contains(word, limit=5):
+                    if node_name not in extracted:
+                        extracted.append(node_name)
+                        alpha_scores[node_name] = 0.75  # High score for partial match
+    
+    seed_nodes = extracted[:top_k * 2]
+    for node_name in seed_nodes:
+        if node_name not in alpha_scores:
+            alpha_scores[node_name] = 0.8  # Higher score for explicitly mentioned entities
+    return seed_nodes
+
+
+def _degree_seeds(records, alpha_scores: Dict[str, float]) -> List[str]:
+    seed_nodes = []
+    for record in records:
+        node_name = record["name"]
+        degree = record.get("degree", 1)
+        seed_nodes.append(node_name)
+        alpha_scores[node_name] = min(degree / 10.0, 1.0)  # Normalize degree to alpha score
+    return seed_nodes
+
+
+def _any_node_seeds(records, alpha_scores: Dict[str, float]) -> List[str]:
+    seed_nodes = [r["name"] for r in records]
+    for node_name in seed_nodes:
+        alpha_scores[node_name] = 0.5  # Default alpha for fallback nodes
+    return seed_nodes
+
+
+def _heuristic_targets(question: str) -> Tuple[Set[str], Set[str]]:
+    """Products (with aliases) and features mentioned in the question."""
+    question_entities = extract_entities(question)
+    heuristic_products = set(question_entities.get("products", []))
+    heuristic_features = set(question_entities.get("features", []))
+    for alias, canonical in _PRODUCT_ALIASES.items():
+        if alias in question:
+            heuristic_products.add(canonical)
+    return heuristic_products, heuristic_features
+
+
+def _heuristic_floors(
+    heuristic_products: Set[str],
+    heuristic_features: Set[str],
+    product_features: Dict[str, List[str]]
+) -> Dict[str, float]:
+    """
+    Minimum scores for boosted nodes (nodes not yet scored become candidates):
+    mentioned features 1.0, mentioned products 0.95 and their features 0.9.
+    """
+    floors: Dict[str, float] = {}
+    
+    def add_floor(node_name: str, value: float):
+        floors[node_name] = max(floors.get(node_name, 0.0), value)
+    
+    # Boost explicitly mentioned features
+    for feature in heuristic_features:
+        add_floor(feature, 1.0)
+    
+    # Boost products and pull their features into the candidate set
+    for product in heuristic_products:
+        add_floor(product, 0.95)
+        for feature_name in product_features.get(product, []):
+            add_floor(feature_name, 0.9)
+    return floors
+
+
+def _context_products(node_names: List[str]) -> List[str]:
+    """Answer nodes that may be products, whose features are added to graph_nodes."""
+    catalog = get_name_catalog()
+    return [name for name in node_names if "Product" in catalog.labels_of(name)]
+
+
+def _build_context(node_names: List[str], records: Optional[List], product_features: Dict[str, List[str]]) -> Tuple[str, List[Dict]]:
+    """Answer text and graph_nodes (answer nodes, each product followed by its features) from their neighbor records."""
+    if not node_names:
+        return "関連する情報が見つかりませんでした。", []
+    
+    # Back in ranking order
+    rank = {name: i for i, name in enumerate(node_names)}
+    result = sorted(records or [], key=lambda record: rank[record["source"]])
+    
+    nodes_info = []
+    answer_parts = []
+    
+    for record in result:
+        name = record["source"]
+        node_type = record["type"] or "Unknown"
+        related = list(dict.fromkeys(n["name"] for n in record["neighbors"] if n["name"]))
+        
+        nodes_info.append({
+            "name": name,
+            "type": node_type,
+            "related": related
+        })
+        
+        if related:
+            answer_parts.append(f"{name} ({node_type}) は {', '.join(related[:3])} と関連しています。")
+        else:
+            answer_parts.append(f"{name} ({node_type}) が見つかりました。")
+    
+    answer = "\n".join(answer_parts) if answer_parts else "情報を取得しました。"
+    
+    nodes = []
+    seen_nodes = set()
+    for node in nodes_info:
+        name = node["name"]
+        node_type = node["type"]
+        if name not in seen_nodes:
+            nodes.append({"name": name, "type": node_type})
+            seen_nodes.add(name)
+        
+        if node_type == "Product":
+            for feature_name in product_features.get(name, []):
+                if feature_name not in seen_nodes:
+                    nodes.append({"name": feature_name, "type": "Feature"})
+                    seen_nodes.add(feature_name)
+    return answer, nodes
+
+
+def _query_result(
+    answer: str,
+    seed_nodes: List[str],
+    nodes: List[Dict],
+    subgraph: Dict,
+    final_scores: Dict[str, float],
+    timings: Dict[str, float],
+    top_k: int,
+    depth: int,
+    theta: float,
+    fusion: str,
+    engine: str,
+    io: str
+) -> Dict:
+    """Response shared by query_lightrag and query_lightrag_async."""
+    return {
+        "answer": answer,
+        "vector_nodes": seed_nodes[:top_k],
+        "graph_nodes": nodes,
+        "subgraph": {
+            "total_nodes": subgraph.get("visited_count", len(seed_nodes)),
+            "depth": subgraph.get("max_depth_reached", 0),
+            "round_trips": subgraph.get("round_trips", 0)
+        },
+        "metadata": {
+            "top_k": top_k,
+            "depth": depth,
+            "theta": theta,
+            "alpha_beta_ratio": f"{ALPHA_WEIGHT:g}/{1.0 - ALPHA_WEIGHT:g}",
+            "fusion": fusion,
+            "graph_engine": engine,
+            "final_scores": {n: round(s, 3) for n, s in final_scores.items()},
+            "timings_ms": {step: round(ms, 2) for step, ms in timings.items()},
+            "io": io,
+            "pipeline": "lightrag-simplified"
+        }
+    }
+
+
+def _check_query_params(engine: Optional[str], fusion: Optional[str]) -> Tuple[str, str]:
+    engine = _check_engine(engine)
+    fusion = fusion or SCORE_FUSION
+    if fusion not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method: {fusion} (expected one of {', '.join(FUSION_METHODS)})")
+    return engine, fusion
+
+
+def _rank_candidates(alpha_scores: Dict[str, float], beta_scores: Dict[str, float], floors: Dict[str, float], top_k: int, fusion: str) -> Tuple[List[str], Dict[str, float]]:
+    """
+    Score integration over interned node ids and partial top-k selection.
+    weighted: final_score = alpha * 0.6 + normalized beta * 0.4 (ALPHA_WEIGHT)
+    """
+    candidates = CandidateScores(alpha_scores, beta_scores)
+    candidates.fuse(fusion, alpha_weight=ALPHA_WEIGHT, rrf_k=RRF_K)
+    # Heuristic adjustment: explicitly mentioned entities and their features
+    candidates.apply_floors(floors)
+    node_names = candidates.top_k(top_k)
+    final_scores = candidates.score_of(node_names)
+    return node_names, {n: final_scores.get(n, 0.0) for n in node_names[:top_k]}
+
+
 def query_lightrag(
     question: str,
     top_k: int = 4,
     depth: int = 2,
     theta: float = 0.3,
-    collection_name: str = "lightrag_docs"
+    collection_name: str = "lightrag_docs",
+    engine: Optional[str] = None,
+    fusion: Optional[str] = None
 ) -> Dict:
     """
     Execute LightRAG query with hierarchical retrieval.
@@ -388,17 +1226,22 @@ def query_lightrag(
     2. Graph-level retrieval: Build local subgraph from seed nodes
     3. Score integration: Combine vector scores and graph scores
     4. Context compression: Select top nodes by importance
+    
+    `fusion` selects how alpha and beta are combined ("weighted" or "rrf",
+    default: SCORE_FUSION).
     """
-    if not qdrant_client or not neo4j_driver:
+    if not qdrant_client or graph_store is None:
         raise RuntimeError("Clients not initialized")
+    engine, fusion = _check_query_params(engine, fusion)
     
-    # Step 1: Vector-level retrieval (low-level) - get alpha scores
-    alpha_scores = {}  # Vector-level scores (low-level)
-    seed_nodes = []
+    # Wall time per step in ms (metadata.timings_ms)
+    timings: Dict[str, float] = {}
+    step_start = time.perf_counter()
     
+    # Step 1: Vector-level retrieval (low-level) - get alpha scores
     if embedding_model and qdrant_client:
-        # Generate query embedding
-        query_vector = embedding_model.encode(question).tolist()
+        # Generate query embedding (repeated questions are served from the LRU cache)
+        query_vector = query_cache.encode(embedding_model, question)
         
         # Search Qdrant for top-k similar documents
         search_results = qdrant_client.search(
@@ -406,110 +1249,22 @@ def query_lightrag(
             query_vector=query_vector,
             limit=top_k * 2  # Get more results to extract nodes
         )
-        
-        # Extract seed nodes from retrieved documents with alpha scores
-        node_to_alpha = {}  # Map node name to its best alpha score
-        for result in search_results:
-            payload = result.payload or {}
-            text = payload.get("text", "")
-            score = result.score  # This is the vector similarity score (alpha)
-            
-            # Extract entities from retrieved text using improved extraction function
-            entities = extract_entities(text)
-            entities_found = entities["products"] + entities["features"] + entities["policies"]
-            
-            # Assign alpha score to each entity (use max if entity appears multiple times)
-            for entity in entities_found:
-                if entity not in node_to_alpha or score > node_to_alpha[entity]:
-                    node_to_alpha[entity] = score
-        
-        # Normalize alpha scores to [0, 1] range (min-max normalization)
-        if node_to_alpha:
-            max_alpha = max(node_to_alpha.values())
-            min_alpha = min(node_to_alpha.values())
-            alpha_range = max_alpha - min_alpha if max_alpha > min_alpha else 1.0
-            
-            for node_name, raw_score in node_to_alpha.items():
-                normalized_alpha = (raw_score - min_alpha) / alpha_range if alpha_range > 0 else 1.0
-                alpha_scores[node_name] = normalized_alpha
-                seed_nodes.append(node_name)
-        
+        seed_nodes, alpha_scores = _vector_seeds(search_results)
     else:
-        # Fallback: use keyword matching if embedding model not available
-        if "Acme Search" in question or "Acme" in question:
-            seed_nodes.append("Acme Search")
-            alpha_scores["Acme Search"] = 1.0
-        if "Globex Graph" in question or "Globex" in question:
-            seed_nodes.append("Globex Graph")
-            alpha_scores["Globex Graph"] = 1.0
-        if "Semantic Index" in question:
-            seed_nodes.append("Semantic Index")
-            alpha_scores["Semantic Index"] = 1.0
-        if "Policy Audit" in question:
-            seed_nodes.append("Policy Audit")
-            alpha_scores["Policy Audit"] = 1.0
-        if "Realtime Query" in question:
-            seed_nodes.append("Realtime Query")
-            alpha_scores["Realtime Query"] = 1.0
-        
+        seed_nodes, alpha_scores = _keyword_seeds(question)
         if not seed_nodes:
-            # Final fallback: get top nodes from Neo4j based on centrality/degree
-            # For global questions, get more nodes
-            with neo4j_driver.session() as session:
-                # Check if this is a global question
-                is_global = any(keyword in question.lower() for keyword in ["すべて", "全て", "all", "すべての", "全ての", "要約", "関係", "すべての製品", "すべての機能"])
-                
-                if is_global:
-                    # For global questions, limit seed_nodes to top_k * 2 to maintain LightRAG's lightweight nature
-                    # This ensures that even global questions don't explore too many nodes
-                    limit_seed = top_k * 2
-                    result = session.run("""
-                        MATCH (n)
-                        WHERE n.degree IS NOT NULL
-                        RETURN n.name as name, n.degree as degree
-                        ORDER BY n.degree DESC
-                        LIMIT $limit
-                    """, limit=limit_seed)
-                    for record in result:
-                        node_name = record["name"]
-                        degree = record.get("degree", 1)
-                        seed_nodes.append(node_name)
-                        alpha_scores[node_name] = min(degree / 10.0, 1.0)  # Normalize degree to alpha score
-                else:
-                    # For specific questions, try to extract entities from question itself
-                    question_entities = extract_entities(question)
-                    extracted = question_entities["products"] + question_entities["features"] + question_entities["policies"]
-                    
-                    # Also search for partial matches in Neo4j (e.g., "Acme" -> "Acme Search")
-                    if not extracted or len(extracted) < top_k:
-                        # Extract potential product name keywords from question
-                        import re
-                        question_words = re.findall(r'\b([A-Z][a-z]+)\b', question)
-                        for word in question_words:
-                            if word.lower() not in ["the", "and", "or", "not", "is", "are", "was", "were", "will", "can", "does", "do", "did"]:
-                                result = session.run("""
-                                    MATCH (n)
-                                    WHERE n.name CONTAINS $keyword
-                                    RETURN n.name as name
-                                    LIMIT 5
-                                """, keyword=word)
-                                for record in result:
-                                    node_name = record["name"]
-                                    if node_name not in extracted:
-                                        extracted.append(node_name)
-                                        alpha_scores[node_name] = 0.75  # High score for partial match
-                    
-                    if extracted:
-                        seed_nodes = extracted[:top_k * 2]
-                        for node_name in seed_nodes:
-                            if node_name not in alpha_scores:
-                                alpha_scores[node_name] = 0.8  # Higher score for explicitly mentioned entities
-                    else:
-                        # Last resort: get random sample of nodes
-                        result = session.run("MATCH (n) RETURN n.name as name LIMIT 10")
-                        seed_nodes = [r["name"] for r in result]
-                        for node_name in seed_nodes:
-                            alpha_scores[node_name] = 0.5  # Default alpha for fallback nodes
+            # Final fallback: top nodes by degree for global questions (limited to
+            # top_k * 2 to keep LightRAG lightweight), else entities named in the question
+            if _is_global_question(question):
+                seed_nodes = _degree_seeds(graph_store.top_degree(top_k * 2), alpha_scores)
+            else:
+                seed_nodes = _question_entity_seeds(question, top_k, alpha_scores)
+                if not seed_nodes:
+                    # Last resort: get random sample of nodes
+                    seed_nodes = _any_node_seeds(graph_store.names(limit=ANY_NODE_SEEDS), alpha_scores)
+    
+    timings["vector"] = (time.perf_counter() - step_start) * 1000
+    step_start = time.perf_counter()
     
     # Step 2: Graph-level retrieval (high-level) - build local subgraph and get beta scores
     # Limit total visited nodes to top_k * 3 to maintain LightRAG's lightweight nature
@@ -517,169 +1272,186 @@ def query_lightrag(
     max_nodes_limit = top_k * 3
     
     try:
-        subgraph = build_local_graph(seed_nodes, max_depth=depth, theta=theta, max_nodes=max_nodes_limit)
-        beta_scores = subgraph.get("beta_scores", {})  # Beta scores (graph-level)
+        subgraph = build_local_graph(seed_nodes, max_depth=depth, theta=theta, max_nodes=max_nodes_limit, engine=engine)
     except Exception as e:
         # Fallback if subgraph building fails
         print(f"⚠ build_local_graph failed: {e}")
         subgraph = {"visited_count": len(seed_nodes), "max_depth_reached": 0, "beta_scores": {}}
-        beta_scores = {}
-    
-    # Step 3: Score integration - combine alpha and beta with 0.6/0.4 ratio
-    # final_score = alpha * 0.6 + beta * 0.4
-    final_scores = {}
-    all_node_names = set(alpha_scores.keys()) | set(beta_scores.keys())
-    
-    for node_name in all_node_names:
-        alpha = alpha_scores.get(node_name, 0.0)
-        beta = beta_scores.get(node_name, 0.0)
-        # Normalize beta to [0, 1] if needed (beta_scores might be > 1)
-        if beta > 0:
-            # Normalize beta: assume max beta is around 2-3, normalize to [0, 1]
-            normalized_beta = min(beta / 3.0, 1.0) if beta > 1.0 else beta
-        else:
-            normalized_beta = 0.0
-        
-        final_score = alpha * 0.6 + normalized_beta * 0.4
-        final_scores[node_name] = final_score
     
-    # Heuristic adjustment: ensure explicitly mentioned entities and their features are considered
-    question_entities = extract_entities(question)
-    explicit_products = question_entities.get("products", [])
-    explicit_features = question_entities.get("features", [])
+    timings["graph"] = (time.perf_counter() - step_start) * 1000
+    step_start = time.perf_counter()
+    
+    # Step 3: Score integration, with explicitly mentioned products and their
+    # features (one query for all products) boosted
+    heuristic_products, heuristic_features = _heuristic_targets(question)
+    product_features: Dict[str, List[str]] = {}
+    if heuristic_products:
+        product_features = _features_by_product(graph_store.neighbors({"Product": list(heuristic_products)}, **_PRODUCT_FEATURES))
+    floors = _heuristic_floors(heuristic_products, heuristic_features, product_features)
+    node_names, final_scores = _rank_candidates(alpha_scores, subgraph.get("beta_scores", {}), floors, top_k, fusion)
+    
+    timings["scoring"] = (time.perf_counter() - step_start) * 1000
+    step_start = time.perf_counter()
+    
+    # Step 4: Context compression - build answer from top nodes (label-qualified),
+    # then the features of the answer products in one query
+    records = None
+    if node_names:
+        records = _neighbors(node_names) or []
+        products = [r["source"] for r in records if r["type"] == "Product"]
+        if products:
+            product_features.update(_features_by_product(graph_store.neighbors({"Product": products}, **_PRODUCT_FEATURES)))
+    answer, nodes = _build_context(node_names, records, product_features)
+    
+    timings["context"] = (time.perf_counter() - step_start) * 1000
+    
+    return _query_result(answer, seed_nodes, nodes, subgraph, final_scores, timings, top_k, depth, theta, fusion, engine, "sync")
 
-    product_aliases = {"Acme": "Acme Search", "Globex": "Globex Graph"}
 
-    heuristic_products = set(explicit_products)
-    heuristic_features = set(explicit_features)
+async def _product_features_async(products: List[str]) -> Dict[str, List[str]]:
+    """HAS_FEATURE targets of products (one query, none for no products)."""
+    if not products:
+        return {}
+    return _features_by_product(await graph_store.neighbors_async({"Product": list(products)}, **_PRODUCT_FEATURES))
 
-    for alias, canonical in product_aliases.items():
-        if alias in question:
-            heuristic_products.add(canonical)
 
-    if (heuristic_products or heuristic_features) and neo4j_driver:
-        with neo4j_driver.session() as session:
-            # Boost explicitly mentioned features
-            for feature in heuristic_features:
-                all_node_names.add(feature)
-                final_scores[feature] = max(final_scores.get(feature, 0.0), 1.0)
-
-            # Boost products and pull their features into the candidate set
-            for product in heuristic_products:
-                all_node_names.add(product)
-                final_scores[product] = max(final_scores.get(product, 0.0), 0.95)
-
-                result = session.run(
-                    """
-                    MATCH (p:Product {name: $product})-[:HAS_FEATURE]->(f:Feature)
-                    RETURN f.name as feature
-                    """,
-                    product=product,
-                )
-                for record in result:
-                    feature_name = record.get("feature")
-                    if feature_name:
-                        all_node_names.add(feature_name)
-                        final_scores[feature_name] = max(final_scores.get(feature_name, 0.0), 0.9)
-
-    # Sort nodes by final score and select top_k
-    ranked_nodes = sorted(all_node_names, key=lambda n: final_scores.get(n, 0.0), reverse=True)
-    node_names = ranked_nodes[:top_k]
-    
-    # Step 4: Context compression - build answer from top nodes
-    with neo4j_driver.session() as session:
+async def build_local_graph_async(
+    seed_nodes: List[str],
+    max_depth: int = 2,
+    theta: float = 0.3,
+    max_nodes: int = None,
+    engine: Optional[str] = None
+) -> Dict:
+    """build_local_graph on the async graph store reads (same levels, rules and result)."""
+    if graph_store is None:
+        raise RuntimeError("Graph store not initialized")
+    engine = _check_engine(engine)
+    if engine == "snapshot":
+        return _expand_on_snapshot(get_graph_snapshot(), seed_nodes, max_depth, theta, max_nodes)
+    
+    visited = set(seed_nodes)
+    frontier = list(seed_nodes)
+    all_nodes = set(seed_nodes)
+    beta_scores = {node_name: 1.0 for node_name in seed_nodes}
+    
+    max_depth_reached = 0
+    round_trips = 0
+    for depth in range(max_depth):
+        if max_nodes and len(visited) >= max_nodes:
+            break
         
-        if not node_names:
-            answer = "関連する情報が見つかりませんでした。"
-            nodes = []
-        else:
-            # Build answer from graph context
-            result = session.run(
-                """
-                UNWIND range(0, size($names) - 1) AS idx
-                WITH idx, $names[idx] AS target
-                MATCH (n {name: target})
-                OPTIONAL MATCH (n)-[r]-(related)
-                RETURN
-                    n.name as name,
-                    labels(n)[0] as type,
-                    collect(DISTINCT related.name) as related,
-                    idx
-                ORDER BY idx
-                """,
-                names=node_names,
-            )
-            
-            nodes_info = []
-            answer_parts = []
-            
-            for record in result:
-                name = record["name"]
-                node_type = record["type"] or "Unknown"
-                related = [r for r in record["related"] if r]
-                
-                nodes_info.append({
-                    "name": name,
-                    "type": node_type,
-                    "related": related
-                })
-                
-                if related:
-                    answer_parts.append(f"{name} ({node_type}) は {', '.join(related[:3])} と関連しています。")
-                else:
-                    answer_parts.append(f"{name} ({node_type}) が見つかりました。")
-            
-            answer = "\n".join(answer_parts) if answer_parts else "情報を取得しました。"
-
-            nodes = []
-            seen_nodes = set()
-            for node in nodes_info:
-                name = node["name"]
-                node_type = node["type"]
-                if name not in seen_nodes:
-                    nodes.append({"name": name, "type": node_type})
-                    seen_nodes.add(name)
-
-                if node_type == "Product":
-                    feature_result = session.run(
-                        """
-                        MATCH (:Product {name: $product})-[:HAS_FEATURE]->(f:Feature)
-                        RETURN f.name as feature
-                        """,
-                        product=name,
-                    )
-                    for feature_record in feature_result:
-                        feature_name = feature_record.get("feature")
-                        if feature_name and feature_name not in seen_nodes:
-                            nodes.append({"name": feature_name, "type": "Feature"})
-                            seen_nodes.add(feature_name)
-    
-    # Build subgraph metadata safely
-    subgraph_metadata = None
-    if subgraph and isinstance(subgraph, dict):
-        try:
-            subgraph_metadata = {
-            "total_nodes": subgraph.get("visited_count", len(seed_nodes)),
-            "depth": subgraph.get("max_depth_reached", 0)
-        }
-        except (KeyError, TypeError):
-            subgraph_metadata = {
-                "total_nodes": len(seed_nodes),
-                "depth": 0
-            }
+        new_frontier = []
+        if frontier:
+            records = await _neighbors_async(frontier, ranked=True, limit=_ranked_limit(visited, frontier, max_nodes))
+            if records is not None:
+                round_trips += 1
+            new_frontier = _expand_level(frontier, records, visited, all_nodes, beta_scores, theta, max_nodes)
+        
+        max_depth_reached = depth + 1
+        frontier = new_frontier
+        if not new_frontier:
+            break
     
     return {
-        "answer": answer,
-        "vector_nodes": seed_nodes[:top_k],
-        "graph_nodes": nodes,
-        "subgraph": subgraph_metadata,
-        "metadata": {
-            "top_k": top_k,
-            "depth": depth,
-            "theta": theta,
-            "alpha_beta_ratio": "0.6/0.4",
-            "final_scores": {n: round(final_scores.get(n, 0.0), 3) for n in node_names[:top_k]},
-            "pipeline": "lightrag-simplified"
-        }
+        "nodes": list(all_nodes),
+        "visited_count": len(visited),
+        "max_depth_reached": max_depth_reached,
+        "round_trips": round_trips,
+        "beta_scores": beta_scores
     }
 
+
+async def _retrieve_async(
+    question: str,
+    top_k: int,
+    depth: int,
+    theta: float,
+    collection_name: str,
+    engine: str,
+    timings: Dict[str, float]
+) -> Tuple[List[str], Dict[str, float], Dict]:
+    """Steps 1 and 2 of query_lightrag_async: seed nodes with alpha scores, then the local subgraph."""
+    step_start = time.perf_counter()
+    if embedding_model and qdrant_async_client:
+        # Encoding is CPU-bound: keep it off the event loop
+        query_vector = await asyncio.to_thread(query_cache.encode, embedding_model, question)
+        search_results = await qdrant_async_client.search(
+            collection_name=collection_name,
+            query_vector=query_vector,
+            limit=top_k * 2
+        )
+        seed_nodes, alpha_scores = _vector_seeds(search_results)
+    else:
+        seed_nodes, alpha_scores = _keyword_seeds(question)
+        if not seed_nodes:
+            if _is_global_question(question):
+                seed_nodes = _degree_seeds(await graph_store.top_degree_async(top_k * 2), alpha_scores)
+            else:
+                seed_nodes = _question_entity_seeds(question, top_k, alpha_scores)
+                if not seed_nodes:
+                    seed_nodes = _any_node_seeds(await graph_store.names_async(limit=ANY_NODE_SEEDS), alpha_scores)
+    timings["vector"] = (time.perf_counter() - step_start) * 1000
+    step_start = time.perf_counter()
+    
+    try:
+        subgraph = await build_local_graph_async(seed_nodes, max_depth=depth, theta=theta, max_nodes=top_k * 3, engine=engine)
+    except Exception as e:
+        print(f"⚠ build_local_graph_async failed: {e}")
+        subgraph = {"visited_count": len(seed_nodes), "max_depth_reached": 0, "beta_scores": {}}
+    timings["graph"] = (time.perf_counter() - step_start) * 1000
+    return seed_nodes, alpha_scores, subgraph
+
+
+async def query_lightrag_async(
+    question: str,
+    top_k: int = 4,
+    depth: int = 2,
+    theta: float = 0.3,
+    collection_name: str = "lightrag_docs",
+    engine: Optional[str] = None,
+    fusion: Optional[str] = None
+) -> Dict:
+    """
+    query_lightrag on the async graph store reads (async Neo4j driver) and async
+    Qdrant client, for the async /ask endpoint. Returns the same nodes, scores
+    and answer.
+    
+    Reads that do not depend on each other are awaited concurrently, each in
+    its own session:
+    - the features of the products named in the question (they only depend
+      on the question) while vector search and graph expansion run,
+    - the context of the answer nodes together with the features of the
+      answer products (known from the name catalog).
+    Step timings overlap accordingly.
+    """
+    if graph_store is None:
+        raise RuntimeError("Async clients not initialized")
+    engine, fusion = _check_query_params(engine, fusion)
+    timings: Dict[str, float] = {}
+    
+    heuristic_products, heuristic_features = _heuristic_targets(question)
+    (seed_nodes, alpha_scores, subgraph), product_features = await asyncio.gather(
+        _retrieve_async(question, top_k, depth, theta, collection_name, engine, timings),
+        _product_features_async(list(heuristic_products)),
+    )
+    step_start = time.perf_counter()
+    
+    floors = _heuristic_floors(heuristic_products, heuristic_features, product_features)
+    node_names, final_scores = _rank_candidates(alpha_scores, subgraph.get("beta_scores", {}), floors, top_k, fusion)
+    
+    timings["scoring"] = (time.perf_counter() - step_start) * 1000
+    step_start = time.perf_counter()
+    
+    records = None
+    if node_names:
+        products = [name for name in _context_products(node_names) if name not in product_features]
+        records, context_features = await asyncio.gather(
+            _neighbors_async(node_names),
+            _product_features_async(products),
+        )
+        product_features.update(context_features)
+    answer, nodes = _build_context(node_names, records, product_features)
+    
+    timings["context"] = (time.perf_counter() - step_start) * 1000
+    
+    return _query_result(answer, seed_nodes, nodes, subgraph, final_scores, timings, top_k, depth, theta, fusion, engine, "async")
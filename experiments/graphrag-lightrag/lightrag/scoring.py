@@ -0,0 +1,127 @@
+"""
+Score integration for LightRAG (alpha/beta fusion and top-k selection).
+
+Candidate nodes are interned to dense ids in first-seen order, and alpha
+(vector-level), beta (graph-level) and heuristic floor scores are held in NumPy
+arrays indexed by those ids. Ranking uses a partial selection (O(n)) followed
+by a sort of the k winners only; ties keep first-seen order, as a stable
+`sorted(..., reverse=True)` would.
+
+Fusion methods:
+- "weighted": alpha * w + normalized beta * (1 - w)  (default w = 0.6)
+- "rrf":      reciprocal-rank fusion over the alpha and beta rankings,
+              sum(1 / (k + rank)), scaled to [0, 1] by its maximum
+              (2 / (k + 1)) so heuristic floors keep their meaning
+"""
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+FUSION_METHODS = ("weighted", "rrf")
+
+
+def normalize_min_max(values: np.ndarray) -> np.ndarray:
+    """
+    Min-max normalize to [0, 1].
+
+    When all values are equal the range falls back to 1.0, so every value maps
+    to 0.0 (same as the original per-node loop).
+    """
+    if not len(values):
+        return values.astype(np.float64)
+    low, high = values.min(), values.max()
+    value_range = high - low if high > low else 1.0
+    return (values - low) / value_range
+
+
+def normalize_beta(values: np.ndarray) -> np.ndarray:
+    """Beta above 1.0 is scaled by 1/3 and capped at 1.0; negative beta becomes 0."""
+    return np.where(values > 1.0, np.minimum(values / 3.0, 1.0), np.maximum(values, 0.0))
+
+
+def rrf_scores(values: np.ndarray, present: np.ndarray, k: float) -> np.ndarray:
+    """1 / (k + rank) for entries in `present` (rank 1 = highest value), 0 elsewhere."""
+    out = np.zeros(len(values), dtype=np.float64)
+    ids = np.flatnonzero(present)
+    if len(ids):
+        ranked = ids[np.argsort(-values[ids], kind="stable")]
+        out[ranked] = 1.0 / (k + np.arange(1, len(ranked) + 1))
+    return out
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first.
+
+    Uses np.partition to find the k-th score, so only the winners are sorted.
+    Ties are broken by index (first-seen order).
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        kth = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        picked = np.concatenate([above, ties])
+    else:
+        picked = np.arange(n)
+    return picked[np.lexsort((picked, -scores[picked]))]
+
+
+class CandidateScores:
+    """Alpha/beta scores of candidate nodes over interned ids."""
+
+    def __init__(self, alpha_scores: Dict[str, float], beta_scores: Dict[str, float]):
+        self.names: List[str] = list(dict.fromkeys([*alpha_scores, *beta_scores]))
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+        self.alpha = np.zeros(n, dtype=np.float64)
+        self.beta = np.zeros(n, dtype=np.float64)
+        self.has_alpha = np.zeros(n, dtype=bool)
+        self.has_beta = np.zeros(n, dtype=bool)
+        if alpha_scores:
+            ids = [self.index[name] for name in alpha_scores]
+            self.alpha[ids] = list(alpha_scores.values())
+            self.has_alpha[ids] = True
+        if beta_scores:
+            ids = [self.index[name] for name in beta_scores]
+            self.beta[ids] = list(beta_scores.values())
+            self.has_beta[ids] = True
+        self.final: Optional[np.ndarray] = None
+
+    def fuse(self, method: str = "weighted", alpha_weight: float = 0.6, rrf_k: float = 60.0) -> np.ndarray:
+        """Compute the fused score of every candidate."""
+        if method == "weighted":
+            self.final = alpha_weight * self.alpha + (1.0 - alpha_weight) * normalize_beta(self.beta)
+        elif method == "rrf":
+            fused = rrf_scores(self.alpha, self.has_alpha, rrf_k) + rrf_scores(self.beta, self.has_beta, rrf_k)
+            self.final = fused * ((rrf_k + 1.0) / 2.0)
+        else:
+            raise ValueError(f"Unknown fusion method: {method} (expected one of {', '.join(FUSION_METHODS)})")
+        return self.final
+
+    def apply_floors(self, floors: Dict[str, float]) -> None:
+        """Raise scores to at least the given value, adding unseen nodes as candidates."""
+        new_names = [name for name in floors if name not in self.index]
+        for name in new_names:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+        if new_names:
+            # Unseen nodes have no alpha or beta score
+            pad = len(new_names)
+            self.alpha = np.concatenate([self.alpha, np.zeros(pad)])
+            self.beta = np.concatenate([self.beta, np.zeros(pad)])
+            self.has_alpha = np.concatenate([self.has_alpha, np.zeros(pad, dtype=bool)])
+            self.has_beta = np.concatenate([self.has_beta, np.zeros(pad, dtype=bool)])
+            self.final = np.concatenate([self.final, np.zeros(pad)])
+        if floors:
+            ids = np.fromiter((self.index[name] for name in floors), dtype=np.int64, count=len(floors))
+            values = np.fromiter(floors.values(), dtype=np.float64, count=len(floors))
+            np.maximum.at(self.final, ids, values)
+
+    def top_k(self, k: int) -> List[str]:
+        return [self.names[i] for i in top_k_indices(self.final, k)]
+
+    def score_of(self, names: Iterable[str]) -> Dict[str, float]:
+        return {name: float(self.final[self.index[name]]) for name in names if name in self.index}
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Load test of the threadpool /ask against the async /ask-async endpoints.
+
+`/ask` is a sync endpoint: every request holds one of FastAPI's threadpool
+threads while it waits on Neo4j (and Qdrant). `/ask-async` runs the same
+pipeline on the async drivers, with independent reads awaited concurrently.
+This script sends every question of questions.json to both routes of both
+services with `--concurrency` requests in flight (default: 200), and reports
+throughput, latency percentiles, errors and the async/sync ratios.
+
+Only the standard library is used (the request helpers come from
+benchmark.py), so it runs on the host against the ports published by
+docker compose:
+
+    python3 loadtest.py
+    python3 loadtest.py --dataset docs-300 --requests 5000 --warmup --output bench/loadtest.json
+
+The client is a thread per in-flight request and opens a new connection per
+request, so compare the two routes with each other rather than with other
+load generators.
+"""
+import argparse
+import json
+import math
+import time
+from typing import Dict
+
+from benchmark import GRAPHRAG_URL, LIGHTRAG_URL, PIPELINES, run_load, switch_dataset, write_json
+
+ROUTES = ("/ask", "/ask-async")
+
+
+def compare_routes(sync: Dict, concurrent: Dict) -> Dict:
+    """Async/sync ratios: throughput above 1 and latency below 1 favor /ask-async."""
+    def ratio(a: float, b: float):
+        return round(a / b, 2) if b else None
+
+    return {
+        "throughput": ratio(concurrent["throughput_rps"], sync["throughput_rps"]),
+        "p50": ratio(concurrent["latency_ms"]["p50"], sync["latency_ms"]["p50"]),
+        "p95": ratio(concurrent["latency_ms"]["p95"], sync["latency_ms"]["p95"]),
+        "p99": ratio(concurrent["latency_ms"]["p99"], sync["latency_ms"]["p99"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /ask (threadpool) vs /ask-async (async drivers)")
+    parser.add_argument("--questions", default="lightrag/questions.json",
+                        help="Question set (default: lightrag/questions.json)")
+    parser.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=list(PIPELINES),
+                        help="Services to test (default: both)")
+    parser.add_argument("--dataset", default=None,
+                        help="Switch both services to data/<dataset>.jsonl (full re-seed) first")
+    parser.add_argument("--concurrency", type=int, default=200, help="Requests in flight per route (default: 200)")
+    parser.add_argument("--requests", type=int, default=2000,
+                        help="Requests per route, cycling through the questions (default: 2000)")
+    parser.add_argument("--warmup", action="store_true", help="Run one unmeasured round of --concurrency requests per route first")
+    parser.add_argument("--engine", choices=["neo4j", "snapshot"], default=None,
+                        help="Graph walk backend (default: service GRAPH_ENGINE)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds (default: 60)")
+    parser.add_argument("--output", default="bench/loadtest.json", help="JSON report path (default: bench/loadtest.json)")
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = [item["ask"] for item in json.load(f)]
+    # The question set is small: repeat it so that every client has work queued
+    repeat = max(1, math.ceil(args.requests / len(questions)))
+    warmup_repeat = max(1, math.ceil(args.concurrency / len(questions)))
+
+    if args.dataset:
+        file = f"data/{args.dataset}.jsonl"
+        for pipeline, base_url in (("graphrag", GRAPHRAG_URL), ("lightrag", LIGHTRAG_URL)):
+            if pipeline in args.pipelines:
+                seconds, result = switch_dataset(base_url, file)
+                print(f"✓ {pipeline} seeded {result.get('doc_count')} docs in {seconds:.2f}s")
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": repeat * len(questions),
+            "engine": args.engine,
+            "dataset": args.dataset,
+            "questions": len(questions),
+            "graphrag_url": GRAPHRAG_URL,
+            "lightrag_url": LIGHTRAG_URL,
+        },
+        "pipelines": {},
+    }
+    for pipeline in args.pipelines:
+        print(f"\n=== {pipeline} ({args.concurrency} concurrent clients) ===")
+        routes = {}
+        for path in ROUTES:
+            if args.warmup:
+                run_load(pipeline, questions, warmup_repeat, args.concurrency, args.engine, args.timeout, path)
+            stats = run_load(pipeline, questions, repeat, args.concurrency, args.engine, args.timeout, path)
+            routes[path] = stats
+            lat = stats["latency_ms"]
+            print(
+                f"  {path:<11} {stats['throughput_rps']:>8.1f} req/s  p50={lat['p50']:.1f}ms "
+                f"p95={lat['p95']:.1f}ms p99={lat['p99']:.1f}ms errors={stats['errors']}/{stats['requests']}"
+            )
+        ratios = compare_routes(routes["/ask"], routes["/ask-async"])
+        print(f"  async/sync   throughput x{ratios['throughput']}  p95 x{ratios['p95']}")
+        report["pipelines"][pipeline] = {"routes": routes, "async_vs_sync": ratios}
+
+    write_json(args.output, report)
+    print(f"\n✓ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Memory, scan latency and recall of quantized vector storage against float32.
+
+Local vector index (VECTOR_QUANTIZATION): for every mode (int8, float16) a
+flat collection is built over the same vectors as a float32 one, and the same
+queries are searched at every `--oversampling` (limit * oversampling
+candidates from the quantized scan are rescored at full precision). Reported:
+recall@k against the exact float32 top k, single-query latency percentiles
+and the bytes a scan reads.
+
+Generated datasets need NumPy only (see ann-benchmark.py for the generator):
+
+    python3 quantization-benchmark.py
+    python3 quantization-benchmark.py --sizes 100000 --oversampling 1 2 4 8
+
+With `--docs`, the documents of a dataset and the eval questions are embedded
+with the services' model (needs sentence-transformers), and recall is also
+measured on the questions: the overlap with the float32 top k, and the share
+of expected answers that appear in the retrieved texts (the vector side of
+LightRAG's answer, `top_k` from benchmark.py):
+
+    python3 quantization-benchmark.py --docs data/docs-1000.jsonl --questions lightrag/questions.json
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmark import LIGHTRAG_PARAMS, percentile, write_json
+
+from common import vector_index
+from common.vector_index import LocalVectorIndex
+
+DATASETS = ("clustered", "uniform")
+MODES = ("int8", "float16")
+UPSERT_BATCH = 256
+COLLECTION = "quantization_bench"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+
+class Options:
+    """Attribute bag standing in for Qdrant's VectorParams / SearchParams / PointStruct."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def generate(dataset: str, size: int, queries: int, dim: int, seed: int):
+    """(points, queries) as float32 matrices (same generator as ann-benchmark.py)."""
+    rng = np.random.default_rng(seed)
+    if dataset == "clustered":
+        centers = rng.normal(size=(max(size // 500, 8), dim))
+        points = centers[rng.integers(0, len(centers), size)] + 0.8 * rng.normal(size=(size, dim))
+        query_points = centers[rng.integers(0, len(centers), queries)] + 0.8 * rng.normal(size=(queries, dim))
+    else:
+        points = rng.normal(size=(size, dim))
+        query_points = rng.normal(size=(queries, dim))
+    return points.astype(np.float32), query_points.astype(np.float32)
+
+
+def build(points: np.ndarray, quantization: str, payloads: Optional[List[Dict]] = None) -> LocalVectorIndex:
+    # The mode applies to collections created after it is set
+    vector_index.VECTOR_QUANTIZATION = quantization
+    index = LocalVectorIndex()
+    index.create_collection(COLLECTION, Options(size=points.shape[1], distance="Cosine"))
+    for offset in range(0, len(points), UPSERT_BATCH):
+        batch = points[offset:offset + UPSERT_BATCH]
+        index.upsert(COLLECTION, [
+            Options(id=offset + i, vector=vector, payload=payloads[offset + i] if payloads else None)
+            for i, vector in enumerate(batch)
+        ])
+    return index
+
+
+def timed_search(index: LocalVectorIndex, queries: np.ndarray, k: int, params: Options):
+    """(hits per query, latencies in ms), one query at a time as the services search."""
+    hits, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits.append(index.search(COLLECTION, query, limit=k, search_params=params))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return hits, latencies
+
+
+def recall(found: List[List], truth: List[List]) -> float:
+    return sum(
+        len({hit.id for hit in a} & {hit.id for hit in b}) / len(b) for a, b in zip(found, truth) if b
+    ) / len(truth)
+
+
+def latency_stats(latencies: List[float]) -> Dict:
+    return {
+        "p50": round(percentile(latencies, 50), 3),
+        "p95": round(percentile(latencies, 95), 3),
+        "mean": round(sum(latencies) / len(latencies), 3),
+    }
+
+
+def compare_modes(points: np.ndarray, queries: np.ndarray, k: int, args, payloads: Optional[List[Dict]] = None) -> Dict:
+    """float32 baseline and quantized index modes over the same vectors."""
+    baseline_index = build(points, "none", payloads)
+    truth, latencies = timed_search(baseline_index, queries, k, Options(exact=True))
+    baseline = latency_stats(latencies)
+    scan_bytes = baseline_index.stats()["collections"][COLLECTION]["scan_bytes"]
+    print(f"  float32         recall@{k}=1.000  p50={baseline['p50']:.2f}ms  scan {scan_bytes / 2**20:.1f} MiB")
+    result = {"float32": {"latency_ms": baseline, "scan_bytes": scan_bytes}, "index": {}, "hits": {"float32": truth}}
+
+    for mode in MODES:
+        index = build(points, mode, payloads)
+        scan_bytes = index.stats()["collections"][COLLECTION]["scan_bytes"]
+        sweep = []
+        for oversampling in args.oversampling:
+            hits, latencies = timed_search(index, queries, k, Options(quantization=Options(oversampling=oversampling)))
+            stats = latency_stats(latencies)
+            point = {"oversampling": oversampling, f"recall@{k}": round(recall(hits, truth), 4), "latency_ms": stats}
+            sweep.append(point)
+            result["hits"][f"index-{mode}-x{oversampling:g}"] = hits
+            print(
+                f"  index {mode:<8}  x{oversampling:<4g} recall@{k}={point[f'recall@{k}']:.3f}  "
+                f"p50={stats['p50']:.2f}ms  scan {scan_bytes / 2**20:.1f} MiB"
+            )
+        result["index"][mode] = {"scan_bytes": scan_bytes, "memory_ratio": round(result["float32"]["scan_bytes"] / scan_bytes, 2), "sweep": sweep}
+    return result
+
+
+def answer_coverage(hits: List[List], expected: List[List[str]]) -> float:
+    """Share of expected answers that appear in the text of the retrieved documents."""
+    found = total = 0
+    for question_hits, answers in zip(hits, expected):
+        text = "\n".join((hit.payload or {}).get("text", "") for hit in question_hits)
+        found += sum(1 for answer in answers if answer in text)
+        total += len(answers)
+    return round(found / total, 4) if total else 0.0
+
+
+def run_eval(args) -> Dict:
+    from sentence_transformers import SentenceTransformer
+
+    with open(args.docs, encoding="utf-8") as f:
+        docs = [json.loads(line) for line in f if line.strip()]
+    with open(args.questions, encoding="utf-8") as f:
+        questions = json.load(f)
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    texts = [doc.get("text", "") for doc in docs]
+    points = np.asarray(model.encode(texts, batch_size=64, convert_to_numpy=True), dtype=np.float32)
+    queries = np.asarray(model.encode([q["ask"] for q in questions], convert_to_numpy=True), dtype=np.float32)
+    expected = [q.get("expected", []) for q in questions]
+
+    print(f"\n=== {args.docs}: {len(docs)} docs, {len(questions)} questions, top_k={args.top_k} ===")
+    result = compare_modes(points, queries, args.top_k, args, [{"text": text} for text in texts])
+    hits = result.pop("hits")
+    result["answer_coverage"] = {name: answer_coverage(mode_hits, expected) for name, mode_hits in hits.items()}
+    for name, coverage in result["answer_coverage"].items():
+        print(f"  answers in top {args.top_k}  {name:<22} {coverage:.3f}")
+    result.update({"docs": args.docs, "questions": args.questions, "top_k": args.top_k, "model": EMBEDDING_MODEL})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory, scan latency and recall of quantized vector storage")
+    parser.add_argument("--datasets", nargs="+", choices=DATASETS, default=list(DATASETS),
+                        help="Generated datasets (default: both)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000],
+                        help="Points per generated dataset (default: 10000 100000, 0 to skip)")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension (default: 384)")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per generated dataset (default: 200)")
+    parser.add_argument("--k", type=int, default=10, help="Neighbors per query on generated datasets (default: 10)")
+    parser.add_argument("--oversampling", nargs="+", type=float, default=[1, 2, 4],
+                        help="Rescored candidates per result (default: 1 2 4)")
+    parser.add_argument("--seed", type=int, default=42, help="Dataset RNG seed (default: 42)")
+    parser.add_argument("--docs", default=None, help="Also measure the eval questions on this dataset (JSONL)")
+    parser.add_argument("--questions", default="lightrag/questions.json",
+                        help="Eval questions for --docs (default: lightrag/questions.json)")
+    parser.add_argument("--top-k", type=int, default=LIGHTRAG_PARAMS["top_k"],
+                        help=f"Documents per question for --docs (default: {LIGHTRAG_PARAMS['top_k']})")
+    parser.add_argument("--output", default="bench/quantization.json", help="JSON report path (default: bench/quantization.json)")
+    args = parser.parse_args()
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "dim": args.dim,
+            "queries": args.queries,
+            "k": args.k,
+            "oversampling": args.oversampling,
+            "seed": args.seed,
+        },
+        "generated": [],
+    }
+    for dataset in args.datasets:
+        for size in args.sizes:
+            if size <= 0:
+                continue
+            print(f"\n=== {dataset}, {size} x {args.dim} ===")
+            points, queries = generate(dataset, size, args.queries, args.dim, args.seed)
+            result = compare_modes(points, queries, args.k, args)
+            result.pop("hits")
+            report["generated"].append({"dataset": dataset, "size": size, **result})
+    if args.docs:
+        report["eval"] = run_eval(args)
+
+    write_json(args.output, report)
+    print(f"\n✓ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
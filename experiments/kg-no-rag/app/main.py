@@ -3,6 +3,7 @@ from neo4j import GraphDatabase
 from qdrant_client import QdrantClient
 from qdrant_client.models import VectorParams, Distance, PointStruct
 from sentence_transformers import SentenceTransformer
+from common.vector_index import VECTOR_STORE, open_local_index
 import json
 import os
 
@@ -11,7 +12,10 @@ app = FastAPI()
 NEO4J_URI="bolt://neo4j:7687"; NEO4J_USER="neo4j"; NEO4J_PASS="password"
 driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
 
-qdrant = QdrantClient(host="qdrant", port=6333)
+# ベクトル検索: Qdrant（デフォルト）または VECTOR_STORE=local でプロセス内の NumPy インデックス（seed.py のスナップショットを読み込む）
+qdrant = open_local_index()
+if qdrant is None:
+    qdrant = QdrantClient(host="qdrant", port=6333)
 COL="docs"
 embed = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
 
@@ -209,6 +213,8 @@ def switch_dataset(file: str):
         # ドキュメントをアップサート
         points = [PointStruct(id=i+1, vector=vecs[i], payload=texts[i]) for i in range(len(texts))]
         qdrant.upsert(collection_name=COL, points=points)
+        if VECTOR_STORE == "local":
+            qdrant.save(COL)
 
         # グローバル変数を更新
         current_dataset = {"file": file, "count": len(texts)}
@@ -2,6 +2,7 @@ from neo4j import GraphDatabase
 from qdrant_client import QdrantClient
 from qdrant_client.models import VectorParams, Distance, PointStruct
 from sentence_transformers import SentenceTransformer
+from common.vector_index import VECTOR_STORE, open_local_index
 import json, time, os
 
 driver = GraphDatabase.driver("bolt://neo4j:7687", auth=("neo4j","password"))
@@ -12,7 +13,9 @@ with driver.session() as s, open("seed.cypher") as f:
     for stmt in statements:
         s.run(stmt)
 
-client = QdrantClient(host="qdrant", port=6333)
+client = open_local_index()
+if client is None:
+    client = QdrantClient(host="qdrant", port=6333)
 model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
 docs_file = os.getenv("DOCS_FILE", "docs.jsonl")
 texts = [json.loads(l) for l in open(docs_file)]
@@ -26,4 +29,6 @@ if "docs" not in [c.name for c in client.get_collections().collections]:
 
 points = [PointStruct(id=i+1, vector=vecs[i], payload=texts[i]) for i in range(len(texts))]
 client.upsert(collection_name="docs", points=points)
+if VECTOR_STORE == "local":
+    client.save("docs")
 print("Seed done")
\ No newline at end of file